@@ -0,0 +1,43 @@
+"""
+orjson rendering and a .values() list() for BookListCreateView.
+
+Every BookSerializer field is a plain column (author is rendered as its
+pk), so a .values() row already is the serialized dict and the response is
+byte-for-byte what BookSerializer + DRF's JSONRenderer produce.
+"""
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to DRF's json.dumps rendering
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes compact, unicode JSON with orjson."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or not self.compact or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data)
+        except TypeError:
+            # Decimal, lazy translations, huge ints, ...: let DRF's encoder handle them
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class FastListMixin:
+    """list() straight from .values(*fast_fields) for unpaginated JSON responses."""
+    fast_fields = None
+
+    def list(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        if (not getattr(settings, 'API_FAST_LIST_RENDERING', True) or self.paginator is not None
+                or not isinstance(renderer, FastJSONRenderer)):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(list(queryset.values(*self.fast_fields)))
@@ -1,8 +1,15 @@
+from decimal import Decimal
+from unittest import mock
+
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils.translation import gettext_lazy
 from rest_framework import status
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
-from api.models import Book
+from api.fastpath import FastJSONRenderer
+from api.models import Author, Book
 
 
 class BookAPITestCase(APITestCase):
@@ -76,3 +83,37 @@ class BookAPITestCase(APITestCase):
     def test_delete_book_unauthenticated(self):
         response = self.client.delete(self.detail_url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class BookListFastPathTestCase(APITestCase):
+
+    def setUp(self):
+        author = Author.objects.create(name="Chimamanda Ngozi Adichie")
+        for year, title in [(2006, "Half of a Yellow Sun"), (2013, "Americanah \u2028"), (2003, "Purple Hibiscus")]:
+            Book.objects.create(title=title, author=author, publication_year=year)
+
+    def test_fast_list_is_byte_identical(self):
+        url = reverse("book-list")
+        for params in ({}, {"ordering": "-publication_year"}, {"title": "an"}):
+            fast = self.client.get(url, params)
+            # Baseline: BookSerializer, encoded by DRF's own JSONRenderer rather than orjson
+            with override_settings(API_FAST_LIST_RENDERING=False), \
+                    mock.patch.object(FastJSONRenderer, "render", JSONRenderer.render):
+                slow = self.client.get(url, params)
+            self.assertEqual(fast.status_code, status.HTTP_200_OK)
+            self.assertEqual(fast.content, slow.content)
+
+    def test_renderer_falls_back_for_types_orjson_rejects(self):
+        data = {"price": Decimal("1.50"), "label": gettext_lazy("Books")}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class BookPkRequiredTestCase(APITestCase):
+
+    def test_update_and_delete_without_pk_are_not_allowed(self):
+        User.objects.create_user(username="testuser", password="testpass123")
+        self.client.login(username="testuser", password="testpass123")
+        for name in ("book-update-no-pk", "book-delete-no-pk"):
+            for method in ("get", "put", "delete"):
+                response = getattr(self.client, method)(reverse(name))
+                self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
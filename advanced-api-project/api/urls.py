@@ -1,18 +1,12 @@
 from django.urls import path
-from .views import (
-    BookListView,
-    BookDetailView,
-    BookCreateView,
-    BookUpdateView,
-    BookDeleteView,
-)
+from .views import BookListCreateView, BookPkRequiredView, BookRetrieveUpdateDestroyView
 
 urlpatterns = [
-    path("books/", BookListView.as_view(), name="book-list"),
-    path("books/<int:pk>/", BookDetailView.as_view(), name="book-detail"),
-    path("books/create/", BookCreateView.as_view(), name="book-create"),
-    path("books/<int:pk>/update/", BookUpdateView.as_view(), name="book-update"),
-    path("books/<int:pk>/delete/", BookDeleteView.as_view(), name="book-delete"),
-    path("books/update", BookUpdateView.as_view(), name="book-update-no-pk"),
-    path("books/delete", BookDeleteView.as_view(), name="book-delete-no-pk"),
+    path("books/", BookListCreateView.as_view(), name="book-list"),
+    path("books/<int:pk>/", BookRetrieveUpdateDestroyView.as_view(), name="book-detail"),
+    path("books/create/", BookListCreateView.as_view(), name="book-create"),
+    path("books/<int:pk>/update/", BookRetrieveUpdateDestroyView.as_view(), name="book-update"),
+    path("books/<int:pk>/delete/", BookRetrieveUpdateDestroyView.as_view(), name="book-delete"),
+    path("books/update", BookPkRequiredView.as_view(), name="book-update-no-pk"),
+    path("books/delete", BookPkRequiredView.as_view(), name="book-delete-no-pk"),
 ]
@@ -1,11 +1,14 @@
 # api/views.py
 from rest_framework import generics, filters
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
 from django_filters import rest_framework as filters_django
 from django_filters.rest_framework import DjangoFilterBackend
 
 from .models import Book
 from .serializers import BookSerializer
+from .fastpath import FastJSONRenderer, FastListMixin
 
 
 # Define the filter class for Book
@@ -20,9 +23,12 @@ class BookFilter(filters_django.FilterSet):
 
 
 # API view for listing and creating books
-class BookListCreateView(generics.ListCreateAPIView):
+# (GET renders from .values() rows via api.fastpath; output matches BookSerializer)
+class BookListCreateView(FastListMixin, generics.ListCreateAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
+    fast_fields = BookSerializer.Meta.fields
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     # Add filtering + ordering + search
@@ -40,3 +46,9 @@ class BookRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticated]
+
+
+# books/update and books/delete without a pk: there is no book to act on,
+# so every method is answered with 405 (use books/<pk>/update/ or /delete/)
+class BookPkRequiredView(APIView):
+    permission_classes = [IsAuthenticatedOrReadOnly]
@@ -1,3 +1,25 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from .authentication import token_cache
+
+
+class CachedTokenAuthenticationTestCase(APITestCase):
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpass123")
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_repeat_requests_skip_the_token_query(self):
+        self.assertEqual(self.client.get("/api/books/").status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(1):  # only the book query
+            self.client.get("/api/books/")
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get("/api/books/")
+        self.token.delete()
+        self.assertEqual(self.client.get("/api/books/").status_code, status.HTTP_401_UNAUTHORIZED)
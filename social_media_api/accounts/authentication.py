@@ -0,0 +1,92 @@
+"""
+Token authentication with an in-process cache.
+
+CachedTokenAuthentication answers repeat requests from a bounded LRU keyed
+by the SHA-256 digest of the token, so hot API traffic skips the
+Token -> User join. Entries expire after AUTH_TOKEN_CACHE_TTL seconds and
+are dropped when the token is deleted or the user is deactivated (see
+accounts.signals). The cache is per process: other processes pick up a
+revoked token once their entry expires.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+CACHE_SIZE = getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 10000)
+CACHE_TTL = getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 60)
+
+
+def token_digest(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class TokenCache:
+    def __init__(self, max_size=CACHE_SIZE, ttl=CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()  # digest -> (user, token, expires_at)
+        self.by_user = {}             # user id -> digests, for deactivation
+        self.lock = threading.Lock()
+
+    def get(self, digest):
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is None:
+                return None
+            if entry[2] < time.monotonic():
+                self._discard(digest)
+                return None
+            self.entries.move_to_end(digest)
+            return entry[0], entry[1]
+
+    def set(self, digest, user, token):
+        with self.lock:
+            self._discard(digest)
+            self.entries[digest] = (user, token, time.monotonic() + self.ttl)
+            self.by_user.setdefault(user.pk, set()).add(digest)
+            while len(self.entries) > self.max_size:
+                self._discard(next(iter(self.entries)))
+
+    def _discard(self, digest):
+        entry = self.entries.pop(digest, None)
+        if entry is not None:
+            digests = self.by_user.get(entry[0].pk)
+            if digests is not None:
+                digests.discard(digest)
+                if not digests:
+                    del self.by_user[entry[0].pk]
+
+    def invalidate_token(self, key):
+        with self.lock:
+            self._discard(token_digest(key))
+
+    def invalidate_user(self, user_id):
+        with self.lock:
+            for digest in list(self.by_user.get(user_id, ())):
+                self._discard(digest)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.by_user.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        digest = token_digest(key)
+        cached = token_cache.get(digest)
+        if cached is not None:
+            user, token = cached
+            # Hand each request its own copy so views can't mutate the cached user
+            return copy.copy(user), token
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(digest, copy.copy(user), token)
+        return user, token
@@ -0,0 +1,113 @@
+"""
+Follow graph lookups.
+
+Following/follower id sets are cached per user and invalidated from the
+m2m_changed signal (see accounts.signals), so feed and profile rendering
+read them without touching the CustomUser.following join table.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import CustomUser
+
+Follow = CustomUser.following.through
+
+GRAPH_CACHE_TIMEOUT = getattr(settings, 'FOLLOW_GRAPH_CACHE_TIMEOUT', 3600)
+
+
+def following_key(user_id):
+    return f'follow:following:{user_id}'
+
+
+def followers_key(user_id):
+    return f'follow:followers:{user_id}'
+
+
+def following_ids(user_id):
+    """Ids of the users `user_id` follows."""
+    ids = cache.get(following_key(user_id))
+    if ids is None:
+        ids = frozenset(Follow.objects.filter(from_customuser_id=user_id).values_list('to_customuser_id', flat=True))
+        cache.set(following_key(user_id), ids, GRAPH_CACHE_TIMEOUT)
+    return ids
+
+
+def follower_ids(user_id):
+    """Ids of the users following `user_id`."""
+    ids = cache.get(followers_key(user_id))
+    if ids is None:
+        ids = frozenset(Follow.objects.filter(to_customuser_id=user_id).values_list('from_customuser_id', flat=True))
+        cache.set(followers_key(user_id), ids, GRAPH_CACHE_TIMEOUT)
+    return ids
+
+
+def invalidate(follower_ids_changed=(), followed_ids_changed=()):
+    """
+    Drop cached sets now, and again after commit in case a concurrent reader
+    cached the pre-commit rows in between.
+    """
+    keys = [following_key(pk) for pk in follower_ids_changed] + [followers_key(pk) for pk in followed_ids_changed]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def is_following(user_id, other_id):
+    return other_id in following_ids(user_id)
+
+
+def follows_you_back(user_id, other_id):
+    """Whether `other_id` follows `user_id`."""
+    return user_id in following_ids(other_id)
+
+
+def adjust_follow_counts(follower_ids_changed, followed_ids_changed, delta):
+    """
+    Apply one follow edge change per (follower, followed) pair to the
+    denormalized counters. Every follower gained or lost one edge per
+    followed user and vice versa.
+    """
+    follower_ids_changed, followed_ids_changed = list(follower_ids_changed), list(followed_ids_changed)
+    if not follower_ids_changed or not followed_ids_changed:
+        return
+    CustomUser.objects.filter(pk__in=follower_ids_changed).update(
+        following_count=Greatest(F('following_count') + delta * len(followed_ids_changed), 0)
+    )
+    CustomUser.objects.filter(pk__in=followed_ids_changed).update(
+        followers_count=Greatest(F('followers_count') + delta * len(follower_ids_changed), 0)
+    )
+
+
+def existing_follows(user_id, user_ids):
+    return set(
+        Follow.objects.filter(from_customuser_id=user_id, to_customuser_id__in=user_ids)
+        .values_list('to_customuser_id', flat=True)
+    )
+
+
+@transaction.atomic
+def bulk_follow(user, user_ids):
+    """Follow many users with one INSERT; returns the ids that were newly followed."""
+    candidates = set(user_ids) - {user.pk}
+    candidates -= existing_follows(user.pk, candidates)
+    targets = set(CustomUser.objects.filter(pk__in=candidates).values_list('pk', flat=True))
+    Follow.objects.bulk_create(
+        [Follow(from_customuser_id=user.pk, to_customuser_id=pk) for pk in targets],
+        ignore_conflicts=True,
+    )
+    adjust_follow_counts([user.pk], targets, 1)
+    invalidate([user.pk], targets)
+    return targets
+
+
+@transaction.atomic
+def bulk_unfollow(user, user_ids):
+    """Unfollow many users with one DELETE; returns the ids that were unfollowed."""
+    targets = existing_follows(user.pk, set(user_ids))
+    Follow.objects.filter(from_customuser_id=user.pk, to_customuser_id__in=targets).delete()
+    adjust_follow_counts([user.pk], targets, -1)
+    invalidate([user.pk], targets)
+    return targets
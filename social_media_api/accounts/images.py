@@ -0,0 +1,104 @@
+"""
+Profile picture thumbnails.
+
+Uploads are stored as-is during the request. schedule_thumbnails() queues
+generate_thumbnails() to run once the transaction commits. It writes a
+square, re-encoded JPEG for each PROFILE_PICTURE_SIZES entry and records
+their storage names in CustomUser.profile_thumbnails. Set
+PROFILE_PICTURE_ASYNC = False to do the work inline (tests, management
+commands).
+"""
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .models import CustomUser
+
+logger = logging.getLogger(__name__)
+
+SIZES = getattr(settings, 'PROFILE_PICTURE_SIZES', {'small': 64, 'medium': 200, 'large': 600})
+JPEG_QUALITY = getattr(settings, 'PROFILE_PICTURE_JPEG_QUALITY', 85)
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'PROFILE_PICTURE_WORKERS', 2),
+    thread_name_prefix='thumbnails',
+)
+
+
+def thumbnail_name(user_id, source_name, size_name):
+    # The source digest changes the name on every new upload, so CDNs and browsers never serve a stale image
+    digest = hashlib.sha1(source_name.encode()).hexdigest()[:10]
+    return f'profile_pics/thumbs/{user_id}/{size_name}-{digest}.jpg'
+
+
+def render_thumbnail(image, edge):
+    thumb = ImageOps.fit(image, (edge, edge), Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    thumb.save(buffer, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def generate_thumbnails(user_id):
+    user = CustomUser.objects.filter(pk=user_id).only('id', 'profile_picture', 'profile_thumbnails').first()
+    if user is None or not user.profile_picture:
+        return {}
+    source_name = user.profile_picture.name
+    with user.profile_picture.open('rb') as source:
+        image = Image.open(source)
+        # Honour the camera orientation before EXIF is dropped, then flatten alpha/palette images for JPEG
+        image = ImageOps.exif_transpose(image).convert('RGB')
+
+    thumbnails = {}
+    for size_name, edge in SIZES.items():
+        name = thumbnail_name(user_id, source_name, size_name)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        thumbnails[size_name] = default_storage.save(name, ContentFile(render_thumbnail(image, edge)))
+
+    # Only record the result if the picture wasn't replaced while we were working
+    updated = CustomUser.objects.filter(pk=user_id, profile_picture=source_name).update(profile_thumbnails=thumbnails)
+    if not updated:
+        for name in thumbnails.values():
+            default_storage.delete(name)
+        return {}
+    for name in user.profile_thumbnails.values():
+        if name not in thumbnails.values():
+            default_storage.delete(name)
+    return thumbnails
+
+
+def run_generate_thumbnails(user_id):
+    try:
+        generate_thumbnails(user_id)
+    except Exception:
+        logger.exception('Thumbnail generation failed for user %s', user_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_thumbnails(user):
+    """Generate thumbnails for `user` after the current transaction commits."""
+    user_id = user.pk
+    if getattr(settings, 'PROFILE_PICTURE_ASYNC', True):
+        transaction.on_commit(lambda: _executor.submit(run_generate_thumbnails, user_id))
+    else:
+        transaction.on_commit(lambda: generate_thumbnails(user_id))
+
+
+def thumbnail_url(user, size_name, request=None):
+    """URL of the `size_name` thumbnail, falling back to the original upload until it exists."""
+    name = (user.profile_thumbnails or {}).get(size_name)
+    if name:
+        url = default_storage.url(name)
+    elif user.profile_picture:
+        url = user.profile_picture.url
+    else:
+        return None
+    return request.build_absolute_uri(url) if request is not None else url
@@ -0,0 +1,177 @@
+"""
+Stateless JWT authentication.
+
+Tokens are HS256-signed with keys from a local keyset file
+(JWT_KEYSET_FILE). The header carries the key id (``kid``), so keys can be
+rotated with ``manage.py rotate_jwt_keys`` while older keys keep verifying
+tokens issued before the rotation. The file is re-read when it changes.
+
+Access tokens are verified locally, with no database read. Refresh tokens
+are checked against RevokedToken and rotated on every use.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+ACCESS_TOKEN_LIFETIME = getattr(settings, 'JWT_ACCESS_TOKEN_LIFETIME', 300)
+REFRESH_TOKEN_LIFETIME = getattr(settings, 'JWT_REFRESH_TOKEN_LIFETIME', 7 * 24 * 3600)
+KEYSET_FILE = getattr(settings, 'JWT_KEYSET_FILE', None)
+# Allowed clock skew between API nodes, in seconds
+LEEWAY = getattr(settings, 'JWT_LEEWAY', 30)
+
+
+class InvalidToken(exceptions.AuthenticationFailed):
+    default_detail = 'Token is invalid or expired.'
+    default_code = 'token_not_valid'
+
+
+def b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def b64decode(data):
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def default_key():
+    """Key used until rotate_jwt_keys writes a keyset file (which then keeps it as a previous key)."""
+    return hashlib.sha256(f'jwt:{settings.SECRET_KEY}'.encode()).hexdigest()
+
+
+class KeySet:
+    """Signing keys by kid, reloaded whenever the keyset file's mtime changes."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.active_kid = None
+        self.keys = {}
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            # No keyset yet: derive a single key from SECRET_KEY
+            self.active_kid = 'default'
+            self.keys = {'default': default_key()}
+            self.mtime = None
+            return
+        mtime = os.path.getmtime(self.path)
+        if mtime == self.mtime:
+            return
+        with open(self.path) as keyset_file:
+            data = json.load(keyset_file)
+        self.keys = data['keys']
+        self.active_kid = data['active_kid']
+        self.mtime = mtime
+
+    def signing_key(self):
+        with self.lock:
+            self.load()
+            return self.active_kid, self.keys[self.active_kid]
+
+    def verifying_key(self, kid):
+        with self.lock:
+            self.load()
+            return self.keys.get(kid)
+
+
+keyset = KeySet(KEYSET_FILE)
+
+
+def encode(payload):
+    kid, key = keyset.signing_key()
+    header = {'alg': 'HS256', 'typ': 'JWT', 'kid': kid}
+    signing_input = f"{b64encode(json.dumps(header, separators=(',', ':')).encode())}." \
+                    f"{b64encode(json.dumps(payload, separators=(',', ':')).encode())}"
+    signature = hmac.new(key.encode(), signing_input.encode(), hashlib.sha256).digest()
+    return f"{signing_input}.{b64encode(signature)}"
+
+
+def decode(token, expected_type):
+    try:
+        header_b64, payload_b64, signature_b64 = token.split('.')
+        header = json.loads(b64decode(header_b64))
+        payload = json.loads(b64decode(payload_b64))
+        signature = b64decode(signature_b64)
+    except (ValueError, TypeError):
+        # UnicodeDecodeError and JSONDecodeError are ValueErrors too
+        raise InvalidToken()
+    if not isinstance(header, dict) or not isinstance(payload, dict) or header.get('alg') != 'HS256':
+        raise InvalidToken()
+    key = keyset.verifying_key(header.get('kid'))
+    if key is None:
+        raise InvalidToken()
+    expected = hmac.new(key.encode(), f"{header_b64}.{payload_b64}".encode(), hashlib.sha256).digest()
+    if not hmac.compare_digest(signature, expected):
+        raise InvalidToken()
+    if payload.get('type') != expected_type or payload.get('exp', 0) + LEEWAY < time.time():
+        raise InvalidToken()
+    return payload
+
+
+def issue_tokens(user):
+    """Return a fresh access/refresh pair for `user`."""
+    now = int(time.time())
+    claims = {'sub': user.pk, 'username': user.username, 'iat': now}
+    access = encode({**claims, 'type': 'access', 'exp': now + ACCESS_TOKEN_LIFETIME, 'jti': uuid.uuid4().hex})
+    refresh = encode({**claims, 'type': 'refresh', 'exp': now + REFRESH_TOKEN_LIFETIME, 'jti': uuid.uuid4().hex})
+    return {'access': access, 'refresh': refresh}
+
+
+def revoke_refresh_token(payload):
+    """Add a refresh token's jti to the revocation list; False if it already was revoked."""
+    from .models import RevokedToken
+    expires_at = datetime.fromtimestamp(payload['exp'], tz=dt_timezone.utc)
+    _, created = RevokedToken.objects.get_or_create(jti=payload['jti'], defaults={'expires_at': expires_at})
+    return created
+
+
+def refresh_tokens(refresh_token):
+    """Exchange a refresh token for a new pair; the old refresh token is revoked."""
+    payload = decode(refresh_token, 'refresh')
+    if not revoke_refresh_token(payload):
+        raise InvalidToken('Refresh token has been revoked.')
+    user = get_user_model().objects.filter(pk=payload['sub'], is_active=True).first()
+    if user is None:
+        raise InvalidToken('User is inactive or deleted.')
+    return issue_tokens(user)
+
+
+class StatelessJWTAuthentication(BaseAuthentication):
+    """
+    Authenticate `Authorization: Bearer <access token>` without touching the
+    database. request.user is an unsaved-looking CustomUser carrying only
+    the id and username from the token; re-fetch it before saving.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise InvalidToken('Invalid Authorization header.')
+        try:
+            token = auth[1].decode()
+        except UnicodeDecodeError:
+            raise InvalidToken('Invalid Authorization header.')
+        payload = decode(token, 'access')
+        User = get_user_model()
+        user = User(pk=payload['sub'], username=payload['username'], is_active=True)
+        user._state.adding = False
+        user._state.db = 'default'
+        return user, payload
+
+    def authenticate_header(self, request):
+        return f'{self.keyword} realm="api"'
@@ -0,0 +1,39 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.suggestions import TOP_K, compute_suggestions
+
+
+def synthetic_graph(users, avg_following, rng):
+    """Power-law-ish graph: a few accounts attract most follows."""
+    following = {}
+    for user_id in range(users):
+        count = min(users - 1, max(1, int(rng.expovariate(1 / avg_following))))
+        following[user_id] = {min(int(rng.paretovariate(1.1)) - 1, users - 1) if rng.random() < 0.3
+                              else rng.randrange(users) for _ in range(count)} - {user_id}
+    growth = {user_id: rng.randrange(10) for user_id in rng.sample(range(users), max(1, users // 100))}
+    return following, growth
+
+
+class Command(BaseCommand):
+    help = "Time the suggestion computation on synthetic follow graphs of increasing size (no database writes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000', help="Comma-separated user counts.")
+        parser.add_argument('--avg-following', type=int, default=50)
+        parser.add_argument('--top-k', type=int, default=TOP_K)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.stdout.write(f"{'users':>10} {'edges':>12} {'seconds':>10} {'users/s':>10}")
+        for size in [int(s) for s in options['sizes'].split(',')]:
+            following, growth = synthetic_graph(size, options['avg_following'], rng)
+            edges = sum(len(f) for f in following.values())
+            started = time.perf_counter()
+            for _ in compute_suggestions(range(size), following, growth, options['top_k']):
+                pass
+            seconds = time.perf_counter() - started
+            self.stdout.write(f"{size:>10} {edges:>12} {seconds:>10.2f} {size / seconds:>10.0f}")
@@ -0,0 +1,40 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.authentication import CachedTokenAuthentication, token_cache
+
+
+class Command(BaseCommand):
+    help = "Measure per-request authentication cost with and without the token cache (rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(username=f"benchmark-{time.time_ns()}")
+            token = Token.objects.create(user=user)
+            request = Request(APIRequestFactory().get('/', HTTP_AUTHORIZATION=f"Token {token.key}"))
+
+            results = {}
+            for name, backend in (('database', TokenAuthentication()), ('cached', CachedTokenAuthentication())):
+                token_cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    for _ in range(total):
+                        backend.authenticate(request)
+                    elapsed = time.perf_counter() - started
+                results[name] = elapsed / total * 1e6
+                self.stdout.write(f"{name:>9}: {results[name]:8.1f} us/request, {len(queries)} queries")
+            self.stdout.write(f"   saved: {results['database'] - results['cached']:8.1f} us/request")
+            token_cache.clear()
+            transaction.set_rollback(True)
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import CustomUser, SuggestionRun
+from accounts.suggestions import TOP_K, compute_suggestions, last_run, load_graph, store_suggestions
+
+
+class Command(BaseCommand):
+    help = "Precompute the top-K follow suggestions for every active user."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=TOP_K)
+        parser.add_argument('--batch-size', type=int, default=1000, help="Users written per transaction.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        previous = last_run()
+        following, growth, max_follow_id = load_graph(previous.max_follow_id if previous else 0)
+        loaded = time.perf_counter()
+
+        user_ids = CustomUser.objects.filter(is_active=True).order_by('pk').values_list('pk', flat=True)
+        batch = []
+        total = 0
+        for row in compute_suggestions(user_ids.iterator(chunk_size=10000), following, growth, options['top_k']):
+            batch.append(row)
+            if len(batch) == options['batch_size']:
+                store_suggestions(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            store_suggestions(batch)
+            total += len(batch)
+
+        duration = time.perf_counter() - started
+        SuggestionRun.objects.create(max_follow_id=max_follow_id, users=total, duration_seconds=duration)
+        self.stdout.write(self.style.SUCCESS(
+            f"Suggestions for {total} users in {duration:.2f}s (graph load {loaded - started:.2f}s)."
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from accounts.images import generate_thumbnails
+from accounts.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Generate profile picture thumbnails for users that don't have them yet (or for everyone with --all)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate thumbnails for every user with a picture.')
+
+    def handle(self, *args, **options):
+        users = CustomUser.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True)
+        if not options['all']:
+            users = users.filter(profile_thumbnails={})
+        done = 0
+        for user_id in users.values_list('pk', flat=True).iterator():
+            if generate_thumbnails(user_id):
+                done += 1
+        self.stdout.write(self.style.SUCCESS(f'Generated thumbnails for {done} user(s).'))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from accounts.models import CustomUser
+from posts.models import Post
+
+Follow = CustomUser.following.through
+
+
+def count_subquery(queryset, field):
+    counts = (
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = "Repair drift in CustomUser follower/following/post counters, one batch of users at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        checked = repaired = 0
+
+        while True:
+            ids = list(
+                CustomUser.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            checked += len(ids)
+
+            # Count and write in the same UPDATE, so F() updates from follows,
+            # unfollows and new posts landing meanwhile aren't overwritten
+            actual = {
+                'followers_count': count_subquery(Follow.objects.all(), 'to_customuser'),
+                'following_count': count_subquery(Follow.objects.all(), 'from_customuser'),
+                'posts_count': count_subquery(Post.objects.all(), 'author'),
+            }
+            repaired += CustomUser.objects.filter(pk__in=ids).exclude(**actual).update(**actual)
+
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} users, repaired {repaired}."))
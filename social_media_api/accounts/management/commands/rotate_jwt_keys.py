@@ -0,0 +1,47 @@
+import json
+import os
+import secrets
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.jwt import default_key, keyset
+
+
+class Command(BaseCommand):
+    help = "Generate a new JWT signing key, make it active, and keep the previous --keep keys for verification."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=2,
+                            help='Number of previous keys that still verify tokens (default 2).')
+
+    def handle(self, *args, **options):
+        path = keyset.path
+        if not path:
+            raise CommandError('JWT_KEYSET_FILE is not set.')
+        if os.path.exists(path):
+            with open(path) as keyset_file:
+                keys = json.load(keyset_file)['keys']
+        else:
+            # First rotation: tokens signed with the SECRET_KEY-derived key stay valid
+            keys = {'default': default_key()}
+
+        # Dicts keep insertion order, so the oldest keys are first
+        retained = list(keys.items())[-options['keep']:] if options['keep'] > 0 else []
+        kid = secrets.token_hex(8)
+        data = {'active_kid': kid, 'keys': dict(retained + [(kid, secrets.token_urlsafe(48))])}
+
+        # Write then rename so API processes never read a half-written file. The
+        # file is created 0600, so the keys are never readable by other users.
+        tmp_path = f'{path}.tmp'
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            raise CommandError(f'{tmp_path} exists: another rotation is running, or remove it and retry.')
+        try:
+            with os.fdopen(fd, 'w') as keyset_file:
+                json.dump(data, keyset_file, indent=2)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.stdout.write(self.style.SUCCESS(f'Active key is now {kid}; {len(retained)} previous key(s) kept.'))
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:40
+
+from django.db import migrations
+
+# The auto-created following table can't declare Meta.indexes, so the
+# (side, id) indexes used by the keyset-paginated follower lists are raw SQL
+INDEXES = [
+    ('follow_to_id_idx', 'to_customuser_id, id'),
+    ('follow_from_id_idx', 'from_customuser_id, id'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    for name, columns in INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON accounts_customuser_following ({columns})"
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    for name, _ in INDEXES:
+        schema_editor.execute(f"DROP INDEX {concurrently}IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0003_user_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
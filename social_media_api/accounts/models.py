@@ -1,18 +1,60 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
-from django.contrib.auth.models import AbstractUser
-from django.db import models
-
 class CustomUser(AbstractUser):
     bio = models.TextField(blank=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    # Size name -> storage name of the resized copies written by accounts.images
+    profile_thumbnails = models.JSONField(default=dict, blank=True)
     following = models.ManyToManyField(
         'self',
         symmetrical=False,
         related_name='followers',  # reverse accessor: user.followers.all()
         blank=True
     )
+    # Denormalized counters, kept in sync by accounts.signals / accounts.graph
+    # and posts.views; repaired by the reconcile_user_counters command
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    posts_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.username
+
+
+class FollowSuggestion(models.Model):
+    # Precomputed "who to follow" row, written by compute_follow_suggestions
+    user = models.ForeignKey(CustomUser, related_name='follow_suggestions', on_delete=models.CASCADE)
+    suggested = models.ForeignKey(CustomUser, related_name='+', on_delete=models.CASCADE)
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    mutual_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'suggested')
+        indexes = [
+            models.Index(fields=['user', 'rank'], name='suggestion_user_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"Suggest {self.suggested_id} to {self.user_id}"
+
+
+class SuggestionRun(models.Model):
+    # Follow rows with an id above max_follow_id are "new" for the next run's growth signal
+    finished_at = models.DateTimeField(auto_now_add=True)
+    max_follow_id = models.BigIntegerField(default=0)
+    users = models.PositiveIntegerField(default=0)
+    duration_seconds = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"Suggestion run at {self.finished_at}"
+
+
+class RevokedToken(models.Model):
+    # Used refresh tokens (by jti); rows past expires_at are purged by purge_revoked_tokens
+    jti = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
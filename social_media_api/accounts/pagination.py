@@ -0,0 +1,8 @@
+from rest_framework.pagination import CursorPagination
+
+
+class FollowCursorPagination(CursorPagination):
+    """Keyset pagination over follow rows, newest follow first."""
+    ordering = ('-id',)
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -1,23 +1,80 @@
 from rest_framework import serializers
-from django.contrib.auth import get_user_model
+from django.contrib.auth import authenticate, get_user_model
+from django.db import transaction
 from rest_framework.authtoken.models import Token
 
+from .images import thumbnail_url
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
-    token = serializers.CharField() 
+    token = serializers.CharField(read_only=True)
 
     class Meta:
         model = get_user_model()
         fields = ['username', 'email', 'password', 'bio', 'profile_picture', 'token']
         extra_kwargs = {'password': {'write_only': True}}
 
+    @transaction.atomic
     def create(self, validated_data):
-        # Use get_user_model().objects.create_user directly
+        # User and token are written together; the picture is resized later by accounts.images
         user = get_user_model().objects.create_user(
             username=validated_data['username'],
             email=validated_data['email'],
             password=validated_data['password'],
-            bio=validated_data.get('bio', '')
+            bio=validated_data.get('bio', ''),
+            profile_picture=validated_data.get('profile_picture'),
         )
         token = Token.objects.create(user=user)
         user.token = token.key
         return user
+
+
+class BulkFollowSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=100)
+
+
+class ProfileSerializer(serializers.ModelSerializer):
+    profile_thumbnails = serializers.SerializerMethodField()
+
+    class Meta:
+        model = get_user_model()
+        fields = ['id', 'username', 'bio', 'profile_picture', 'profile_thumbnails',
+                  'followers_count', 'following_count', 'posts_count']
+        read_only_fields = ['id', 'username', 'followers_count', 'following_count', 'posts_count']
+
+    def get_profile_thumbnails(self, obj):
+        request = self.context.get('request')
+        return {size: thumbnail_url(obj, size, request) for size in obj.profile_thumbnails}
+
+
+class UserSummarySerializer(serializers.ModelSerializer):
+    # Lists show the small thumbnail rather than the full upload
+    profile_picture = serializers.SerializerMethodField()
+
+    class Meta:
+        model = get_user_model()
+        fields = ['id', 'username', 'profile_picture']
+
+    def get_profile_picture(self, obj):
+        return thumbnail_url(obj, 'small', self.context.get('request'))
+
+
+class FollowSuggestionSerializer(serializers.Serializer):
+    user = UserSummarySerializer(source='suggested', read_only=True)
+    mutual_count = serializers.IntegerField(read_only=True)
+    score = serializers.FloatField(read_only=True)
+
+
+class TokenObtainSerializer(serializers.Serializer):
+    username = serializers.CharField()
+    password = serializers.CharField(write_only=True)
+
+    def validate(self, attrs):
+        user = authenticate(self.context.get('request'), username=attrs['username'], password=attrs['password'])
+        if user is None or not user.is_active:
+            raise serializers.ValidationError('Unable to log in with provided credentials.')
+        attrs['user'] = user
+        return attrs
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
@@ -0,0 +1,60 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import graph
+from .authentication import token_cache
+from .models import CustomUser
+
+
+def edge_sides(instance, reverse, others):
+    """(follower ids, followed ids) for a change made from either side of the relation."""
+    if reverse:
+        # instance.followers.add(...): the other users follow instance
+        return others, [instance.pk]
+    return [instance.pk], others
+
+
+# Keep cached follow sets and follow counters in step with
+# user.following.add()/remove()/clear() and user.followers.*
+@receiver(m2m_changed, sender=CustomUser.following.through)
+def follow_graph_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    Follow = CustomUser.following.through
+    if action in ('pre_remove', 'pre_clear'):
+        # remove() reports the ids it was given and clear() reports none, so
+        # record which edges really exist before they go
+        if reverse:
+            edges = Follow.objects.filter(to_customuser_id=instance.pk)
+            if pk_set is not None:
+                edges = edges.filter(from_customuser_id__in=pk_set)
+            instance._removed_follow_ids = set(edges.values_list('from_customuser_id', flat=True))
+        else:
+            edges = Follow.objects.filter(from_customuser_id=instance.pk)
+            if pk_set is not None:
+                edges = edges.filter(to_customuser_id__in=pk_set)
+            instance._removed_follow_ids = set(edges.values_list('to_customuser_id', flat=True))
+        return
+
+    if action == 'post_add':
+        # pk_set only holds the edges that were actually inserted
+        followers, followed = edge_sides(instance, reverse, pk_set)
+        graph.adjust_follow_counts(followers, followed, 1)
+        graph.invalidate(followers, followed)
+    elif action in ('post_remove', 'post_clear'):
+        removed = getattr(instance, '_removed_follow_ids', set())
+        instance._removed_follow_ids = set()
+        followers, followed = edge_sides(instance, reverse, removed)
+        graph.adjust_follow_counts(followers, followed, -1)
+        graph.invalidate(followers, followed)
+
+
+# Drop cached token lookups when a token is revoked or its user deactivated
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    token_cache.invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=CustomUser)
+def user_saved(sender, instance, **kwargs):
+    if not instance.is_active:
+        token_cache.invalidate_user(instance.pk)
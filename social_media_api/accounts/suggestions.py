@@ -0,0 +1,87 @@
+"""
+"Who to follow" suggestions.
+
+compute_suggestions() is a pure function over an in-memory follow graph:
+candidates are friends-of-friends scored by how many people you follow
+already follow them, plus a popularity boost from recent follower growth.
+Users with no friends-of-friends are filled from the fastest-growing
+accounts. The compute_follow_suggestions command loads the graph, runs it
+and stores the top K per user in FollowSuggestion.
+"""
+import heapq
+import math
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import CustomUser, FollowSuggestion, SuggestionRun
+
+Follow = CustomUser.following.through
+
+TOP_K = getattr(settings, 'FOLLOW_SUGGESTIONS_TOP_K', 20)
+POPULARITY_WEIGHT = getattr(settings, 'FOLLOW_SUGGESTIONS_POPULARITY_WEIGHT', 0.5)
+# Friends following more accounts than this (bots, aggregators) are not expanded
+MAX_EXPANSION = getattr(settings, 'FOLLOW_SUGGESTIONS_MAX_EXPANSION', 5000)
+
+
+def load_graph(since_follow_id=0):
+    """Return (following adjacency sets, follower growth since since_follow_id, max follow id)."""
+    following = {}
+    growth = {}
+    max_follow_id = since_follow_id
+    rows = Follow.objects.values_list('id', 'from_customuser_id', 'to_customuser_id').iterator(chunk_size=10000)
+    for follow_id, follower_id, followed_id in rows:
+        following.setdefault(follower_id, set()).add(followed_id)
+        if follow_id > since_follow_id:
+            growth[followed_id] = growth.get(followed_id, 0) + 1
+        max_follow_id = max(max_follow_id, follow_id)
+    return following, growth, max_follow_id
+
+
+def popularity(growth, user_id):
+    return POPULARITY_WEIGHT * math.log1p(growth.get(user_id, 0))
+
+
+def compute_suggestions(user_ids, following, growth, top_k=TOP_K):
+    """Yield (user_id, [(suggested_id, score, mutual_count), ...]) best first."""
+    trending = heapq.nlargest(top_k * 4, growth, key=lambda pk: (growth[pk], -pk))
+    for user_id in user_ids:
+        followed = following.get(user_id, set())
+        mutuals = {}
+        for friend_id in followed:
+            friends_of_friend = following.get(friend_id, ())
+            if len(friends_of_friend) > MAX_EXPANSION:
+                continue
+            for candidate in friends_of_friend:
+                mutuals[candidate] = mutuals.get(candidate, 0) + 1
+        for excluded in followed | {user_id}:
+            mutuals.pop(excluded, None)
+
+        scored = [(count + popularity(growth, pk), pk, count) for pk, count in mutuals.items()]
+        best = heapq.nlargest(top_k, scored, key=lambda item: (item[0], -item[1]))
+        if len(best) < top_k:
+            chosen = {pk for _, pk, _ in best}
+            for pk in trending:
+                if len(best) == top_k:
+                    break
+                if pk not in chosen and pk not in followed and pk != user_id:
+                    best.append((popularity(growth, pk), pk, 0))
+        yield user_id, [(pk, score, count) for score, pk, count in best]
+
+
+@transaction.atomic
+def store_suggestions(results):
+    """Replace the stored suggestions of every user in `results` (a list of compute_suggestions rows)."""
+    FollowSuggestion.objects.filter(user_id__in=[user_id for user_id, _ in results]).delete()
+    FollowSuggestion.objects.bulk_create(
+        [
+            FollowSuggestion(user_id=user_id, suggested_id=pk, rank=rank, score=score, mutual_count=count)
+            for user_id, suggestions in results
+            for rank, (pk, score, count) in enumerate(suggestions)
+        ],
+        batch_size=1000,
+    )
+
+
+def last_run():
+    return SuggestionRun.objects.order_by('-id').first()
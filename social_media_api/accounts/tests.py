@@ -1,3 +1,352 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from posts.models import Post, FeedEntry
+from rest_framework.authtoken.models import Token
+
+import os
+import tempfile
+from io import BytesIO
+
+from . import graph, jwt
+from .authentication import TokenCache, token_cache
+from .serializers import UserSummarySerializer
+from .models import FollowSuggestion, RevokedToken, SuggestionRun
+from .suggestions import compute_suggestions
+
+User = get_user_model()
+
+
+class FollowGraphTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="user", password="pass12345")
+        self.others = [User.objects.create_user(username=f"other{i}", password="pass12345") for i in range(3)]
+        self.client.force_authenticate(self.user)
+
+    def test_cached_sets_follow_m2m_changes(self):
+        other = self.others[0]
+        self.assertEqual(graph.following_ids(self.user.pk), frozenset())
+        self.user.following.add(other)
+        self.assertEqual(graph.following_ids(self.user.pk), {other.pk})
+        self.assertEqual(graph.follower_ids(other.pk), {self.user.pk})
+        other.followers.remove(self.user)
+        self.assertEqual(graph.following_ids(self.user.pk), frozenset())
+        with self.assertNumQueries(0):
+            self.assertFalse(graph.is_following(self.user.pk, other.pk))
+
+    def test_bulk_follow_and_unfollow(self):
+        ids = [u.pk for u in self.others] + [self.user.pk, 999999]
+        Post.objects.create(author=self.others[0], title="Hello", content="World")
+        response = self.client.post("/api/accounts/follow/bulk/", {"user_ids": ids}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["followed"], sorted(u.pk for u in self.others))
+        self.assertEqual(set(self.user.following.values_list("pk", flat=True)), {u.pk for u in self.others})
+        self.assertTrue(FeedEntry.objects.filter(user=self.user).exists())
+
+        response = self.client.post("/api/accounts/unfollow/bulk/", {"user_ids": ids[:2]}, format="json")
+        self.assertEqual(response.data["unfollowed"], sorted(ids[:2]))
+        self.assertEqual(graph.following_ids(self.user.pk), {self.others[2].pk})
+        self.assertFalse(FeedEntry.objects.filter(user=self.user).exists())
+
+    def test_relationship(self):
+        other = self.others[0]
+        other.following.add(self.user)
+        response = self.client.get(f"/api/accounts/relationship/{other.pk}/")
+        self.assertEqual(response.data, {"following": False, "follows_you": True, "mutual": False})
+        self.user.following.add(other)
+        response = self.client.get(f"/api/accounts/relationship/{other.pk}/")
+        self.assertTrue(response.data["mutual"])
+
+
+class ProfileTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="user", password="pass12345")
+        self.fans = [User.objects.create_user(username=f"fan{i}", password="pass12345") for i in range(5)]
+        self.client.force_authenticate(self.user)
+
+    def counts(self, user):
+        user.refresh_from_db()
+        return user.followers_count, user.following_count, user.posts_count
+
+    def test_counts_follow_follow_changes(self):
+        for fan in self.fans:
+            fan.following.add(self.user)
+        self.fans[0].following.add(self.user)  # already following: no change
+        self.user.followers.remove(self.fans[1], self.fans[2])
+        self.fans[3].following.remove(self.user)
+        self.fans[3].following.remove(self.user)  # not following any more: no change
+        self.assertEqual(self.counts(self.user), (2, 0, 0))
+        self.assertEqual(self.counts(self.fans[0]), (0, 1, 0))
+        self.user.followers.clear()
+        self.assertEqual(self.counts(self.user), (0, 0, 0))
+        self.assertEqual(self.counts(self.fans[4]), (0, 0, 0))
+
+    def test_bulk_follow_updates_counts(self):
+        graph.bulk_follow(self.user, [fan.pk for fan in self.fans])
+        graph.bulk_follow(self.user, [self.fans[0].pk])
+        graph.bulk_unfollow(self.user, [self.fans[0].pk, self.fans[0].pk])
+        self.assertEqual(self.counts(self.user), (0, 4, 0))
+        self.assertEqual(self.counts(self.fans[1]), (1, 0, 0))
+
+    def test_post_create_and_delete_update_count(self):
+        response = self.client.post("/api/posts/", {"title": "Hello", "content": "World"})
+        self.assertEqual(self.counts(self.user)[2], 1)
+        self.client.delete(f"/api/posts/{response.data['id']}/")
+        self.assertEqual(self.counts(self.user)[2], 0)
+
+    def test_profile_and_follower_pages(self):
+        for fan in self.fans:
+            fan.following.add(self.user)
+        response = self.client.get(f"/api/accounts/profile/{self.user.pk}/")
+        self.assertEqual(response.data["followers_count"], 5)
+        first = self.client.get(f"/api/accounts/profile/{self.user.pk}/followers/", {"page_size": 3})
+        second = self.client.get(first.data["next"])
+        usernames = [u["username"] for u in first.data["results"] + second.data["results"]]
+        self.assertEqual(usernames, ["fan4", "fan3", "fan2", "fan1", "fan0"])
+        response = self.client.get(f"/api/accounts/profile/{self.fans[0].pk}/following/")
+        self.assertEqual([u["username"] for u in response.data["results"]], ["user"])
+
+    def test_update_own_profile(self):
+        response = self.client.patch("/api/accounts/profile/", {"bio": "Hi", "followers_count": 99}, format="json")
+        self.assertEqual(response.data["bio"], "Hi")
+        self.assertEqual(self.counts(self.user)[0], 0)
+
+    def test_reconcile_repairs_drift(self):
+        self.fans[0].following.add(self.user)
+        User.objects.filter(pk=self.user.pk).update(followers_count=42, posts_count=3)
+        out = StringIO()
+        call_command("reconcile_user_counters", batch_size=2, stdout=out)
+        self.assertIn("repaired 1.", out.getvalue())
+        self.assertEqual(self.counts(self.user), (1, 0, 0))
+
+
+class FollowSuggestionTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.users = {name: User.objects.create_user(username=name, password="pass12345")
+                      for name in ["me", "alice", "bob", "carol", "dave", "erin"]}
+        self.client.force_authenticate(self.users["me"])
+
+    def follow(self, follower, *names):
+        self.users[follower].following.add(*[self.users[name] for name in names])
+
+    def test_friends_of_friends_ranked_by_mutuals(self):
+        following = {1: {2, 3}, 2: {4, 5}, 3: {4}, 4: {1}}
+        (user_id, suggestions), = compute_suggestions([1], following, growth={}, top_k=5)
+        self.assertEqual([(pk, count) for pk, _, count in suggestions], [(4, 2), (5, 1)])
+
+    def test_popular_accounts_fill_empty_suggestions(self):
+        (user_id, suggestions), = compute_suggestions([1], {}, growth={7: 5, 8: 1, 1: 9}, top_k=2)
+        self.assertEqual([pk for pk, _, _ in suggestions], [7, 8])
+
+    def test_batch_job_and_endpoint(self):
+        self.follow("me", "alice", "bob")
+        self.follow("alice", "carol", "dave")
+        self.follow("bob", "carol")
+        call_command("compute_follow_suggestions", stdout=StringIO())
+        self.assertEqual(SuggestionRun.objects.count(), 1)
+        self.assertTrue(FollowSuggestion.objects.filter(user=self.users["alice"]).exists())
+
+        graph.following_ids(self.users["me"].pk)  # warm the cached follow set
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/accounts/suggestions/")
+        self.assertEqual([s["user"]["username"] for s in response.data][:2], ["carol", "dave"])
+        self.assertEqual(response.data[0]["mutual_count"], 2)
+
+        self.follow("me", "carol")
+        response = self.client.get("/api/accounts/suggestions/")
+        self.assertNotIn("carol", [s["user"]["username"] for s in response.data])
+
+
+class CachedTokenAuthenticationTestCase(APITestCase):
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username="user", password="pass12345")
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_repeat_requests_skip_the_token_query(self):
+        self.assertEqual(self.client.get("/api/accounts/profile/").status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/accounts/profile/")
+        self.assertEqual(response.data["username"], "user")
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get("/api/accounts/profile/")
+        self.token.delete()
+        self.assertEqual(self.client.get("/api/accounts/profile/").status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get("/api/accounts/profile/")
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/accounts/profile/").status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cache_is_bounded_and_expires(self):
+        cache = TokenCache(max_size=2, ttl=60)
+        for digest in "abc":
+            cache.set(digest, self.user, self.token)
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        cache.ttl = -1
+        cache.set("d", self.user, self.token)
+        self.assertIsNone(cache.get("d"))
+
+
+class StatelessJWTTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="jwtuser", password="pass12345")
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.original_path = jwt.keyset.path
+        jwt.keyset.path = os.path.join(self.tmpdir.name, 'jwt_keys.json')
+        jwt.keyset.mtime = None
+
+    def tearDown(self):
+        jwt.keyset.path = self.original_path
+        jwt.keyset.mtime = None
+        self.tmpdir.cleanup()
+
+    def obtain(self):
+        response = self.client.post('/api/accounts/token/', {'username': 'jwtuser', 'password': 'pass12345'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_access_token_is_verified_without_queries(self):
+        tokens = self.obtain()
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        with self.assertNumQueries(0):
+            user, payload = jwt.StatelessJWTAuthentication().authenticate(request)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(payload['type'], 'access')
+
+    def test_tampered_and_refresh_tokens_are_rejected_as_access(self):
+        tokens = self.obtain()
+        header, payload, signature = tokens['access'].split('.')
+        forged = jwt.b64encode(b'{"sub":1,"username":"x","type":"access","exp":9999999999}')
+        for token in (f'{header}.{forged}.{signature}', tokens['refresh']):
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            self.assertEqual(self.client.get('/api/accounts/profile/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_malformed_tokens_are_401_not_500(self):
+        not_an_object = jwt.b64encode(b'[1]')
+        valid_header = jwt.b64encode(b'{"alg":"HS256","typ":"JWT","kid":"default"}')
+        for token in (f'{not_an_object}.{not_an_object}.AAAA', f'{valid_header}.{not_an_object}.AAAA', 'caf\xe9.a.b'):
+            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            self.assertEqual(self.client.get('/api/accounts/profile/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_first_rotation_keeps_default_key_tokens_valid(self):
+        token = self.obtain()['access']
+        self.assertEqual(jwt.decode(token, 'access')['sub'], self.user.pk)
+        call_command('rotate_jwt_keys', stdout=StringIO())
+        jwt.keyset.mtime = None
+        self.assertEqual(jwt.decode(token, 'access')['sub'], self.user.pk)
+
+    def test_refresh_rotates_and_old_refresh_is_revoked(self):
+        tokens = self.obtain()
+        response = self.client.post('/api/accounts/token/refresh/', {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(RevokedToken.objects.count(), 1)
+        reused = self.client.post('/api/accounts/token/refresh/', {'refresh': tokens['refresh']})
+        self.assertEqual(reused.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        profile = self.client.patch('/api/accounts/profile/', {'bio': 'hello'})
+        self.assertEqual(profile.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.bio, 'hello')
+
+    def test_key_rotation_keeps_old_tokens_valid_until_dropped(self):
+        call_command('rotate_jwt_keys', stdout=StringIO())
+        old_token = self.obtain()['access']
+        self.assertIsNotNone(jwt.decode(old_token, 'access'))
+
+        call_command('rotate_jwt_keys', '--keep', '1', stdout=StringIO())
+        jwt.keyset.mtime = None
+        self.assertIsNotNone(jwt.decode(old_token, 'access'))
+        self.assertIsNotNone(jwt.decode(self.obtain()['access'], 'access'))
+
+        call_command('rotate_jwt_keys', '--keep', '0', stdout=StringIO())
+        jwt.keyset.mtime = None
+        with self.assertRaises(jwt.InvalidToken):
+            jwt.decode(old_token, 'access')
+
+    def test_keyset_file_is_never_readable_by_others(self):
+        umask = os.umask(0)  # a permissive umask must not leak into the file mode
+        try:
+            call_command('rotate_jwt_keys', stdout=StringIO())
+        finally:
+            os.umask(umask)
+        self.assertEqual(os.stat(jwt.keyset.path).st_mode & 0o777, 0o600)
+
+        before = open(jwt.keyset.path).read()
+        open(f'{jwt.keyset.path}.tmp', 'w').close()
+        with self.assertRaises(CommandError):
+            call_command('rotate_jwt_keys', stdout=StringIO())
+        self.assertEqual(open(jwt.keyset.path).read(), before)
+
+
+def make_upload(size=(1200, 800), fmt='PNG'):
+    buffer = BytesIO()
+    Image.new('RGBA', size, (200, 30, 30, 255)).save(buffer, format=fmt)
+    return SimpleUploadedFile(f'avatar.{fmt.lower()}', buffer.getvalue(), content_type=f'image/{fmt.lower()}')
+
+
+@override_settings(PROFILE_PICTURE_ASYNC=False)
+class RegistrationTestCase(APITestCase):
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.media_override = override_settings(MEDIA_ROOT=self.media.name)
+        self.media_override.enable()
+
+    def tearDown(self):
+        self.media_override.disable()
+        self.media.cleanup()
+
+    def test_registration_creates_user_and_token_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/accounts/register/', {
+                'username': 'newbie', 'email': 'newbie@example.com', 'password': 'pass12345',
+            })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        token_queries = [q['sql'] for q in queries if 'authtoken_token' in q['sql']]
+        self.assertEqual(len(token_queries), 1)
+        self.assertTrue(token_queries[0].startswith('INSERT'))
+        user = User.objects.get(username='newbie')
+        self.assertEqual(Token.objects.get(user=user).key, response.data['token'])
+
+    def test_profile_picture_is_resized_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/accounts/register/', {
+                'username': 'pic', 'email': 'pic@example.com', 'password': 'pass12345',
+                'profile_picture': make_upload(),
+            }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        user = User.objects.get(username='pic')
+        self.assertEqual(set(user.profile_thumbnails), {'small', 'medium', 'large'})
+        with Image.open(os.path.join(self.media.name, user.profile_thumbnails['small'])) as thumb:
+            self.assertEqual((thumb.format, thumb.size), ('JPEG', (64, 64)))
+
+        self.client.force_authenticate(user)
+        response = self.client.get(f'/api/accounts/profile/{user.pk}/followers/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        summary = UserSummarySerializer(user).data
+        self.assertTrue(summary['profile_picture'].endswith(user.profile_thumbnails['small']))
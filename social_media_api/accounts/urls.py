@@ -1,10 +1,26 @@
 from django.urls import path
 from rest_framework.authtoken.views import obtain_auth_token
-from .views import RegisterView, FollowUserView, UnfollowUserView
+from .views import (
+    RegisterView, FollowUserView, UnfollowUserView,
+    BulkFollowView, BulkUnfollowView, RelationshipView,
+    MyProfileView, ProfileView, FollowListView, FollowSuggestionView,
+    TokenObtainView, TokenRefreshView, TokenRevokeView,
+)
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', obtain_auth_token, name='login'),
+    path('token/', TokenObtainView.as_view(), name='token-obtain'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
+    path('token/revoke/', TokenRevokeView.as_view(), name='token-revoke'),
     path('follow/<int:user_id>/', FollowUserView.as_view(), name='follow-user'),
     path('unfollow/<int:user_id>/', UnfollowUserView.as_view(), name='unfollow-user'),
+    path('follow/bulk/', BulkFollowView.as_view(), name='bulk-follow'),
+    path('unfollow/bulk/', BulkUnfollowView.as_view(), name='bulk-unfollow'),
+    path('relationship/<int:user_id>/', RelationshipView.as_view(), name='relationship'),
+    path('suggestions/', FollowSuggestionView.as_view(), name='follow-suggestions'),
+    path('profile/', MyProfileView.as_view(), name='my-profile'),
+    path('profile/<int:user_id>/', ProfileView.as_view(), name='profile'),
+    path('profile/<int:user_id>/followers/', FollowListView.as_view(direction='followers'), name='followers'),
+    path('profile/<int:user_id>/following/', FollowListView.as_view(direction='following'), name='following'),
 ]
@@ -1,36 +1,183 @@
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
-from rest_framework.authtoken.models import Token
-from .serializers import UserRegistrationSerializer
-from .models import CustomUser
+from .serializers import (
+    UserRegistrationSerializer, BulkFollowSerializer, ProfileSerializer, UserSummarySerializer,
+    FollowSuggestionSerializer, TokenObtainSerializer, RefreshTokenSerializer,
+)
+from .models import CustomUser, FollowSuggestion
+from .pagination import FollowCursorPagination
+from . import graph, jwt
+from .images import schedule_thumbnails
+from posts.feed import backfill_feed, purge_feed, purge_feed_authors
 
 # Registration View
 class RegisterView(generics.CreateAPIView):
     serializer_class = UserRegistrationSerializer
 
-    def create(self, request, *args, **kwargs):
-        response = super().create(request, *args, **kwargs)
-        user = self.get_serializer().instance
-        token, created = Token.objects.get_or_create(user=user)
-        response.data['token'] = token.key
-        return response
+    def perform_create(self, serializer):
+        # The serializer creates the user and token in one transaction
+        user = serializer.save()
+        if user.profile_picture:
+            schedule_thumbnails(user)
 
 # Follow User
 class FollowUserView(generics.GenericAPIView):
     queryset = CustomUser.objects.all()
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'follows'
 
     def post(self, request, user_id, *args, **kwargs):
         user_to_follow = self.get_queryset().get(pk=user_id)
         request.user.following.add(user_to_follow)
+        backfill_feed(request.user, user_to_follow)
         return Response({'status': f'You are now following {user_to_follow.username}'}, status=status.HTTP_200_OK)
 
 # Unfollow User
 class UnfollowUserView(generics.GenericAPIView):
     queryset = CustomUser.objects.all()
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'follows'
 
     def post(self, request, user_id, *args, **kwargs):
         user_to_unfollow = self.get_queryset().get(pk=user_id)
         request.user.following.remove(user_to_unfollow)
+        purge_feed(request.user, user_to_unfollow)
         return Response({'status': f'You have unfollowed {user_to_unfollow.username}'}, status=status.HTTP_200_OK)
+
+
+# Follow several users at once
+class BulkFollowView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'follows'
+    serializer_class = BulkFollowSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        followed = graph.bulk_follow(request.user, serializer.validated_data['user_ids'])
+        for author in CustomUser.objects.filter(pk__in=followed):
+            backfill_feed(request.user, author)
+        return Response({'followed': sorted(followed)}, status=status.HTTP_200_OK)
+
+# Unfollow several users at once
+class BulkUnfollowView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'follows'
+    serializer_class = BulkFollowSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        unfollowed = graph.bulk_unfollow(request.user, serializer.validated_data['user_ids'])
+        purge_feed_authors(request.user, unfollowed)
+        return Response({'unfollowed': sorted(unfollowed)}, status=status.HTTP_200_OK)
+
+# Relationship between the current user and another user
+class RelationshipView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, user_id, *args, **kwargs):
+        following = graph.is_following(request.user.pk, user_id)
+        followed_by = graph.follows_you_back(request.user.pk, user_id)
+        return Response({
+            'following': following,
+            'follows_you': followed_by,
+            'mutual': following and followed_by,
+        })
+
+
+# Own profile (read/update)
+class MyProfileView(generics.RetrieveUpdateAPIView):
+    serializer_class = ProfileSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self):
+        # JWT requests carry a partial user built from the token, so load the row
+        if isinstance(self.request.successful_authenticator, jwt.StatelessJWTAuthentication):
+            return CustomUser.objects.get(pk=self.request.user.pk)
+        return self.request.user
+
+    def perform_update(self, serializer):
+        user = serializer.save()
+        if 'profile_picture' in serializer.validated_data and user.profile_picture:
+            schedule_thumbnails(user)
+
+# Any user's profile; counts come from denormalized columns
+class ProfileView(generics.RetrieveAPIView):
+    queryset = CustomUser.objects.all()
+    serializer_class = ProfileSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    lookup_url_kwarg = 'user_id'
+
+# Followers / following lists, keyset-paginated over the follow table
+class FollowListView(generics.ListAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FollowCursorPagination
+    # 'followers': rows pointing at the user; 'following': rows from the user
+    direction = 'followers'
+
+    def get_queryset(self):
+        user = generics.get_object_or_404(CustomUser, pk=self.kwargs['user_id'])
+        if self.direction == 'followers':
+            return graph.Follow.objects.filter(to_customuser=user).select_related('from_customuser')
+        return graph.Follow.objects.filter(from_customuser=user).select_related('to_customuser')
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        side = 'from_customuser' if self.direction == 'followers' else 'to_customuser'
+        serializer = UserSummarySerializer([getattr(row, side) for row in page], many=True,
+                                           context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+
+# Who to follow: precomputed by compute_follow_suggestions, served with one indexed lookup
+class FollowSuggestionView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = FollowSuggestionSerializer
+
+    def get(self, request, *args, **kwargs):
+        suggestions = (
+            FollowSuggestion.objects.filter(user=request.user)
+            .select_related('suggested')
+            .order_by('rank')
+        )
+        # Drop accounts followed since the last batch run
+        followed = graph.following_ids(request.user.pk)
+        suggestions = [s for s in suggestions if s.suggested_id not in followed]
+        return Response(self.get_serializer(suggestions, many=True).data)
+
+# Base for the token endpoints: credentials come in the body, not a header
+class JWTTokenView(generics.GenericAPIView):
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get_authenticate_header(self, request):
+        return jwt.StatelessJWTAuthentication().authenticate_header(request)
+
+# Obtain a stateless JWT access/refresh pair
+class TokenObtainView(JWTTokenView):
+    serializer_class = TokenObtainSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(jwt.issue_tokens(serializer.validated_data['user']), status=status.HTTP_200_OK)
+
+# Exchange a refresh token for a new pair; the old one cannot be reused
+class TokenRefreshView(JWTTokenView):
+    serializer_class = RefreshTokenSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(jwt.refresh_tokens(serializer.validated_data['refresh']), status=status.HTTP_200_OK)
+
+# Revoke a refresh token (logout)
+class TokenRevokeView(JWTTokenView):
+    serializer_class = RefreshTokenSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        jwt.revoke_refresh_token(jwt.decode(serializer.validated_data['refresh'], 'refresh'))
+        return Response(status=status.HTTP_204_NO_CONTENT)
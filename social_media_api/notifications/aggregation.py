@@ -0,0 +1,111 @@
+"""
+Collapse events with the same recipient, verb and target into one
+Notification row ("fan and 41 others liked your post").
+"""
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .counters import increment_unread_counts
+from .models import Notification, NotificationActor
+from .stream import publish_notifications
+
+# Unread notifications younger than this absorb new events for the same target
+AGGREGATION_WINDOW = getattr(settings, 'NOTIFICATIONS_AGGREGATION_WINDOW', timedelta(hours=24))
+
+# How many recent actor usernames are kept on an aggregated row
+RECENT_ACTORS_LIMIT = getattr(settings, 'NOTIFICATIONS_RECENT_ACTORS', 3)
+
+
+def group_key(obj):
+    if isinstance(obj, dict):
+        return (obj['recipient_id'], obj['verb'], obj['content_type_id'], obj['object_id'])
+    return (obj.recipient_id, obj.verb, obj.content_type_id, obj.object_id)
+
+
+def merge_actors(recent, new):
+    """Most recent first, without duplicates, capped at RECENT_ACTORS_LIMIT."""
+    merged = []
+    for username in list(new) + list(recent):
+        if username not in merged:
+            merged.append(username)
+    return merged[:RECENT_ACTORS_LIMIT]
+
+
+@transaction.atomic
+def write_aggregated(payloads, batch_size=500):
+    """Fold a batch of event payloads into new or existing aggregated notifications."""
+    if not payloads:
+        return 0
+    usernames = dict(
+        get_user_model().objects.filter(pk__in={p['actor_id'] for p in payloads})
+        .values_list('pk', 'username')
+    )
+    groups = {}
+    for payload in payloads:
+        groups.setdefault(group_key(payload), []).append(payload)
+
+    now = timezone.now()
+    existing = {}
+    lookups = [
+        Q(recipient_id=r, verb=v, content_type_id=ct, object_id=o) for r, v, ct, o in groups
+    ]
+    open_rows = (
+        Notification.objects.select_for_update()
+        .filter(read=False, timestamp__gte=now - AGGREGATION_WINDOW)
+        .filter(reduce(or_, lookups))
+        .order_by('timestamp')
+    )
+    for notification in open_rows:
+        existing[group_key(notification)] = notification  # newest row per key wins
+
+    # Actors already counted on the open rows; the latest actor is always one of them
+    seen = {(n.pk, n.actor_id) for n in existing.values()}
+    seen.update(
+        NotificationActor.objects.filter(notification__in=list(existing.values()))
+        .filter(actor_id__in={p['actor_id'] for p in payloads})
+        .values_list('notification_id', 'actor_id')
+    )
+
+    to_create, to_update, links = [], [], []
+    for key, events in groups.items():
+        actors = [usernames.get(e['actor_id'], '') for e in reversed(events)]
+        actor_ids = list(dict.fromkeys(e['actor_id'] for e in events))
+        notification = existing.get(key)
+        if notification is None:
+            notification = Notification(
+                **events[-1],
+                actor_count=len(actor_ids),
+                recent_actors=merge_actors([], actors),
+            )
+            to_create.append(notification)
+        else:
+            # Repeat events from an actor already on the row (like, unlike, like) don't count again
+            actor_ids = [pk for pk in actor_ids if (notification.pk, pk) not in seen] + [notification.actor_id]
+            notification.actor_count += len(actor_ids) - 1
+            notification.actor_id = events[-1]['actor_id']
+            notification.recent_actors = merge_actors(notification.recent_actors, actors)
+            notification.timestamp = now
+            to_update.append(notification)
+        links.extend((notification, pk) for pk in actor_ids)
+
+    Notification.objects.bulk_create(to_create, batch_size=batch_size)
+    NotificationActor.objects.bulk_create(
+        [NotificationActor(notification=notification, actor_id=pk) for notification, pk in links],
+        batch_size=batch_size, ignore_conflicts=True,
+    )
+    created_per_recipient = {}
+    for notification in to_create:
+        created_per_recipient[notification.recipient_id] = created_per_recipient.get(notification.recipient_id, 0) + 1
+    increment_unread_counts(created_per_recipient)
+    Notification.objects.bulk_update(
+        to_update, ['actor', 'actor_count', 'recent_actors', 'timestamp'], batch_size=batch_size
+    )
+    publish_notifications(to_create + to_update)
+    return len(to_create) + len(to_update)
@@ -0,0 +1,118 @@
+"""
+Pub/sub used to push new notifications to connected clients.
+
+LocalBroker keeps subscribers in process memory, so it only reaches clients
+connected to the same process. Point NOTIFICATIONS_BROKER at a class with the
+same publish/subscribe/subscribe_async interface (e.g. one backed by Redis
+pub/sub) when running several processes.
+"""
+import asyncio
+import queue
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """Blocking subscription for sync (WSGI) views."""
+
+    def __init__(self, broker, user_id):
+        self.broker = broker
+        self.user_id = user_id
+        self.queue = queue.SimpleQueue()
+
+    def put(self, event):
+        self.queue.put(event)
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drain(self):
+        events = []
+        while True:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncSubscription(Subscription):
+    """Subscription awaited from an event loop (ASGI streaming)."""
+
+    def __init__(self, broker, user_id):
+        super().__init__(broker, user_id)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    def put(self, event):
+        # publish() may run on any thread
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def drain(self):
+        events = []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        return events
+
+
+class LocalBroker:
+    def __init__(self):
+        self.subscribers = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        return self._add(Subscription(self, user_id))
+
+    def subscribe_async(self, user_id):
+        return self._add(AsyncSubscription(self, user_id))
+
+    def _add(self, subscription):
+        with self.lock:
+            self.subscribers.setdefault(subscription.user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscribers.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscribers[subscription.user_id]
+
+    def publish(self, user_id, event):
+        with self.lock:
+            subscriptions = list(self.subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            path = getattr(settings, 'NOTIFICATIONS_BROKER', 'notifications.broker.LocalBroker')
+            _broker = import_string(path)()
+        return _broker
@@ -0,0 +1,59 @@
+"""
+Removing notifications whose target is gone.
+
+Notification.target is a generic foreign key, so deleting a post or
+comment leaves its notifications (and queued PendingNotification rows)
+behind. delete_for_targets() removes them by (content_type, object_id)
+through notif_target_idx. delete_orphans() sweeps the table for rows
+whose target no longer exists.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .counters import invalidate_unread_count
+from .models import Notification, PendingNotification
+
+
+def delete_ids(ids):
+    """Delete notifications by id and drop the unread counters of affected recipients after commit."""
+    with transaction.atomic():
+        recipients = set(
+            Notification.objects.filter(id__in=ids, read=False).values_list('recipient_id', flat=True)
+        )
+        deleted, _ = Notification.objects.filter(id__in=ids).delete()
+        for recipient_id in recipients:
+            invalidate_unread_count(recipient_id)
+    return deleted
+
+
+def delete_for_targets(model, object_ids, batch_size=1000):
+    """Delete notifications about the given objects, batch_size rows per transaction."""
+    content_type = ContentType.objects.get_for_model(model)
+    object_ids = list(object_ids)
+    PendingNotification.objects.filter(content_type=content_type, object_id__in=object_ids).delete()
+    rows = Notification.objects.filter(content_type=content_type, object_id__in=object_ids)
+    total = 0
+    while True:
+        ids = list(rows.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return total
+        total += delete_ids(ids)
+
+
+def delete_orphans(model, batch_size=1000):
+    """Delete notifications about `model` rows that no longer exist, walking the table by id."""
+    content_type = ContentType.objects.get_for_model(model)
+    target_exists = Exists(model._base_manager.filter(pk=OuterRef('object_id')))
+    last_id = total = 0
+    while True:
+        ids = list(
+            Notification.objects.filter(id__gt=last_id, content_type=content_type)
+            .order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        last_id = ids[-1]
+        orphans = list(Notification.objects.filter(id__in=ids).filter(~target_exists).values_list('id', flat=True))
+        if orphans:
+            total += delete_ids(orphans)
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Notification
+
+# Counters are exact while maintained; the timeout bounds any drift from
+# deletes that bypass these helpers
+UNREAD_COUNT_TIMEOUT = getattr(settings, 'NOTIFICATIONS_UNREAD_COUNT_TIMEOUT', 300)
+
+
+def unread_count_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def get_unread_count(user):
+    key = unread_count_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient=user, read=False).count()
+        cache.set(key, count, UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def increment_unread_counts(created_per_recipient):
+    """Bump cached counters once the new rows are committed; missing keys are left to be recomputed."""
+    def apply():
+        for recipient_id, created in created_per_recipient.items():
+            try:
+                cache.incr(unread_count_key(recipient_id), created)
+            except ValueError:
+                pass
+    transaction.on_commit(apply)
+
+
+def invalidate_unread_count(user_id):
+    transaction.on_commit(lambda: cache.delete(unread_count_key(user_id)))
+
+
+def mark_all_read(user):
+    updated = Notification.objects.filter(recipient=user, read=False).update(read=True)
+    # Not set to 0: a notification committed after the UPDATE would be hidden until the timeout
+    invalidate_unread_count(user.pk)
+    return updated
+
+
+def mark_read(user, ids):
+    updated = Notification.objects.filter(recipient=user, read=False, id__in=ids).update(read=True)
+    if updated:
+        invalidate_unread_count(user.pk)
+    return updated
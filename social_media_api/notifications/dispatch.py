@@ -0,0 +1,115 @@
+"""
+Notification dispatch layer.
+
+Views call notify(); the configured backend (NOTIFICATIONS_BACKEND) decides
+when and how the Notification rows are written:
+
+* ImmediateBackend  - write inside the request (used by tests)
+* ThreadPoolBackend - buffer in memory and bulk_create from a worker thread
+* OutboxBackend     - queue PendingNotification rows for the
+                      process_notification_outbox worker
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import import_string
+
+from .aggregation import write_aggregated
+from .models import PendingNotification
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'NOTIFICATIONS_BATCH_SIZE', 500)
+
+
+def build_payload(recipient, actor, verb, target):
+    return {
+        'recipient_id': recipient.pk,
+        'actor_id': actor.pk,
+        'verb': verb,
+        'content_type_id': ContentType.objects.get_for_model(target).pk,
+        'object_id': target.pk,
+    }
+
+
+def coalesce(payloads):
+    """Drop duplicate events (same recipient, actor, verb and target) from a batch."""
+    unique = {}
+    for payload in payloads:
+        key = (payload['recipient_id'], payload['actor_id'], payload['verb'],
+               payload['content_type_id'], payload['object_id'])
+        unique.setdefault(key, payload)
+    return list(unique.values())
+
+
+def write_notifications(payloads):
+    return write_aggregated(coalesce(payloads), batch_size=BATCH_SIZE)
+
+
+class ImmediateBackend:
+    def send(self, payloads):
+        write_notifications(payloads)
+
+
+class ThreadPoolBackend:
+    def __init__(self, max_workers=None):
+        self.pending = queue.SimpleQueue()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or getattr(settings, 'NOTIFICATIONS_WORKERS', 2),
+            thread_name_prefix='notifications',
+        )
+
+    def send(self, payloads):
+        for payload in payloads:
+            self.pending.put(payload)
+        self.executor.submit(self.drain)
+
+    def drain(self):
+        # Whatever has piled up since the last drain is written as one batch,
+        # so a burst of likes costs a single INSERT.
+        batch = []
+        while len(batch) < BATCH_SIZE:
+            try:
+                batch.append(self.pending.get_nowait())
+            except queue.Empty:
+                break
+        if not batch:
+            return
+        try:
+            write_notifications(batch)
+        except Exception:
+            # Nobody waits on the future, so this is the only trace of a lost batch
+            logger.exception('Failed to write %d notification(s)', len(batch))
+        finally:
+            close_old_connections()
+
+
+class OutboxBackend:
+    def send(self, payloads):
+        PendingNotification.objects.bulk_create(
+            [PendingNotification(**payload) for payload in payloads]
+        )
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend():
+    path = getattr(settings, 'NOTIFICATIONS_BACKEND', 'notifications.dispatch.ImmediateBackend')
+    with _backends_lock:
+        if path not in _backends:
+            _backends[path] = import_string(path)()
+        return _backends[path]
+
+
+def notify(recipient, actor, verb, target):
+    """Queue a notification; it is handed to the backend once the current transaction commits."""
+    payload = build_payload(recipient, actor, verb, target)
+    backend = get_backend()
+    transaction.on_commit(lambda: backend.send([payload]))
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from notifications.aggregation import merge_actors
+from notifications.cleanup import delete_ids
+from notifications.counters import invalidate_unread_count
+from notifications.models import Notification, NotificationActor
+
+READ_RETENTION_DAYS = getattr(settings, 'NOTIFICATIONS_READ_RETENTION_DAYS', 30)
+UNREAD_RETENTION_DAYS = getattr(settings, 'NOTIFICATIONS_UNREAD_RETENTION_DAYS', 90)
+
+
+class Command(BaseCommand):
+    help = "Delete expired notifications and merge duplicate unread rows for the same target."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+        deleted = self.delete_in_batches(
+            Notification.objects.filter(read=True, timestamp__lt=now - timedelta(days=READ_RETENTION_DAYS)),
+            batch_size,
+        )
+        deleted += self.delete_in_batches(
+            Notification.objects.filter(timestamp__lt=now - timedelta(days=UNREAD_RETENTION_DAYS)),
+            batch_size,
+        )
+        merged = self.merge_duplicates(batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired notifications, merged {merged}."))
+
+    def delete_in_batches(self, queryset, batch_size):
+        total = 0
+        while True:
+            ids = list(queryset.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return total
+            # Expired unread rows still count towards the cached unread badge
+            total += delete_ids(ids)
+
+    def merge_duplicates(self, batch_size):
+        """Fold unread rows written before aggregation existed into one row per target."""
+        keys = (
+            Notification.objects.filter(read=False)
+            .values('recipient_id', 'verb', 'content_type_id', 'object_id')
+            .annotate(rows=Count('id'))
+            .filter(rows__gt=1)
+            .order_by()[:batch_size]
+        )
+        merged = 0
+        for key in keys:
+            with transaction.atomic():
+                rows = list(
+                    Notification.objects.select_for_update()
+                    .filter(read=False, recipient_id=key['recipient_id'], verb=key['verb'],
+                            content_type_id=key['content_type_id'], object_id=key['object_id'])
+                    .select_related('actor')
+                    .order_by('-timestamp', '-id')
+                )
+                keep, duplicates = rows[0], rows[1:]
+                actors = keep.recent_actors or [keep.actor.username]
+                for row in duplicates:
+                    actors = merge_actors(row.recent_actors or [row.actor.username], actors)
+                keep.actor_count = self.merge_actor_links(keep, rows)
+                keep.recent_actors = actors
+                keep.save(update_fields=['actor_count', 'recent_actors'])
+                Notification.objects.filter(id__in=[row.id for row in duplicates]).delete()
+                invalidate_unread_count(key['recipient_id'])
+                merged += len(duplicates)
+        return merged
+
+    def merge_actor_links(self, keep, rows):
+        """Move every row's distinct actors onto `keep`; returns the merged actor count."""
+        tracked = {}
+        for notification_id, actor_id in NotificationActor.objects.filter(
+                notification__in=rows).values_list('notification_id', 'actor_id'):
+            tracked.setdefault(notification_id, set()).add(actor_id)
+        actor_ids, untracked = set(), 0
+        for row in rows:
+            row_actors = tracked.get(row.pk, set()) | {row.actor_id}
+            actor_ids |= row_actors
+            # Counted before actors were tracked; assume those actors were distinct
+            untracked += max(row.actor_count - len(row_actors), 0)
+        NotificationActor.objects.bulk_create(
+            [NotificationActor(notification=keep, actor_id=pk) for pk in actor_ids], ignore_conflicts=True,
+        )
+        return len(actor_ids) + untracked
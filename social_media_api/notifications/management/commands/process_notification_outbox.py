@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from notifications.dispatch import BATCH_SIZE, write_notifications
+from notifications.models import PendingNotification
+
+PAYLOAD_FIELDS = ('recipient_id', 'actor_id', 'verb', 'content_type_id', 'object_id')
+
+
+class Command(BaseCommand):
+    help = "Move queued PendingNotification rows into Notification in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new rows.")
+        parser.add_argument('--sleep', type=float, default=1.0, help="Seconds to wait when idle.")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = self.process_batch(options['batch_size'])
+            total += processed
+            if processed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} queued notifications."))
+
+    def process_batch(self, batch_size):
+        with transaction.atomic():
+            rows = list(
+                PendingNotification.objects.select_for_update(skip_locked=True)
+                .order_by('id')
+                .values('id', *PAYLOAD_FIELDS)[:batch_size]
+            )
+            if not rows:
+                return 0
+            write_notifications([{field: row[field] for field in PAYLOAD_FIELDS} for row in rows])
+            PendingNotification.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        return len(rows)
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def link_current_actors(apps, schema_editor):
+    # Existing rows only know their latest actor
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationActor = apps.get_model('notifications', 'NotificationActor')
+    last_id = 0
+    while True:
+        batch = list(Notification.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', 'actor_id')[:1000])
+        if not batch:
+            break
+        NotificationActor.objects.bulk_create(
+            [NotificationActor(notification_id=pk, actor_id=actor_id) for pk, actor_id in batch],
+            ignore_conflicts=True,
+        )
+        last_id = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationActor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('actor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='actor_links', to='notifications.notification')),
+            ],
+            options={
+                'unique_together': {('notification', 'actor')},
+            },
+        ),
+        migrations.RunPython(link_current_actors, migrations.RunPython.noop),
+    ]
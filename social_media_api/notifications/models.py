@@ -14,6 +14,59 @@ class Notification(models.Model):
     target = GenericForeignKey('content_type', 'object_id')
     read = models.BooleanField(default=False)
     timestamp = models.DateTimeField(auto_now_add=True)
+    # Aggregation: actor is the latest one, actor_count counts the distinct
+    # actors folded into this row (tracked in NotificationActor), and
+    # recent_actors keeps a few usernames for display
+    actor_count = models.PositiveIntegerField(default=1)
+    recent_actors = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipient', '-timestamp', '-id'], name='notif_recipient_ts_idx'),
+            models.Index(fields=['recipient', 'read', '-timestamp'], name='notif_recipient_read_ts_idx'),
+            models.Index(fields=['content_type', 'object_id'], name='notif_target_idx'),
+            # Aggregation only looks for unread rows on the same target
+            models.Index(fields=['recipient', 'content_type', 'object_id'], condition=models.Q(read=False),
+                         name='notif_unread_target_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.summary} {self.target}"
+
+    @property
+    def summary(self):
+        return summarize(self.actor, self.verb, self.actor_count)
+
+
+class NotificationActor(models.Model):
+    # One row per distinct actor behind an aggregated notification, so a
+    # repeated like/unlike by the same user is only counted once
+    notification = models.ForeignKey(Notification, related_name='actor_links', on_delete=models.CASCADE)
+    actor = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+
+    class Meta:
+        unique_together = ('notification', 'actor')
+
+    def __str__(self):
+        return f"{self.actor_id} in notification {self.notification_id}"
+
+
+def summarize(actor, verb, actor_count):
+    # "fan liked your post" / "fan and 41 others liked your post"
+    others = actor_count - 1
+    if others <= 0:
+        return f"{actor} {verb}"
+    return f"{actor} and {others} {'other' if others == 1 else 'others'} {verb}"
+
+
+class PendingNotification(models.Model):
+    # Outbox row waiting for the process_notification_outbox worker
+    recipient = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    actor = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    verb = models.CharField(max_length=255)
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.actor} {self.verb} {self.target}"
+        return f"Pending: {self.actor_id} {self.verb} {self.object_id}"
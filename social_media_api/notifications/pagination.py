@@ -0,0 +1,8 @@
+from social_media_api.pagination import KeysetCursorPagination
+
+
+class NotificationCursorPagination(KeysetCursorPagination):
+    """Keyset pagination on (timestamp, id) with opaque cursors."""
+    ordering = ('-timestamp', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -1,9 +1,43 @@
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
 from rest_framework import serializers
-from .models import Notification
+from social_media_api.fastpath import compile_values_serializer
+from .models import Notification, summarize
 
 class NotificationSerializer(serializers.ModelSerializer):
     actor_username = serializers.CharField(source='actor.username', read_only=True)
+    target = serializers.StringRelatedField(read_only=True)
 
     class Meta:
         model = Notification
-        fields = ['id', 'actor_username', 'verb', 'target', 'read', 'timestamp']
+        fields = ['id', 'actor_username', 'verb', 'target', 'read', 'timestamp',
+                  'actor_count', 'recent_actors', 'summary']
+
+
+class MarkReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+
+
+def target_labels(rows):
+    """str() of each row's target, loaded per content type like prefetch_related('target') does."""
+    ids_by_type = defaultdict(set)
+    for row in rows:
+        ids_by_type[row['content_type_id']].add(row['object_id'])
+    labels = {}
+    for content_type_id, ids in ids_by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        for obj in model._base_manager.select_related().filter(pk__in=ids):
+            labels[(content_type_id, obj.pk)] = str(obj)
+    return {'target_labels': labels}
+
+
+# .values() version of NotificationSerializer for the fast path (social_media_api.fastpath)
+notification_values = compile_values_serializer(NotificationSerializer, {
+    'target': (['content_type_id', 'object_id'],
+               lambda r, c: c['target_labels'].get((r['content_type_id'], r['object_id']))),
+    'summary': (['actor__username', 'verb', 'actor_count'],
+                lambda r, c: summarize(r['actor__username'], r['verb'], r['actor_count'])),
+})
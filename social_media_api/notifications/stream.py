@@ -0,0 +1,115 @@
+"""Live notification delivery: event payloads, publishing and SSE framing."""
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from rest_framework.fields import DateTimeField
+from rest_framework.renderers import BaseRenderer
+
+from .broker import get_broker
+
+KEEPALIVE_SECONDS = getattr(settings, 'NOTIFICATIONS_STREAM_KEEPALIVE', 15)
+# Sync (WSGI) streams hold a worker thread, so they end after this long and
+# the client reconnects with Last-Event-ID
+SYNC_STREAM_MAX_SECONDS = getattr(settings, 'NOTIFICATIONS_SYNC_STREAM_MAX_SECONDS', 60)
+
+timestamp_field = DateTimeField()
+
+
+def notification_event(notification):
+    recent_actors = notification.recent_actors or []
+    return {
+        'id': notification.id,
+        'actor_username': recent_actors[0] if recent_actors else None,
+        'verb': notification.verb,
+        'read': notification.read,
+        'timestamp': timestamp_field.to_representation(notification.timestamp),
+        'actor_count': notification.actor_count,
+        'recent_actors': recent_actors,
+    }
+
+
+def publish_notifications(notifications):
+    """Push written notifications to connected recipients after commit."""
+    events = [(n.recipient_id, notification_event(n)) for n in notifications]
+
+    def publish():
+        broker = get_broker()
+        for recipient_id, event in events:
+            broker.publish(recipient_id, event)
+    transaction.on_commit(publish)
+
+
+def event_key(event):
+    # A re-aggregated notification keeps its id but gets a new timestamp
+    return event.get('id'), event.get('timestamp')
+
+
+def sse_message(event):
+    # The timestamp doubles as the SSE id so reconnects can resume from it
+    return f"id: {event['timestamp']}\nevent: notification\ndata: {json.dumps(event)}\n\n"
+
+
+def sse_retry(milliseconds=3000):
+    return f"retry: {milliseconds}\n\n"
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets content negotiation accept EventSource's Accept: text/event-stream.
+    The stream itself bypasses renderers; this only renders error responses.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return f"event: error\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def async_event_stream(user_id, load_backlog):
+    """
+    SSE for ASGI. load_backlog() runs only after subscribing, so nothing
+    published in between is lost; events already in the backlog are skipped.
+    """
+    broker = get_broker()
+    subscription = broker.subscribe_async(user_id)
+    try:
+        backlog = await sync_to_async(load_backlog)()
+        sent = {event_key(event) for event in backlog}
+        yield sse_retry()
+        for event in backlog:
+            yield sse_message(event)
+        while True:
+            event = await subscription.get(KEEPALIVE_SECONDS)
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            for event in [event] + subscription.drain():
+                if event_key(event) not in sent:
+                    yield sse_message(event)
+    finally:
+        subscription.close()
+
+
+def sync_event_stream(user_id, load_backlog):
+    """SSE for WSGI, subscribing before load_backlog() like async_event_stream()."""
+    broker = get_broker()
+    deadline = time.monotonic() + SYNC_STREAM_MAX_SECONDS
+    with broker.subscribe(user_id) as subscription:
+        backlog = load_backlog()
+        sent = {event_key(event) for event in backlog}
+        yield sse_retry()
+        for event in backlog:
+            yield sse_message(event)
+        while time.monotonic() < deadline:
+            event = subscription.get(min(KEEPALIVE_SECONDS, max(deadline - time.monotonic(), 0)))
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            for event in [event] + subscription.drain():
+                if event_key(event) not in sent:
+                    yield sse_message(event)
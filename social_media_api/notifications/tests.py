@@ -1,3 +1,300 @@
-from django.test import TestCase
+import json
+from base64 import b64encode
+from io import StringIO
+from urllib.parse import urlencode
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+import asyncio
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from posts.models import Comment, Post
+from social_media_api.fastpath import FastJSONRenderer
+from .broker import LocalBroker, get_broker
+from .dispatch import OutboxBackend, ThreadPoolBackend, build_payload, write_notifications
+from .models import Notification, PendingNotification
+
+User = get_user_model()
+
+
+@override_settings(NOTIFICATIONS_BACKEND='notifications.dispatch.ImmediateBackend')
+class LikeNotificationTestCase(APITestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.fan = User.objects.create_user(username="fan", password="pass12345")
+        self.post = Post.objects.create(author=self.author, title="Hello", content="World")
+
+    def test_like_notifies_author_after_commit(self):
+        self.client.force_authenticate(self.fan)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/posts/{self.post.pk}/like/")
+        notification = Notification.objects.get()
+        self.assertEqual((notification.recipient, notification.actor), (self.author, self.fan))
+        self.assertEqual(notification.target, self.post)
+
+    def test_list_renders_aggregated_summary(self):
+        Notification.objects.create(recipient=self.author, actor=self.fan, verb='liked your post',
+                                    target=self.post, actor_count=3)
+        self.client.force_authenticate(self.author)
+        response = self.client.get("/api/notifications/")
+        self.assertEqual(response.data["results"][0]["summary"], "fan and 2 others liked your post")
+        self.assertEqual(response.data["results"][0]["target"], "Hello")
+
+
+class DispatchBackendTestCase(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.fan = User.objects.create_user(username="fan", password="pass12345")
+        self.post = Post.objects.create(author=self.author, title="Hello", content="World")
+        self.payload = build_payload(self.author, self.fan, 'liked your post', self.post)
+
+    def test_thread_pool_drain_coalesces_burst(self):
+        backend = ThreadPoolBackend()
+        for _ in range(3):
+            backend.pending.put(dict(self.payload))
+        backend.drain()
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_thread_pool_drain_logs_failed_batches(self):
+        backend = ThreadPoolBackend()
+        backend.pending.put(dict(self.payload))
+        with mock.patch('notifications.dispatch.write_notifications', side_effect=RuntimeError('db down')):
+            with self.assertLogs('notifications.dispatch', level='ERROR') as logs:
+                backend.drain()
+        self.assertIn('Failed to write 1 notification(s)', logs.output[0])
+
+    def test_outbox_worker_moves_rows_in_batches(self):
+        OutboxBackend().send([self.payload, dict(self.payload, verb='commented on your post')])
+        call_command("process_notification_outbox", batch_size=1, stdout=StringIO())
+        self.assertFalse(PendingNotification.objects.exists())
+        self.assertEqual(Notification.objects.count(), 2)
+
+
+class AggregationTestCase(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.fans = [User.objects.create_user(username=f"fan{i}", password="pass12345") for i in range(5)]
+        self.post = Post.objects.create(author=self.author, title="Hello", content="World")
+
+    def like(self, fan):
+        return build_payload(self.author, fan, 'liked your post', self.post)
+
+    def test_likes_on_same_post_collapse_into_one_row(self):
+        write_notifications([self.like(fan) for fan in self.fans[:2]])
+        write_notifications([self.like(fan) for fan in self.fans[2:]])
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 5)
+        self.assertEqual(notification.recent_actors, ["fan4", "fan3", "fan2"])
+        self.assertEqual(notification.summary, "fan4 and 4 others liked your post")
+
+    def test_repeat_events_from_one_actor_count_once(self):
+        for _ in range(3):
+            write_notifications([self.like(self.fans[0])])
+        write_notifications([self.like(self.fans[1]), self.like(self.fans[0])])
+        write_notifications([self.like(self.fans[1])])
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 2)
+        self.assertEqual(notification.recent_actors, ["fan1", "fan0"])
+        self.assertEqual(notification.summary, "fan1 and 1 other liked your post")
+
+    def test_read_notifications_start_a_new_row(self):
+        write_notifications([self.like(self.fans[0])])
+        Notification.objects.update(read=True)
+        write_notifications([self.like(self.fans[1])])
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_compaction_expires_and_merges(self):
+        old = timezone.now() - timedelta(days=365)
+        for fan in self.fans[:3]:
+            Notification.objects.create(recipient=self.author, actor=fan, verb='liked your post', target=self.post)
+        expired = Notification.objects.create(recipient=self.author, actor=self.fans[3], verb='followed you',
+                                              target=self.author, read=True)
+        Notification.objects.filter(pk=expired.pk).update(timestamp=old)
+        call_command("compact_notifications", stdout=StringIO())
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 3)
+        self.assertEqual(len(notification.recent_actors), 3)
+
+
+class UnreadCountTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.fan = User.objects.create_user(username="fan", password="pass12345")
+        self.posts = [Post.objects.create(author=self.author, title=f"Post {i}", content="x") for i in range(3)]
+        self.client.force_authenticate(self.author)
+
+    def unread_count(self):
+        return self.client.get("/api/notifications/unread_count/").data["unread_count"]
+
+    def test_counter_is_cached_and_incremented(self):
+        self.assertEqual(self.unread_count(), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            write_notifications([build_payload(self.author, self.fan, 'liked your post', p) for p in self.posts])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.unread_count(), 3)
+
+    def test_mark_read_endpoints(self):
+        write_notifications([build_payload(self.author, self.fan, 'liked your post', p) for p in self.posts])
+        ids = list(Notification.objects.values_list('id', flat=True)[:2])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/notifications/mark_read/", {"ids": ids}, format="json")
+        self.assertEqual(response.data["marked_read"], 2)
+        self.assertEqual(self.unread_count(), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/notifications/mark_all_read/")
+        self.assertEqual(self.unread_count(), 0)
+        self.assertFalse(Notification.objects.filter(read=False).exists())
+
+    def test_mark_read_requires_ids(self):
+        response = self.client.post("/api/notifications/mark_read/", {}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_mark_all_read_keeps_notifications_that_race_the_update(self):
+        self.assertEqual(self.unread_count(), 0)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post("/api/notifications/mark_all_read/")
+        # Lands after the UPDATE but before the on_commit callback runs
+        Notification.objects.create(recipient=self.author, actor=self.fan, verb='liked your post',
+                                    target=self.posts[0])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.unread_count(), 1)
+
+    def test_compaction_drops_cached_count_of_expired_unread_rows(self):
+        write_notifications([build_payload(self.author, self.fan, 'liked your post', p) for p in self.posts])
+        self.assertEqual(self.unread_count(), 3)
+        Notification.objects.update(timestamp=timezone.now() - timedelta(days=365))
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("compact_notifications", batch_size=2, stdout=StringIO())
+        self.assertEqual(self.unread_count(), 0)
+
+
+class LiveNotificationTestCase(APITestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.fan = User.objects.create_user(username="fan", password="pass12345")
+        self.post = Post.objects.create(author=self.author, title="Hello", content="World")
+        self.client.force_authenticate(self.author)
+
+    def test_local_broker_delivers_to_subscribers(self):
+        broker = LocalBroker()
+        with broker.subscribe(self.author.pk) as subscription:
+            broker.publish(self.author.pk, {"id": 1})
+            broker.publish(self.fan.pk, {"id": 2})
+            self.assertEqual(subscription.get(0.1), {"id": 1})
+            self.assertEqual(subscription.drain(), [])
+        self.assertEqual(broker.subscribers, {})
+
+    def test_async_subscription(self):
+        broker = LocalBroker()
+
+        async def receive():
+            subscription = broker.subscribe_async(self.author.pk)
+            threading.Timer(0.05, broker.publish, args=(self.author.pk, {"id": 1})).start()
+            try:
+                return await subscription.get(2)
+            finally:
+                subscription.close()
+
+        self.assertEqual(asyncio.run(receive()), {"id": 1})
+
+    def test_poll_returns_backlog_immediately(self):
+        since = (timezone.now() - timedelta(minutes=1)).isoformat()
+        write_notifications([build_payload(self.author, self.fan, 'liked your post', self.post)])
+        response = self.client.get("/api/notifications/poll/", {"since": since, "timeout": 5})
+        self.assertEqual(response.data["results"][0]["recent_actors"], ["fan"])
+
+    def test_poll_waits_for_published_event(self):
+        event = {"id": 99, "timestamp": timezone.now().isoformat()}
+        threading.Timer(0.1, get_broker().publish, args=(self.author.pk, event)).start()
+        response = self.client.get("/api/notifications/poll/", {"timeout": 5})
+        self.assertEqual(response.data["results"], [event])
+
+    def test_poll_times_out_empty(self):
+        response = self.client.get("/api/notifications/poll/", {"timeout": 0})
+        self.assertEqual(response.data["results"], [])
+
+    def test_stream_subscribes_before_reading_the_backlog(self):
+        event = {"id": 7, "timestamp": timezone.now().isoformat()}
+
+        def backlog_with_race(user, since):
+            # Published while the backlog query runs: must still reach the stream
+            get_broker().publish(user.pk, event)
+            return []
+
+        with mock.patch("notifications.views.notifications_since", side_effect=backlog_with_race):
+            response = self.client.get("/api/notifications/stream/")
+            chunks = iter(response.streaming_content)
+            self.assertTrue(next(chunks).startswith(b"retry:"))
+            self.assertIn(b'"id": 7', next(chunks))
+            response.close()
+
+    def test_stream_replays_backlog_as_sse(self):
+        since = (timezone.now() - timedelta(minutes=1)).isoformat()
+        write_notifications([build_payload(self.author, self.fan, 'liked your post', self.post)])
+        response = self.client.get("/api/notifications/stream/", HTTP_LAST_EVENT_ID=since)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = iter(response.streaming_content)
+        self.assertTrue(next(chunks).startswith(b"retry:"))
+        self.assertIn(b"event: notification", next(chunks))
+        response.close()
+
+    def test_stream_accepts_event_source_requests(self):
+        # What a browser EventSource sends: the SSE Accept header and a session cookie
+        self.client.force_authenticate(None)
+        response = self.client.get("/api/notifications/stream/", HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.login(username="author", password="pass12345")
+        response = self.client.get("/api/notifications/stream/", HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertTrue(next(iter(response.streaming_content)).startswith(b"retry:"))
+        response.close()
+
+
+@override_settings(NOTIFICATIONS_BACKEND='notifications.dispatch.ImmediateBackend')
+class FastNotificationListTestCase(APITestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.fans = [User.objects.create_user(username=f"fan{i}", password="pass12345") for i in range(3)]
+        post = Post.objects.create(author=self.author, title="Grüße", content="x")
+        other = Post.objects.create(author=self.author, title="Other", content="x")
+        comment = Comment.objects.create(post=post, author=self.fans[0], content="hi")
+        payloads = [build_payload(self.author, fan, 'liked your post', post) for fan in self.fans]
+        payloads.append(build_payload(self.author, self.fans[0], 'commented', comment))
+        payloads.append(build_payload(self.author, self.fans[1], 'liked your post', other))
+        write_notifications(payloads)
+        other.delete()
+        self.client.force_authenticate(self.author)
+
+    def test_fast_path_is_byte_identical(self):
+        fast = self.client.get("/api/notifications/")
+        with override_settings(API_FAST_LIST_RENDERING=False), \
+                mock.patch.object(FastJSONRenderer, "render", JSONRenderer.render):
+            slow = self.client.get("/api/notifications/")
+        self.assertEqual(fast.content, slow.content)
+        targets = [n["target"] for n in fast.json()["results"]]
+        self.assertIn(None, targets)
+        self.assertIn("Comment by fan0 on Grüße", targets)
+
+    def test_tampered_cursor_is_not_found(self):
+        for position in (["zzz", "1"], [{"a": 1}, 1], [None, 1], ["2026-01-01T00:00:00+00:00", "x"], "zzz"):
+            cursor = b64encode(urlencode({"p": json.dumps(position)}).encode()).decode()
+            response = self.client.get("/api/notifications/", {"cursor": cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, position)
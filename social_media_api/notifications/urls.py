@@ -0,0 +1,14 @@
+from django.urls import path
+from .views import (
+    NotificationListView, UnreadCountView, MarkAllReadView, MarkReadView,
+    NotificationStreamView, NotificationPollView,
+)
+
+urlpatterns = [
+    path('', NotificationListView.as_view(), name='notification-list'),
+    path('unread_count/', UnreadCountView.as_view(), name='notification-unread-count'),
+    path('mark_all_read/', MarkAllReadView.as_view(), name='notification-mark-all-read'),
+    path('mark_read/', MarkReadView.as_view(), name='notification-mark-read'),
+    path('stream/', NotificationStreamView.as_view(), name='notification-stream'),
+    path('poll/', NotificationPollView.as_view(), name='notification-poll'),
+]
@@ -1,13 +1,130 @@
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import ValidationError
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from .models import Notification
-from .serializers import NotificationSerializer
+from .serializers import NotificationSerializer, MarkReadSerializer, notification_values, target_labels
+from .pagination import NotificationCursorPagination
+from .counters import get_unread_count, mark_all_read, mark_read
+from .broker import get_broker
+from .stream import EventStreamRenderer, notification_event, async_event_stream, sync_event_stream
+from social_media_api.fastpath import FastJSONRenderer, fast_path_enabled, paginated_values
+
+LONG_POLL_MAX_SECONDS = getattr(settings, 'NOTIFICATIONS_LONG_POLL_SECONDS', 25)
+BACKLOG_LIMIT = 100
+
+
+def notifications_since(user, since):
+    """Notifications created or re-aggregated after `since`, oldest first."""
+    if since is None:
+        return []
+    notifications = Notification.objects.filter(recipient=user, timestamp__gt=since).order_by('timestamp', 'id')
+    return [notification_event(n) for n in notifications[:BACKLOG_LIMIT]]
+
+
+def parse_since(value):
+    if not value:
+        return None
+    since = parse_datetime(value)
+    if since is None:
+        raise ValidationError({'since': 'Expected an ISO 8601 timestamp.'})
+    return since
 
 class NotificationListView(APIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = NotificationCursorPagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def get(self, request):
+        paginator = self.pagination_class()
+        if fast_path_enabled(request):
+            notifications = Notification.objects.filter(recipient=request.user)
+            data = paginated_values(paginator, notifications, request, self, notification_values, target_labels)
+            return paginator.get_paginated_response(data)
+        notifications = (
+            Notification.objects.filter(recipient=request.user)
+            .select_related('actor')
+            .prefetch_related('target')
+        )
+        page = paginator.paginate_queryset(notifications, request, view=self)
+        serializer = NotificationSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class UnreadCountView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread_count': get_unread_count(request.user)})
+
+
+class MarkAllReadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        updated = mark_all_read(request.user)
+        return Response({'marked_read': updated, 'unread_count': 0})
+
+
+class MarkReadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = mark_read(request.user, serializer.validated_data['ids'])
+        return Response({'marked_read': updated}, status=status.HTTP_200_OK)
+
+
+# Live notifications over Server-Sent Events
+class NotificationStreamView(APIView):
+    permission_classes = [IsAuthenticated]
+    # Browsers' EventSource can't set Authorization headers but does send cookies
+    authentication_classes = [*api_settings.DEFAULT_AUTHENTICATION_CLASSES, SessionAuthentication]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
 
     def get(self, request):
-        notifications = Notification.objects.filter(recipient=request.user).order_by('-timestamp')
-        serializer = NotificationSerializer(notifications, many=True)
-        return Response(serializer.data)
+        since = parse_since(request.headers.get('Last-Event-ID') or request.query_params.get('since'))
+        user = request.user
+
+        # The streams subscribe before reading the backlog so nothing slips in between
+        def load_backlog():
+            return notifications_since(user, since)
+        if isinstance(request._request, ASGIRequest):
+            stream = async_event_stream(user.pk, load_backlog)
+        else:
+            stream = sync_event_stream(user.pk, load_backlog)
+        response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+        return response
+
+
+# Long-poll fallback: returns as soon as something arrives, or empty after the timeout
+class NotificationPollView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        since = parse_since(request.query_params.get('since'))
+        try:
+            timeout = min(float(request.query_params.get('timeout', LONG_POLL_MAX_SECONDS)), LONG_POLL_MAX_SECONDS)
+        except ValueError:
+            raise ValidationError({'timeout': 'Expected a number of seconds.'})
+
+        # Subscribe before reading the backlog so nothing slips in between
+        with get_broker().subscribe(request.user.pk) as subscription:
+            events = notifications_since(request.user, since)
+            if not events:
+                event = subscription.get(max(timeout, 0))
+                if event is not None:
+                    events = [event] + subscription.drain()
+        last = events[-1]['timestamp'] if events else request.query_params.get('since')
+        return Response({'results': events, 'since': last})
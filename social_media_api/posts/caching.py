@@ -0,0 +1,133 @@
+"""
+Rendered-JSON cache and conditional GET for post and comment detail.
+
+Each cached object has a small "meta" entry holding a random version token
+and the time it was last invalidated. The rendered body is stored with the
+token it was built under, so a body rendered while a write was in flight is
+never served once the write's invalidation lands. Signals in posts.signals
+call invalidate() whenever a post, comment or like changes.
+
+Responses carry an ETag (hash of the body) and a Last-Modified header
+derived from updated_at. Matching If-None-Match / If-Modified-Since
+requests get a 304 straight from the cache, without touching the
+database or the serializer.
+"""
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+CACHE_TIMEOUT = getattr(settings, 'POST_DETAIL_CACHE_TIMEOUT', 300)
+
+
+def meta_key(label, pk):
+    return f'posts:detail:meta:{label}:{pk}'
+
+
+def body_key(label, pk):
+    return f'posts:detail:body:{label}:{pk}'
+
+
+def _bump(label, pk):
+    cache.set(meta_key(label, pk), (uuid.uuid4().hex, time.time()), CACHE_TIMEOUT)
+    cache.delete(body_key(label, pk))
+
+
+def invalidate(label, pk):
+    """Drop the cached representation now and again once the transaction commits."""
+    _bump(label, pk)
+    transaction.on_commit(lambda: _bump(label, pk))
+
+
+def invalidate_many(label, pks):
+    """invalidate() for a batch of objects, in one round trip per cache call."""
+    def bump():
+        meta = (uuid.uuid4().hex, time.time())
+        cache.set_many({meta_key(label, pk): meta for pk in pks}, CACHE_TIMEOUT)
+        cache.delete_many([body_key(label, pk) for pk in pks])
+    bump()
+    transaction.on_commit(bump)
+
+
+def get_entry(label, pk):
+    """Return (cached entry or None, current meta)."""
+    found = cache.get_many([meta_key(label, pk), body_key(label, pk)])
+    meta = found.get(meta_key(label, pk))
+    if meta is None:
+        meta = (uuid.uuid4().hex, None)
+        if not cache.add(meta_key(label, pk), meta, CACHE_TIMEOUT):
+            meta = cache.get(meta_key(label, pk), meta)
+        return None, meta
+    entry = found.get(body_key(label, pk))
+    if entry is None or entry['version'] != meta[0]:
+        return None, meta
+    return entry, meta
+
+
+def store_entry(label, pk, meta, body, content_type, updated_at):
+    last_modified = updated_at.timestamp()
+    if meta[1] is not None:
+        # Likes and counter changes don't touch updated_at; the invalidation time covers them
+        last_modified = max(last_modified, meta[1])
+    entry = {
+        'version': meta[0],
+        'body': body,
+        'content_type': content_type,
+        'etag': quote_etag(hashlib.sha1(body).hexdigest()),
+        'last_modified': int(last_modified),
+    }
+    cache.set(body_key(label, pk), entry, CACHE_TIMEOUT)
+    return entry
+
+
+def is_not_modified(request, entry):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        etags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in etags or entry['etag'] in etags or f"W/{entry['etag']}" in etags
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return if_modified_since is not None and entry['last_modified'] <= if_modified_since
+
+
+def build_response(request, entry):
+    if is_not_modified(request, entry):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(entry['body'], content_type=entry['content_type'])
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    # Authenticated API: let clients revalidate, but keep shared caches out
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+class CachedRetrieveMixin:
+    """
+    retrieve() for viewsets whose detail representation is the same for
+    every reader. Only JSON responses are cached; the browsable API renders
+    as usual.
+    """
+    cache_label = None
+
+    def get_last_modified(self, instance):
+        return instance.updated_at
+
+    def retrieve(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != 'json':
+            return super().retrieve(request, *args, **kwargs)
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        entry, meta = get_entry(self.cache_label, pk)
+        if entry is None:
+            instance = self.get_object()
+            data = self.get_serializer(instance).data
+            renderer = request.accepted_renderer
+            body = renderer.render(data, request.accepted_media_type, self.get_renderer_context())
+            content_type = f'{renderer.media_type}; charset={renderer.charset}' if renderer.charset else renderer.media_type
+            entry = store_entry(self.cache_label, instance.pk, meta, body, content_type,
+                                self.get_last_modified(instance))
+        return build_response(request, entry)
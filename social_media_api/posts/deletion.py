@@ -0,0 +1,82 @@
+"""
+Soft delete for posts.
+
+Deleting a post through the API only stamps deleted_at and decrements the
+author's posts_count, so it is hidden at once. Post.objects, and every
+feed, list, search and trending query built on it, skips deleted posts.
+The reap_deleted_posts job removes the rest later. It deletes the
+comments, likes, feed entries and notifications in bounded batches, each
+batch in its own short transaction, and deletes the post row last. By
+then the cascade has nothing left to do.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from notifications.cleanup import delete_for_targets
+from . import caching
+from .models import Comment, FeedEntry, Like, Post
+from .search import get_search_backend
+
+User = get_user_model()
+
+COMMENT_INVALIDATION_BATCH = 1000
+
+
+def soft_delete_post(post):
+    """Hide a post. Returns False if it was already deleted."""
+    now = timezone.now()
+    with transaction.atomic():
+        hidden = Post.all_objects.filter(pk=post.pk, deleted_at__isnull=True).update(deleted_at=now)
+        if hidden:
+            User.objects.filter(pk=post.author_id, posts_count__gt=0).update(posts_count=F('posts_count') - 1)
+    if not hidden:
+        return False
+    post.deleted_at = now
+    # update() skips the post signals
+    get_search_backend().remove_post(post.pk)
+    caching.invalidate('post', post.pk)
+    # Cached comment detail is served without a query, so drop it too
+    comment_ids = Comment.objects.filter(post_id=post.pk).values_list('pk', flat=True)
+    batch = []
+    for comment_id in comment_ids.iterator(chunk_size=COMMENT_INVALIDATION_BATCH):
+        batch.append(comment_id)
+        if len(batch) == COMMENT_INVALIDATION_BATCH:
+            caching.invalidate_many('comment', batch)
+            batch = []
+    if batch:
+        caching.invalidate_many('comment', batch)
+    return True
+
+
+def delete_in_batches(queryset, batch_size, before_delete=None):
+    total = 0
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return total
+        with transaction.atomic():
+            if before_delete:
+                before_delete(ids)
+            total += queryset.model.objects.filter(pk__in=ids).delete()[0]
+
+
+def reap_post(post_id, batch_size=1000):
+    """Delete a soft-deleted post and everything hanging off it. Returns rows deleted per kind."""
+    # Deepest replies first, so no batch has to cascade into the next one
+    comments = Comment.objects.filter(post_id=post_id).order_by('-path')
+    notified = []
+
+    def forget_comments(ids):
+        notified.append(delete_for_targets(Comment, ids, batch_size))
+
+    deleted = {
+        'comments': delete_in_batches(comments, batch_size, before_delete=forget_comments),
+        'likes': delete_in_batches(Like.objects.filter(post_id=post_id), batch_size),
+        'feed entries': delete_in_batches(FeedEntry.objects.filter(post_id=post_id), batch_size),
+        'notifications': delete_for_targets(Post, [post_id], batch_size),
+    }
+    deleted['notifications'] += sum(notified)
+    Post.all_objects.filter(pk=post_id, deleted_at__isnull=False).delete()
+    return deleted
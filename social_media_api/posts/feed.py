@@ -0,0 +1,177 @@
+from functools import cmp_to_key
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F
+
+from accounts.graph import follower_ids, following_ids
+from .models import Post, FeedEntry
+
+User = get_user_model()
+
+# Authors with more followers than this are not fanned out on write;
+# their posts are pulled into followers' feeds at read time instead.
+FANOUT_MAX_FOLLOWERS = getattr(settings, 'FEED_FANOUT_MAX_FOLLOWERS', 10000)
+
+# How many recent posts to copy into a feed when a user follows someone
+BACKFILL_LIMIT = getattr(settings, 'FEED_BACKFILL_LIMIT', 50)
+
+
+def is_pull_author(author_id):
+    """
+    Authors with huge audiences are read on demand (fan-out-on-read).
+    The count is read from the database: request.user may be a JWT
+    stand-in whose counters are all zero.
+    """
+    followers = User.objects.filter(pk=author_id).values_list('followers_count', flat=True).first()
+    return (followers or 0) > FANOUT_MAX_FOLLOWERS
+
+
+def fan_out_post(post):
+    """Push a new post into the materialized feed of every follower."""
+    return fan_out_posts([post])
+
+
+def fan_out_posts(posts):
+    """fan_out_post() for many posts, checking each author once."""
+    by_author = {}
+    for post in posts:
+        by_author.setdefault(post.author_id, []).append(post)
+    entries = []
+    for author_id, authored in by_author.items():
+        if is_pull_author(author_id):
+            continue
+        entries.extend(
+            FeedEntry(user_id=follower_id, post=post, created_at=post.created_at)
+            for follower_id in follower_ids(author_id) for post in authored
+        )
+    FeedEntry.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
+    return len(entries)
+
+
+def backfill_feed(user, author):
+    """Copy an author's recent posts into a new follower's feed."""
+    if is_pull_author(author.pk):
+        return
+    posts = author.posts.order_by('-created_at')[:BACKFILL_LIMIT]
+    FeedEntry.objects.bulk_create(
+        [FeedEntry(user=user, post=post, created_at=post.created_at) for post in posts],
+        ignore_conflicts=True,
+    )
+
+
+def purge_feed(user, author):
+    """Drop an author's posts from a user's feed after an unfollow."""
+    purge_feed_authors(user, [author.pk])
+
+
+def purge_feed_authors(user, author_ids):
+    FeedEntry.objects.filter(user=user, post__author_id__in=author_ids).delete()
+
+
+# Up to this many pull authors are read with one indexed query each;
+# beyond it their posts come from a single query that has to sort
+MAX_PULL_BRANCHES = getattr(settings, 'FEED_MAX_PULL_BRANCHES', 10)
+
+# Feed pages are ordered by the timestamp copied onto FeedEntry, so the
+# read is one range scan of feedentry_user_ts_post_idx
+FEED_ORDERING = ('-feed_created_at', '-feed_post_id')
+
+
+def entries_queryset(user):
+    """Posts materialized into a user's feed, carrying the FeedEntry ordering columns."""
+    return Post.objects.filter(feed_entries__user=user).annotate(
+        feed_created_at=F('feed_entries__created_at'), feed_post_id=F('feed_entries__post_id'),
+    ).order_by(*FEED_ORDERING)
+
+
+def pulled_queryset(author_ids):
+    """
+    Posts by pull authors, under the same ordering names as
+    entries_queryset(). With a single author this is a range scan of
+    post_author_created_idx; several authors need a sort.
+    """
+    return Post.objects.filter(author_id__in=author_ids).annotate(
+        feed_created_at=F('created_at'), feed_post_id=F('id'),
+    ).order_by(*FEED_ORDERING)
+
+
+def _compare(ordering):
+    def compare(a, b):
+        for field in ordering:
+            name = field.lstrip('-')
+            x = a[name] if isinstance(a, dict) else getattr(a, name)
+            y = b[name] if isinstance(b, dict) else getattr(b, name)
+            if x != y:
+                result = -1 if x < y else 1
+                return -result if field.startswith('-') else result
+        return 0
+    return cmp_to_key(compare)
+
+
+class MergedFeed:
+    """
+    Two ordered querysets read as one, for cursor pagination: filter(),
+    order_by(), values() and the like apply to both, and a slice takes
+    the first rows of each (each one an indexed range scan) and merges
+    them in Python. Stands in for an OR + DISTINCT query, which can't use
+    either index and sorts every matching row.
+    """
+
+    # Queryset-returning methods applied to every branch; anything else is an AttributeError
+    QUERYSET_METHODS = frozenset([
+        'filter', 'exclude', 'values', 'only', 'select_related', 'prefetch_related', 'with_related',
+    ])
+
+    def __init__(self, querysets, ordering=FEED_ORDERING):
+        self.querysets = querysets
+        self.ordering = ordering
+
+    def __getattr__(self, name):
+        if name not in self.QUERYSET_METHODS:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        methods = [getattr(queryset, name) for queryset in self.querysets]
+
+        def apply(*args, **kwargs):
+            return MergedFeed([method(*args, **kwargs) for method in methods], self.ordering)
+        return apply
+
+    # The branches never share a post: entries exclude the pull authors, each branch reads its own
+    def count(self):
+        return sum(queryset.count() for queryset in self.querysets)
+
+    def exists(self):
+        return any(queryset.exists() for queryset in self.querysets)
+
+    def order_by(self, *ordering):
+        return MergedFeed([queryset.order_by(*ordering) for queryset in self.querysets], ordering)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        rows = []
+        for queryset in self.querysets:
+            rows.extend(queryset[:index.stop] if index.stop is not None else queryset)
+        return sorted(rows, key=_compare(self.ordering))[index]
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+def get_feed_queryset(user):
+    """
+    Posts for a user's feed: materialized entries plus, for followed authors
+    above the fan-out threshold, their posts read directly.
+    """
+    # Followed ids come from the graph cache; only the pk lookup for large authors hits the database
+    followed = following_ids(user.pk)
+    pull_author_ids = list(
+        User.objects.filter(pk__in=followed, followers_count__gt=FANOUT_MAX_FOLLOWERS).values_list('id', flat=True)
+    ) if followed else []
+    if not pull_author_ids:
+        return entries_queryset(user)
+    # Entries written before an author crossed the threshold would show up twice
+    entries = entries_queryset(user).exclude(author_id__in=pull_author_ids)
+    if len(pull_author_ids) > MAX_PULL_BRANCHES:
+        return MergedFeed([entries, pulled_queryset(pull_author_ids)])
+    return MergedFeed([entries] + [pulled_queryset([author_id]) for author_id in pull_author_ids])
@@ -0,0 +1,149 @@
+"""
+Idempotent like/unlike.
+
+like_posts() and unlike_posts() insert or delete the Like rows and adjust
+Post.likes_count together. They return one LikeResult per existing post,
+with the new count. Posts that don't exist (or are soft-deleted) are simply absent.
+
+On PostgreSQL each call is a single statement: data-modifying CTEs chain
+INSERT ... ON CONFLICT DO NOTHING RETURNING (or DELETE ... RETURNING) into
+the counter UPDATE. Elsewhere (SQLite 3.35+) the same statements run one
+after another in a transaction. Only rows the INSERT/DELETE actually
+touched move the counter, so concurrent or repeated requests never cause
+drift.
+
+The same UPDATE adds the like to (or takes it back from) the post's
+trending score, see posts.trending.
+"""
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import caching, trending
+from .models import Like, Post
+
+LikeResult = namedtuple('LikeResult', ['post_id', 'author_id', 'likes_count', 'changed'])
+
+POST_TABLE = Post._meta.db_table
+LIKE_TABLE = Like._meta.db_table
+
+# trending_score carried over to the current bucket, as in trending.rescaled_score()
+PG_RESCALED_SCORE = (
+    "CASE WHEN p.trending_epoch = %(epoch)s THEN p.trending_score "
+    "ELSE p.trending_score * power(2, (p.trending_epoch - %(epoch)s) * %(ratio)s) END"
+)
+
+PG_LIKE_SQL = f"""
+WITH inserted AS (
+    INSERT INTO {LIKE_TABLE} (post_id, user_id, created_at)
+    SELECT id, %(user_id)s, %(now)s FROM {POST_TABLE} WHERE id = ANY(%(post_ids)s) AND deleted_at IS NULL
+    ON CONFLICT (post_id, user_id) DO NOTHING
+    RETURNING post_id
+), bumped AS (
+    UPDATE {POST_TABLE} p SET likes_count = p.likes_count + 1,
+        trending_score = {PG_RESCALED_SCORE} + %(delta)s, trending_epoch = %(epoch)s
+    FROM inserted i WHERE p.id = i.post_id
+    RETURNING p.id, p.author_id, p.likes_count
+)
+SELECT id, author_id, likes_count, TRUE FROM bumped
+UNION ALL
+SELECT id, author_id, likes_count, FALSE FROM {POST_TABLE}
+WHERE id = ANY(%(post_ids)s) AND deleted_at IS NULL AND id NOT IN (SELECT id FROM bumped)
+"""
+
+PG_UNLIKE_SQL = f"""
+WITH deleted AS (
+    DELETE FROM {LIKE_TABLE} WHERE user_id = %(user_id)s AND post_id IN (
+        SELECT id FROM {POST_TABLE} WHERE id = ANY(%(post_ids)s) AND deleted_at IS NULL
+    )
+    RETURNING post_id, created_at
+), dropped AS (
+    UPDATE {POST_TABLE} p SET likes_count = GREATEST(p.likes_count - 1, 0),
+        trending_score = GREATEST({PG_RESCALED_SCORE} - %(weight)s * power(
+            2, (extract(epoch FROM d.created_at) - %(origin)s) / %(half_life)s), 0),
+        trending_epoch = %(epoch)s
+    FROM deleted d WHERE p.id = d.post_id
+    RETURNING p.id, p.author_id, p.likes_count
+)
+SELECT id, author_id, likes_count, TRUE FROM dropped
+UNION ALL
+SELECT id, author_id, likes_count, FALSE FROM {POST_TABLE}
+WHERE id = ANY(%(post_ids)s) AND deleted_at IS NULL AND id NOT IN (SELECT id FROM dropped)
+"""
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def _portable(user_id, post_ids, like):
+    ids = _placeholders(post_ids)
+    with transaction.atomic(), connection.cursor() as cursor:
+        if like:
+            cursor.execute(
+                f"INSERT INTO {LIKE_TABLE} (post_id, user_id, created_at) "
+                f"SELECT id, %s, %s FROM {POST_TABLE} WHERE id IN ({ids}) AND deleted_at IS NULL "
+                f"ON CONFLICT (post_id, user_id) DO NOTHING RETURNING post_id",
+                [user_id, timezone.now(), *post_ids],
+            )
+        else:
+            # When each like was made, to take back what it added to the trending score
+            liked_at = dict(
+                Like.objects.filter(user_id=user_id, post_id__in=post_ids).values_list('post_id', 'created_at')
+            )
+            cursor.execute(
+                f"DELETE FROM {LIKE_TABLE} WHERE user_id = %s AND post_id IN "
+                f"(SELECT id FROM {POST_TABLE} WHERE id IN ({ids}) AND deleted_at IS NULL) RETURNING post_id",
+                [user_id, *post_ids],
+            )
+        changed = [row[0] for row in cursor.fetchall()]
+        if changed:
+            delta = "likes_count + 1" if like else "MAX(likes_count - 1, 0)"
+            cursor.execute(
+                f"UPDATE {POST_TABLE} SET likes_count = {delta} WHERE id IN ({_placeholders(changed)})",
+                changed,
+            )
+            if like:
+                trending.record(changed, trending.LIKE_WEIGHT)
+            else:
+                for pk in changed:
+                    trending.record([pk], -trending.LIKE_WEIGHT, times=[liked_at[pk]])
+        cursor.execute(
+            f"SELECT id, author_id, likes_count FROM {POST_TABLE} WHERE id IN ({ids}) AND deleted_at IS NULL",
+            post_ids,
+        )
+        changed = set(changed)
+        return [LikeResult(pk, author_id, count, pk in changed) for pk, author_id, count in cursor.fetchall()]
+
+
+def _apply(user_id, post_ids, like):
+    post_ids = sorted({int(pk) for pk in post_ids})
+    if not post_ids:
+        return []
+    if connection.vendor == 'postgresql':
+        now = timezone.now()
+        epoch = trending.current_epoch(now)
+        params = {
+            'user_id': user_id, 'post_ids': post_ids, 'now': now, 'epoch': epoch, 'ratio': trending.BUCKET_RATIO,
+            'delta': trending.contribution(trending.LIKE_WEIGHT, now, epoch), 'weight': trending.LIKE_WEIGHT,
+            'origin': epoch * trending.BUCKET_SECONDS, 'half_life': trending.HALF_LIFE,
+        }
+        with connection.cursor() as cursor:
+            cursor.execute(PG_LIKE_SQL if like else PG_UNLIKE_SQL, params)
+            results = [LikeResult(*row) for row in cursor.fetchall()]
+    else:
+        results = _portable(user_id, post_ids, like)
+    # Raw SQL skips the Like signals, so drop cached post details here
+    for result in results:
+        if result.changed:
+            caching.invalidate('post', result.post_id)
+    return sorted(results, key=lambda result: result.post_id)
+
+
+def like_posts(user_id, post_ids):
+    return _apply(user_id, post_ids, like=True)
+
+
+def unlike_posts(user_id, post_ids):
+    return _apply(user_id, post_ids, like=False)
@@ -0,0 +1,77 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from posts.models import Comment, Post
+from posts.serializers import PostListSerializer, PostSerializer
+from posts.views import list_queryset
+
+
+class Command(BaseCommand):
+    help = ("Compare bytes and milliseconds per page for the old full PostSerializer and the compact list "
+            "representation on synthetic posts. Everything runs in a transaction that is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=500)
+        parser.add_argument('--comments-per-post', type=int, default=20)
+        parser.add_argument('--content-length', type=int, default=2000)
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options)
+            page_size = options['page_size']
+            factory = APIRequestFactory()
+
+            def full():
+                posts = list(Post.objects.with_related().order_by('-created_at', '-id')[:page_size])
+                return PostSerializer(posts, many=True).data
+
+            def variant(query):
+                request = Request(factory.get('/api/posts/', query))
+
+                def run():
+                    queryset = list_queryset(Post.objects.order_by('-created_at', '-id'), request)
+                    return PostListSerializer(queryset[:page_size], many=True, context={'request': request}).data
+                return run
+
+            cases = [
+                ('full (before)', full),
+                ('compact', variant({})),
+                ('compact ?expand=comments', variant({'expand': 'comments'})),
+                ('compact ?fields=id,title', variant({'fields': 'id,title'})),
+            ]
+            self.stdout.write(f"{'representation':<28}{'bytes/page':>12}{'ms/page':>10}")
+            for name, run in cases:
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    body = JSONRenderer().render(run())
+                    timings.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(f"{name:<28}{len(body):>12,}{statistics.median(timings):>10.2f}")
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        rng = random.Random(42)
+        User = get_user_model()
+        users = User.objects.bulk_create(
+            [User(username=f'bench_lists_{i}') for i in range(20)]
+        )
+        text = ' '.join(rng.choice(['lorem', 'ipsum', 'dolor', 'sit', 'amet']) for _ in range(options['content_length'] // 6))
+        posts = Post.objects.bulk_create(
+            [Post(author=rng.choice(users), title=f'Post {i}', content=text) for i in range(options['posts'])]
+        )
+        Comment.objects.bulk_create(
+            [Comment(post=post, author=rng.choice(users), content=text[:200])
+             for post in posts for _ in range(options['comments_per_post'])],
+            batch_size=5000,
+        )
+        self.stdout.write(f"Seeded {len(posts)} posts with {options['comments_per_post']} comments each.")
@@ -0,0 +1,78 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from posts.models import Post
+from posts.search import InvertedIndexBackend, PostgresSearchBackend
+
+PAGE_SIZE = 10
+
+
+def icontains_search(queryset, query):
+    # What DRF's SearchFilter over title/content compiles to
+    for term in query.split():
+        queryset = queryset.filter(Q(title__icontains=term) | Q(content__icontains=term))
+    return queryset.order_by('-created_at', '-id')
+
+
+class Command(BaseCommand):
+    help = ("Compare LIKE '%q%' search with the full-text backends on synthetic posts. "
+            "Everything runs in a transaction that is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--vocabulary', type=int, default=50000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        words = [f"w{i}" for i in range(options['vocabulary'])]
+        queries = [" ".join(rng.sample(words[:2000], rng.choice((1, 2)))) for _ in range(options['queries'])]
+
+        with transaction.atomic():
+            self.seed_posts(rng, words, options['posts'])
+
+            engines = [('icontains', icontains_search)]
+            python_backend = InvertedIndexBackend()
+            started = time.perf_counter()
+            python_backend.build()
+            self.stdout.write(f"inverted index built in {time.perf_counter() - started:.2f}s "
+                              f"({len(python_backend.postings)} terms)")
+            engines.append(('inverted index', self.ranked(python_backend)))
+            if connection.vendor == 'postgresql':
+                engines.append(('postgres GIN', self.ranked(PostgresSearchBackend())))
+
+            for name, search in engines:
+                timings = []
+                for query in queries:
+                    started = time.perf_counter()
+                    list(search(Post.objects.all(), query)[:PAGE_SIZE])
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                self.stdout.write(
+                    f"{name:>15}: median {timings[len(timings) // 2]:8.2f} ms, "
+                    f"p95 {timings[int(len(timings) * 0.95) - 1]:8.2f} ms, max {timings[-1]:8.2f} ms"
+                )
+            transaction.set_rollback(True)
+
+    def ranked(self, backend):
+        return lambda queryset, query: backend.search(queryset, query).order_by('-search_rank', '-id')
+
+    def seed_posts(self, rng, words, total):
+        author = get_user_model().objects.create_user(username=f"benchmark-{rng.random()}")
+        started = time.perf_counter()
+        batch = []
+        for i in range(total):
+            # Zipf-ish word choice, so some terms are common and most are rare
+            content = " ".join(words[min(int(rng.paretovariate(1.2)) - 1, len(words) - 1)] for _ in range(40))
+            batch.append(Post(author=author, title=" ".join(rng.sample(words[:5000], 5)), content=content))
+            if len(batch) == 5000:
+                Post.objects.bulk_create(batch)
+                batch = []
+        Post.objects.bulk_create(batch)
+        self.stdout.write(f"seeded {total} posts in {time.perf_counter() - started:.1f}s")
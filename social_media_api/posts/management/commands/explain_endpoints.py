@@ -0,0 +1,72 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from notifications.models import Notification
+from posts.feed import entries_queryset
+from posts.models import Post, Comment, Like
+
+PAGE_SIZE = 10
+
+# Plan lines that mean a full table read: PostgreSQL "Seq Scan on x",
+# SQLite "SCAN x" without "USING INDEX" / "USING COVERING INDEX"
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)(?!.*USING)'),
+}
+
+
+def endpoint_queries(user):
+    post = Post.objects.order_by('-id').first()
+    post_type = ContentType.objects.get_for_model(Post)
+    post_id = post.pk if post else 0
+    return {
+        'post list': Post.objects.order_by('-created_at', '-id')[:PAGE_SIZE],
+        'posts by author': Post.objects.filter(author=user).order_by('-created_at', '-id')[:PAGE_SIZE],
+        'feed': entries_queryset(user)[:PAGE_SIZE],
+        'comment list': Comment.objects.order_by('-created_at', '-id')[:PAGE_SIZE],
+        'comments on post': Comment.objects.filter(post_id=post_id).order_by('-created_at', '-id'),
+        'like lookup': Like.objects.filter(post_id=post_id, user=user),
+        'likes by user': Like.objects.filter(user=user).order_by('-created_at')[:PAGE_SIZE],
+        'notification list': Notification.objects.filter(recipient=user).order_by('-timestamp', '-id')[:PAGE_SIZE],
+        'unread notifications': Notification.objects.filter(recipient=user, read=False),
+        'notifications by target': Notification.objects.filter(content_type=post_type, object_id=post_id),
+    }
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN on the queries behind each API endpoint and flag sequential scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Username to build per-user queries for (default: first user).")
+        parser.add_argument('--verbose-plans', action='store_true', help="Print full plans.")
+        parser.add_argument('--fail-on-seq-scan', action='store_true')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        users = User.objects.order_by('pk')
+        user = users.filter(username=options['user']).first() if options['user'] else users.first()
+        if user is None:
+            raise CommandError("No user found to build queries for.")
+
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            self.stdout.write(self.style.WARNING(f"No scan detection for {connection.vendor}; printing plans only."))
+
+        flagged = []
+        for name, queryset in endpoint_queries(user).items():
+            plan = queryset.explain()
+            scans = sorted(set(pattern.findall(plan))) if pattern else []
+            if scans:
+                flagged.append(name)
+                self.stdout.write(self.style.ERROR(f"SEQ SCAN  {name}: {', '.join(scans)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"ok        {name}"))
+            if options['verbose_plans'] or pattern is None:
+                self.stdout.write(plan)
+
+        if flagged and options['fail_on_seq_scan']:
+            raise CommandError(f"Sequential scans in: {', '.join(flagged)}")
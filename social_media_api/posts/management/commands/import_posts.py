@@ -0,0 +1,49 @@
+import sys
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from posts.transfer import FORMATS, SPECS, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = ("Load posts, comments or likes from NDJSON or CSV with chunked bulk_create. "
+            "Import posts before the comments and likes that reference them.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=sorted(SPECS), default='posts')
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--input', default='-', help='File to read, or - for stdin (default).')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--ignore-conflicts', action='store_true',
+                            help='Skip rows whose id (or post/user pair for likes) already exists.')
+        parser.add_argument('--no-reconcile', action='store_true',
+                            help="Don't recompute the denormalized counters afterwards.")
+
+    def handle(self, *args, **options):
+        if options['input'] == '-':
+            read, inserted = self.load(sys.stdin, options)
+        else:
+            with open(options['input'], newline='', encoding='utf-8') as stream:
+                read, inserted = self.load(stream, options)
+
+        if not options['no_reconcile']:
+            # bulk_create skips the F() counter updates the views do
+            call_command('reconcile_post_counters', stdout=self.stderr)
+            call_command('reconcile_user_counters', stdout=self.stderr)
+        self.stderr.write(self.style.SUCCESS(
+            f"Imported {inserted} of {read} {options['model']} rows ({read - inserted} skipped for unknown users, missing posts or existing rows)."
+        ))
+
+    def load(self, stream, options):
+        read = inserted = 0
+        started = time.perf_counter()
+        rows = read_rows(stream, options['format'])
+        for chunk_read, chunk_inserted in import_rows(options['model'], rows, options['batch_size'],
+                                                      options['ignore_conflicts']):
+            read += chunk_read
+            inserted += chunk_inserted
+            elapsed = max(time.perf_counter() - started, 1e-9)
+            self.stderr.write(f"{read} rows read, {inserted} inserted ({read / elapsed:,.0f} rows/s)")
+        return read, inserted
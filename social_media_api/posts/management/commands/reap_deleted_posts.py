@@ -0,0 +1,33 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from notifications.cleanup import delete_orphans
+from posts.deletion import reap_post
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = "Delete soft-deleted posts with their comments, likes, feed entries and notifications, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--limit', type=int, default=None, help="Reap at most this many posts.")
+        parser.add_argument(
+            '--orphans', action='store_true',
+            help="Also sweep notifications whose post or comment no longer exists.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        post_ids = Post.all_objects.filter(deleted_at__isnull=False).order_by('deleted_at')
+        post_ids = list(post_ids.values_list('pk', flat=True)[:options['limit']])
+
+        totals = Counter()
+        for post_id in post_ids:
+            totals.update(reap_post(post_id, batch_size))
+        if options['orphans']:
+            totals['orphaned notifications'] = delete_orphans(Post, batch_size) + delete_orphans(Comment, batch_size)
+
+        details = ', '.join(f"{count} {kind}" for kind, count in sorted(totals.items()))
+        self.stdout.write(self.style.SUCCESS(f"Reaped {len(post_ids)} posts ({details or 'nothing else'})."))
@@ -0,0 +1,69 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Value
+from django.utils import timezone
+
+from posts import trending
+from posts.models import Comment, Like, Post
+
+# Events older than this many half-lives add less than a millionth of a fresh one
+REBUILD_HALF_LIVES = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Carry trending scores over to the current bucket and clear the ones that have decayed away. "
+        "Run it at least once per TRENDING_BUCKET_SECONDS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help="Recompute every score from recent likes and comments (repairs drift).",
+        )
+
+    def handle(self, *args, **options):
+        epoch = trending.current_epoch()
+        if options['rebuild']:
+            self.rebuild(epoch, options['batch_size'])
+        rescaled, cleared = self.rebucket(epoch, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rescaled {rescaled} trending scores to bucket {epoch}, cleared {cleared}."
+        ))
+
+    def rebucket(self, epoch, batch_size):
+        rescaled = cleared = 0
+        last_id = 0
+        while True:
+            ids = list(
+                Post.objects.filter(pk__gt=last_id, trending_score__gt=0, trending_epoch__lt=epoch)
+                .order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                return rescaled, cleared
+            last_id = ids[-1]
+            with transaction.atomic():
+                rescaled += Post.objects.filter(pk__in=ids).update(
+                    trending_score=trending.rescaled_score(epoch), trending_epoch=epoch,
+                )
+                cleared += Post.objects.filter(pk__in=ids, trending_score__lt=trending.MIN_SCORE).update(
+                    trending_score=0,
+                )
+
+    def rebuild(self, epoch, batch_size):
+        since = timezone.now() - timedelta(seconds=trending.HALF_LIFE * REBUILD_HALF_LIVES)
+        scores = defaultdict(float)
+        for model, weight in ((Like, trending.LIKE_WEIGHT), (Comment, trending.COMMENT_WEIGHT)):
+            events = model.objects.filter(created_at__gte=since).values_list('post_id', 'created_at')
+            for post_id, created_at in events.iterator(chunk_size=batch_size):
+                scores[post_id] += trending.contribution(weight, created_at, epoch)
+
+        with transaction.atomic():
+            Post.objects.filter(trending_score__gt=0).update(trending_score=Value(0.0), trending_epoch=epoch)
+            posts = [Post(pk=pk, trending_score=score, trending_epoch=epoch) for pk, score in scores.items()]
+            Post.objects.bulk_update(posts, ['trending_score', 'trending_epoch'], batch_size=batch_size)
+        self.stdout.write(f"Rebuilt trending scores for {len(scores)} posts.")
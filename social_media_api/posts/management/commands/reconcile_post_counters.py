@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts import caching
+from posts.models import Post, Comment, Like
+
+
+def count_subquery(model):
+    counts = (
+        model.objects.filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = "Repair drift in Post.likes_count / Post.comments_count, one batch of posts at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        checked = repaired = 0
+
+        while True:
+            ids = list(Post.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+            checked += len(ids)
+
+            # Count and write in the same UPDATE, so F() increments from likes and
+            # comments landing meanwhile aren't overwritten with a stale count
+            likes, comments = count_subquery(Like), count_subquery(Comment)
+            drifted = list(
+                Post.objects.filter(pk__in=ids)
+                .exclude(likes_count=likes, comments_count=comments)
+                .values_list('pk', flat=True)
+            )
+            if drifted:
+                repaired += (
+                    Post.objects.filter(pk__in=drifted)
+                    .exclude(likes_count=likes, comments_count=comments)
+                    .update(likes_count=likes, comments_count=comments)
+                )
+                # Cached detail responses (and their ETags) still carry the old counts
+                caching.invalidate_many('post', drifted)
+
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} posts, repaired {repaired}."))
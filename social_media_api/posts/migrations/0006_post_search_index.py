@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:31
+
+from django.db import migrations
+
+# Same expression as posts.search.SEARCH_VECTOR_SQL, so the planner can use the index
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    # GIN index for PostgresSearchBackend; other databases use the in-memory fallback
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS post_search_idx ON posts_post USING gin (({SEARCH_VECTOR_SQL}))"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX CONCURRENTLY IF EXISTS post_search_idx")
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('posts', '0005_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from social_media_api.migration_operations import AddIndexConcurrently
+
+PATH_SEGMENT_WIDTH = 10
+
+
+def backfill_paths(apps, schema_editor):
+    # Existing comments become top-level threads
+    Comment = apps.get_model('posts', 'Comment')
+    last_id = 0
+    while True:
+        batch = list(Comment.objects.filter(pk__gt=last_id, path='').order_by('pk').only('id')[:1000])
+        if not batch:
+            break
+        for comment in batch:
+            comment.path = str(comment.pk).zfill(PATH_SEGMENT_WIDTH)
+        Comment.objects.bulk_update(batch, ['path'])
+        last_id = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('posts', '0006_post_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.comment'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comment_post_path_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:10
+
+from django.db import migrations, models
+
+from social_media_api.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('posts', '0009_post_soft_delete'),
+    ]
+
+    operations = [
+        # The post id breaks created_at ties, so feed pages need no sort step
+        AddIndexConcurrently(
+            model_name='feedentry',
+            index=models.Index(fields=['user', '-created_at', '-post'], name='feedentry_user_ts_post_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='feedentry',
+            name='feedentry_user_created_idx',
+        ),
+    ]
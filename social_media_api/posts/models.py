@@ -1,30 +1,123 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.conf import settings
 
 User = get_user_model()
 User = settings.AUTH_USER_MODEL
 
+class PostQuerySet(models.QuerySet):
+    def with_related(self, comment_limit=None):
+        """
+        Prefetch plan for serializing posts: authors are joined, comments and
+        their authors come from one extra query no matter how many posts are
+        loaded. comment_limit keeps only the N most recent comments per post.
+        """
+        comments = Comment.objects.select_related('author').order_by('-created_at', '-id')
+        if comment_limit is not None:
+            comments = comments[:comment_limit]
+        # Sliced prefetches can't be cached on the related manager, so store them on an attribute
+        return self.select_related('author').prefetch_related(
+            models.Prefetch('comments', queryset=comments, to_attr='prefetched_comments')
+        )
+
+class PostManager(models.Manager.from_queryset(PostQuerySet)):
+    # Soft-deleted posts are hidden everywhere; Post.all_objects still sees them
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
 class Post(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     title = models.CharField(max_length=255)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized counters, maintained with F() updates and repaired by
+    # the reconcile_post_counters command
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    # Time-decayed popularity, maintained by posts.trending (relative to
+    # the trending_epoch bucket)
+    trending_score = models.FloatField(default=0)
+    trending_epoch = models.IntegerField(default=0)
+    # Set by posts.deletion.soft_delete_post; the row and its children are
+    # removed later by the reap_deleted_posts job
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = PostManager()
+    all_objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['author', '-created_at', '-id'], name='post_author_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='post_created_id_idx'),
+            models.Index(fields=['-trending_score', '-id'], name='post_trending_idx'),
+            models.Index(fields=['deleted_at'], condition=models.Q(deleted_at__isnull=False),
+                         name='post_deleted_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    @property
+    def comment_list(self):
+        # Comments loaded by PostQuerySet.with_related(), falling back to a query
+        if hasattr(self, 'prefetched_comments'):
+            return self.prefetched_comments
+        return self.comments.all()
+
+# Materialized paths: each comment's path is its ancestors' ids followed by
+# its own, every id zero-padded to PATH_SEGMENT_WIDTH digits. Sorting by path
+# walks a thread depth-first (siblings oldest first), and a subtree is the
+# range [path, next_path(path)). Digits only, so the range works under any
+# collation and can use the (post, path) index.
+PATH_SEGMENT_WIDTH = 10
+PATH_MAX_LENGTH = 255
+
+
+def path_segment(pk):
+    return str(pk).zfill(PATH_SEGMENT_WIDTH)
+
+
+def next_path(path):
+    """Smallest path sorting after every descendant of `path`."""
+    return path[:-PATH_SEGMENT_WIDTH] + path_segment(int(path[-PATH_SEGMENT_WIDTH:]) + 1)
+
+
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='comments')
+    parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies')
+    path = models.CharField(max_length=PATH_MAX_LENGTH, blank=True, default='')
+    depth = models.PositiveSmallIntegerField(default=0)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', '-created_at', '-id'], name='comment_post_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='comment_created_id_idx'),
+            models.Index(fields=['post', 'path'], name='comment_post_path_idx'),
+        ]
+
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title}"
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding or self.path:
+            return super().save(*args, **kwargs)
+        # The path ends with our own id, so it can only be written after the INSERT
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            parent = self.parent if self.parent_id else None
+            self.depth = parent.depth + 1 if parent else 0
+            self.path = (parent.path if parent else '') + path_segment(self.pk)
+            Comment.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+
+    @property
+    def subtree_range(self):
+        return self.path, next_path(self.path)
+
 class Like(models.Model):
     post = models.ForeignKey('Post', related_name='likes', on_delete=models.CASCADE)
     user = models.ForeignKey(User, related_name='likes', on_delete=models.CASCADE)
@@ -32,6 +125,24 @@ class Like(models.Model):
 
     class Meta:
         unique_together = ('post', 'user')  # prevent multiple likes by the same user
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='like_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} likes {self.post.title}"
+
+class FeedEntry(models.Model):
+    # Materialized timeline row, written when a followed author posts
+    user = models.ForeignKey(User, related_name='feed_entries', on_delete=models.CASCADE)
+    post = models.ForeignKey(Post, related_name='feed_entries', on_delete=models.CASCADE)
+    created_at = models.DateTimeField()  # copied from the post for ordering
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='feedentry_user_ts_post_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} likes {self.post.title}"  
\ No newline at end of file
+        return f"{self.post.title} in {self.user.username}'s feed"
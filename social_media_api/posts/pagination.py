@@ -0,0 +1,35 @@
+from rest_framework.pagination import CursorPagination
+
+from social_media_api.pagination import KeysetCursorPagination
+
+
+class CreatedAtCursorPagination(KeysetCursorPagination):
+    """
+    Keyset pagination on (created_at, id) with opaque cursors, so deep pages
+    cost the same as the first one (no OFFSET scan).
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class FeedCursorPagination(CreatedAtCursorPagination):
+    """Feed pages, ordered by the FeedEntry columns that posts.feed annotates."""
+    ordering = ('-feed_created_at', '-feed_post_id')
+
+
+class RankedCursorPagination(CreatedAtCursorPagination):
+    """Orders by search_rank when a full-text search annotated the queryset."""
+
+    def get_ordering(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations:
+            return ('-search_rank', '-id')
+        return super().get_ordering(request, queryset, view)
+
+
+class PathCursorPagination(CursorPagination):
+    """Depth-first pages over a thread (ordered by the materialized path)."""
+    ordering = ('path',)
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
@@ -0,0 +1,168 @@
+"""
+Full-text search for posts.
+
+PostgresSearchBackend matches against a GIN expression index over the
+weighted title/content tsvector (created by migration 0006 on PostgreSQL).
+InvertedIndexBackend is a pure-Python fallback for SQLite and development:
+an in-memory inverted index built lazily from the database and kept current
+by post_save/post_delete signals.
+
+Both annotate matching posts with ``search_rank`` (higher is better).
+"""
+import math
+import re
+import threading
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, Case, FloatField, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+
+# Must match the expression indexed by migration 0006 (column qualification aside)
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(\"posts_post\".\"title\", '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(\"posts_post\".\"content\", '')), 'B')"
+)
+
+# Cap on ranked matches the fallback backend hands to the database
+MAX_RESULTS = getattr(settings, 'POSTS_SEARCH_MAX_RESULTS', 1000)
+
+TOKEN_RE = re.compile(r'\w+')
+STOP_WORDS = frozenset('a an and are as at be by for from in is it of on or that the this to was with'.split())
+TITLE_WEIGHT = 2.0
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall((text or '').lower()) if t not in STOP_WORDS]
+
+
+class PostgresSearchBackend:
+    def search(self, queryset, query):
+        tsquery = "websearch_to_tsquery('english', %s)"
+        return queryset.filter(
+            RawSQL(f"({SEARCH_VECTOR_SQL}) @@ {tsquery}", (query,), output_field=BooleanField())
+        ).annotate(
+            # ts_rank returns float4; as float8 the rank survives the str() round-trip through
+            # the pagination cursor, so rows tied on the boundary compare equal
+            search_rank=RawSQL(f"ts_rank({SEARCH_VECTOR_SQL}, {tsquery})::float8", (query,),
+                               output_field=FloatField())
+        )
+
+    # The expression index is maintained by PostgreSQL itself
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+
+class InvertedIndexBackend:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.postings = {}   # term -> {post_id: weighted term frequency}
+            self.doc_terms = {}  # post_id -> terms, so a post can be re-indexed or removed
+            self.built = False
+
+    def build(self):
+        from .models import Post
+        with self.lock:
+            self.reset()
+            rows = Post.objects.values_list('id', 'title', 'content').iterator(chunk_size=2000)
+            for post_id, title, content in rows:
+                self._add(post_id, title, content)
+            self.built = True
+
+    def _add(self, post_id, title, content):
+        weights = {}
+        for term in tokenize(title):
+            weights[term] = weights.get(term, 0) + TITLE_WEIGHT
+        for term in tokenize(content):
+            weights[term] = weights.get(term, 0) + 1
+        for term, weight in weights.items():
+            self.postings.setdefault(term, {})[post_id] = weight
+        self.doc_terms[post_id] = set(weights)
+
+    def _remove(self, post_id):
+        for term in self.doc_terms.pop(post_id, ()):
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(post_id, None)
+                if not docs:
+                    del self.postings[term]
+
+    def index_post(self, post):
+        with self.lock:
+            if self.built:
+                self._remove(post.pk)
+                self._add(post.pk, post.title, post.content)
+
+    def remove_post(self, post_id):
+        with self.lock:
+            if self.built:
+                self._remove(post_id)
+
+    def rank(self, query):
+        """Return [(post_id, score)] for posts containing every query term, best first."""
+        terms = set(tokenize(query))
+        with self.lock:
+            if not self.built:
+                self.build()
+            if not terms or any(term not in self.postings for term in terms):
+                return []
+            total = len(self.doc_terms)
+            # Intersect starting from the rarest term
+            ordered = sorted(terms, key=lambda t: len(self.postings[t]))
+            candidates = set(self.postings[ordered[0]])
+            for term in ordered[1:]:
+                candidates &= self.postings[term].keys()
+            scores = {}
+            for term in ordered:
+                docs = self.postings[term]
+                idf = math.log(1 + total / len(docs))
+                for post_id in candidates:
+                    scores[post_id] = scores.get(post_id, 0.0) + (1 + math.log(docs[post_id])) * idf
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:MAX_RESULTS]
+
+    def search(self, queryset, query):
+        ranked = self.rank(query)
+        if not ranked:
+            return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+        return queryset.filter(pk__in=[post_id for post_id, _ in ranked]).annotate(
+            search_rank=Case(
+                *[When(pk=post_id, then=Value(score)) for post_id, score in ranked],
+                output_field=FloatField(),
+            )
+        )
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            path = getattr(settings, 'POSTS_SEARCH_BACKEND', None)
+            if path is None:
+                path = ('posts.search.PostgresSearchBackend' if connection.vendor == 'postgresql'
+                        else 'posts.search.InvertedIndexBackend')
+            _backend = import_string(path)()
+        return _backend
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """Drop-in for DRF's SearchFilter (same ?search= parameter) backed by the search engine."""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return get_search_backend().search(queryset, query)
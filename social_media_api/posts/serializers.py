@@ -1,26 +1,112 @@
+from django.conf import settings
+from django.utils.text import Truncator
 from rest_framework import serializers
-from .models import Post, Comment
+from social_media_api.fastpath import compile_values_serializer
+from .models import Post, Comment, PATH_MAX_LENGTH, PATH_SEGMENT_WIDTH
 from .models import Like
 
+# Characters of content shown in list/feed excerpts
+EXCERPT_LENGTH = getattr(settings, 'POST_EXCERPT_LENGTH', 280)
+# Deepest reply level (top-level comments are depth 0); bounded by the path column
+COMMENT_MAX_DEPTH = min(getattr(settings, 'COMMENT_MAX_DEPTH', 20), PATH_MAX_LENGTH // PATH_SEGMENT_WIDTH - 1)
+
+
+def requested(request, param):
+    """Comma-separated names from ?fields= / ?expand=, as a set."""
+    if request is None:
+        return set()
+    return {name.strip() for name in request.query_params.get(param, '').split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    ?fields=a,b keeps only the listed fields; ?expand=x adds the optional
+    fields declared in Meta.expandable_fields (name -> (field class, kwargs)).
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        expand = requested(request, 'expand')
+        for name, (field_class, kwargs) in getattr(self.Meta, 'expandable_fields', {}).items():
+            if name in expand:
+                fields[name] = field_class(**kwargs)
+        only = requested(request, 'fields')
+        if only:
+            fields = {name: field for name, field in fields.items() if name in only or name in expand}
+        return fields
+
 class CommentSerializer(serializers.ModelSerializer):
     author = serializers.StringRelatedField(read_only=True)  # Shows username
 
     class Meta:
         model = Comment
-        fields = ['id', 'post', 'author', 'content', 'created_at', 'updated_at']
-        read_only_fields = ['author', 'created_at', 'updated_at']
+        fields = ['id', 'post', 'parent', 'depth', 'author', 'content', 'created_at', 'updated_at']
+        read_only_fields = ['author', 'depth', 'created_at', 'updated_at']
+
+    def validate(self, attrs):
+        if self.instance is not None:
+            # Paths encode the position in the thread, so comments can't be moved
+            if attrs.get('post', self.instance.post) != self.instance.post or \
+                    attrs.get('parent', self.instance.parent) != self.instance.parent:
+                raise serializers.ValidationError('A comment cannot be moved to another post or thread.')
+            return attrs
+        parent = attrs.get('parent')
+        if parent is not None:
+            if parent.post_id != attrs['post'].pk:
+                raise serializers.ValidationError({'parent': 'Reply must be on the same post as its parent.'})
+            if parent.depth >= COMMENT_MAX_DEPTH:
+                raise serializers.ValidationError({'parent': 'This thread is too deep to reply to.'})
+        return attrs
 
 class PostSerializer(serializers.ModelSerializer):
     author = serializers.StringRelatedField(read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
+    comments = CommentSerializer(source='comment_list', many=True, read_only=True)
+
+    class Meta:
+        model = Post
+        fields = ['id', 'author', 'title', 'content', 'created_at', 'updated_at',
+                  'likes_count', 'comments_count', 'comments']
+        read_only_fields = ['author', 'created_at', 'updated_at', 'likes_count', 'comments_count']
+
+class AuthorSummarySerializer(serializers.Serializer):
+    id = serializers.IntegerField(read_only=True)
+    username = serializers.CharField(read_only=True)
+
+class PostListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Compact post for list and feed pages: an excerpt and counts instead of nested comments."""
+    author = AuthorSummarySerializer(read_only=True)
+    excerpt = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
-        fields = ['id', 'author', 'title', 'content', 'created_at', 'updated_at', 'comments']
-        read_only_fields = ['author', 'created_at', 'updated_at']
+        fields = ['id', 'author', 'title', 'excerpt', 'created_at', 'updated_at',
+                  'likes_count', 'comments_count']
+        expandable_fields = {
+            'content': (serializers.CharField, {'read_only': True}),
+            'comments': (CommentSerializer, {'source': 'comment_list', 'many': True, 'read_only': True}),
+        }
+
+    def get_excerpt(self, obj):
+        return Truncator(obj.content).chars(EXCERPT_LENGTH)
 
 class LikeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Like
         fields = ['id', 'post', 'user', 'created_at']
-        read_only_fields = ['user', 'created_at']
\ No newline at end of file
+        read_only_fields = ['user', 'created_at']
+
+class BulkLikeSerializer(serializers.Serializer):
+    post_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=100)
+
+
+# .values() versions of the list serializers for the fast path (social_media_api.fastpath)
+post_list_values = compile_values_serializer(PostListSerializer, {
+    'author': (['author_id', 'author__username'],
+               lambda r, c: {'id': r['author_id'], 'username': r['author__username']}),
+    'excerpt': (['content'], lambda r, c: Truncator(r['content']).chars(EXCERPT_LENGTH)),
+})
+comment_values = compile_values_serializer(CommentSerializer, {
+    # StringRelatedField renders str(user), which is the username
+    'author': (['author__username'], lambda r, c: r['author__username']),
+})
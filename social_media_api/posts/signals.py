@@ -0,0 +1,34 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import caching
+from .models import Comment, Like, Post
+from .search import get_search_backend
+
+
+# Keep the search index current as posts change
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    get_search_backend().index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    get_search_backend().remove_post(instance.pk)
+
+
+# Drop cached detail responses whenever what they render changes
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    caching.invalidate('post', instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    caching.invalidate('comment', instance.pk)
+    caching.invalidate('post', instance.post_id)
+
+
+@receiver([post_save, post_delete], sender=Like)
+def invalidate_liked_post(sender, instance, **kwargs):
+    caching.invalidate('post', instance.post_id)
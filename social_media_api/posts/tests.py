@@ -1,3 +1,844 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from datetime import datetime, timezone
+from io import StringIO
+from base64 import b64decode
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, close_old_connections, connection
+from django.db.models import F
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from accounts import jwt
+from notifications.models import Notification
+from social_media_api.fastpath import FastJSONRenderer
+from social_media_api.throttling import SlidingWindowRateThrottle
+
+from .models import Post, Comment, Like, FeedEntry, path_segment
+from . import feed, trending
+from .deletion import soft_delete_post
+from .likes import like_posts, unlike_posts
+from .search import get_search_backend
+from .serializers import PostListSerializer
+
+User = get_user_model()
+
+
+class FeedTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.reader = User.objects.create_user(username="reader", password="pass12345")
+        self.reader.following.add(self.author)
+        self.author.refresh_from_db()  # pick up followers_count
+        self.client.force_authenticate(self.author)
+
+    def test_create_post_fans_out_to_followers(self):
+        response = self.client.post("/api/posts/", {"title": "Hello", "content": "World"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(FeedEntry.objects.filter(user=self.reader, post_id=response.data["id"]).exists())
+
+    def test_feed_returns_followed_posts(self):
+        self.client.post("/api/posts/", {"title": "Hello", "content": "World"})
+        self.client.force_authenticate(self.reader)
+        response = self.client.get("/api/feed/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p["title"] for p in response.data["results"]], ["Hello"])
+
+    def test_pull_authors_are_read_on_demand(self):
+        original = feed.FANOUT_MAX_FOLLOWERS
+        feed.FANOUT_MAX_FOLLOWERS = 0
+        try:
+            post = Post.objects.create(author=self.author, title="Big", content="News")
+            self.assertEqual(feed.fan_out_post(post), 0)
+            self.assertIn(post, feed.get_feed_queryset(self.reader))
+        finally:
+            feed.FANOUT_MAX_FOLLOWERS = original
+
+    def test_jwt_posts_by_pull_authors_are_not_fanned_out(self):
+        # The JWT user carries no counters, so the follower count must come from the database
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {jwt.issue_tokens(self.author)['access']}")
+        with mock.patch.object(feed, "FANOUT_MAX_FOLLOWERS", 0):
+            response = self.client.post("/api/posts/", {"title": "Big", "content": "News"})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertFalse(FeedEntry.objects.exists())
+            self.assertIn(response.data["id"], [post.pk for post in feed.get_feed_queryset(self.reader)])
+
+    def test_hybrid_feed_pages_merge_pushed_and_pulled_posts(self):
+        celebrity = User.objects.create_user(username="celebrity", password="pass12345")
+        self.reader.following.add(celebrity)
+        User.objects.filter(pk=celebrity.pk).update(followers_count=100)
+        base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        for i in range(8):
+            author = celebrity if i % 3 == 0 else self.author
+            post = Post.objects.create(author=author, title=f"Post {i}", content="x")
+            Post.objects.filter(pk=post.pk).update(created_at=base.replace(hour=i))
+            # Pushed before the celebrity crossed the threshold: must not show twice
+            FeedEntry.objects.create(user=self.reader, post=post, created_at=base.replace(hour=i))
+
+        self.client.force_authenticate(self.reader)
+        with mock.patch.object(feed, "FANOUT_MAX_FOLLOWERS", 10):
+            for fast in (True, False):
+                with override_settings(API_FAST_LIST_RENDERING=fast):
+                    titles, url, params = [], "/api/feed/", {"page_size": 3}
+                    while url:
+                        page = self.client.get(url, params).json()
+                        titles += [p["title"] for p in page["results"]]
+                        url, params = page["next"], None
+                self.assertEqual(titles, [f"Post {i}" for i in reversed(range(8))])
+
+    def test_merged_feed_counts_and_rejects_unknown_attributes(self):
+        celebrity = User.objects.create_user(username="celebrity", password="pass12345")
+        self.reader.following.add(celebrity)
+        User.objects.filter(pk=celebrity.pk).update(followers_count=100)
+        feed.fan_out_post(Post.objects.create(author=self.author, title="Pushed", content="x"))
+        Post.objects.create(author=celebrity, title="Pulled", content="x")
+        with mock.patch.object(feed, "FANOUT_MAX_FOLLOWERS", 10):
+            merged = feed.get_feed_queryset(self.reader)
+        self.assertIsInstance(merged, feed.MergedFeed)
+        self.assertEqual(merged.count(), 2)
+        self.assertTrue(merged.exists())
+        self.assertFalse(merged.filter(title="Neither").exists())
+        for name in ("model", "query", "aggregate"):
+            with self.assertRaises(AttributeError):
+                getattr(merged, name)
+
+    def test_feed_read_skips_the_follow_table_once_cached(self):
+        feed.get_feed_queryset(self.reader)
+        with CaptureQueriesContext(connection) as ctx:
+            list(feed.get_feed_queryset(self.reader))
+        self.assertFalse([q for q in ctx.captured_queries if "customuser_following" in q["sql"]])
+
+    def test_feed_read_is_an_index_range_scan(self):
+        plan = feed.entries_queryset(self.reader)[:10].explain()
+        self.assertNotIn("TEMP B-TREE", plan.upper())
+
+    def test_feed_cursor_pages_do_not_overlap(self):
+        for i in range(5):
+            post = Post.objects.create(author=self.author, title=f"Post {i}", content="x")
+            feed.fan_out_post(post)
+        self.client.force_authenticate(self.reader)
+        first = self.client.get("/api/feed/", {"page_size": 3})
+        second = self.client.get(first.data["next"])
+        titles = [p["title"] for p in first.data["results"] + second.data["results"]]
+        self.assertEqual(titles, [f"Post {i}" for i in reversed(range(5))])
+        self.assertIsNone(second.data["next"])
+
+    def test_unfollow_purges_feed(self):
+        post = Post.objects.create(author=self.author, title="Hello", content="World")
+        feed.fan_out_post(post)
+        feed.purge_feed(self.reader, self.author)
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+
+
+class PostQueryCountTestCase(APITestCase):
+    """Serializing posts must not issue per-post or per-comment queries."""
+
+    def setUp(self):
+        cache.clear()
+        self.users = [User.objects.create_user(username=f"user{i}", password="pass12345") for i in range(3)]
+        self.client.force_authenticate(self.users[0])
+        for i in range(12):
+            post = Post.objects.create(author=self.users[i % 3], title=f"Post {i}", content="x")
+            for user in self.users:
+                Comment.objects.create(post=post, author=user, content="nice")
+
+    def count_queries(self, url, page_size):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, {"page_size": page_size})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), page_size)
+        return len(ctx.captured_queries)
+
+    def test_post_list_query_count_is_constant(self):
+        self.assertEqual(self.count_queries("/api/posts/", 2), self.count_queries("/api/posts/", 10))
+
+    def test_feed_query_count_is_constant(self):
+        for user in self.users[1:]:
+            self.users[0].following.add(user)
+            for post in user.posts.all():
+                feed.fan_out_post(post)
+        self.count_queries("/api/feed/", 1)  # warm the follow graph cache
+        self.assertEqual(self.count_queries("/api/feed/", 2), self.count_queries("/api/feed/", 8))
+
+    def test_list_is_compact_unless_expanded(self):
+        compact = self.count_queries("/api/posts/", 5)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/posts/", {"page_size": 5, "expand": "comments"})
+        self.assertEqual(len(ctx.captured_queries), compact + 1)
+        self.assertEqual(len(response.data["results"][0]["comments"]), 3)
+
+        post = self.client.get("/api/posts/", {"page_size": 1}).data["results"][0]
+        self.assertNotIn("comments", post)
+        self.assertEqual(set(post["author"]), {"id", "username"})
+        self.assertEqual(post["excerpt"], "x")
+
+    def test_sparse_fields(self):
+        response = self.client.get("/api/posts/", {"fields": "id,likes_count", "expand": "content"})
+        self.assertEqual(set(response.data["results"][0]), {"id", "likes_count", "content"})
+
+    def test_comment_limit_keeps_most_recent(self):
+        post = Post.objects.with_related(comment_limit=2).get(title="Post 0")
+        self.assertEqual(len(post.comment_list), 2)
+
+    def test_cursor_pages_through_timestamp_ties_by_id(self):
+        Post.objects.update(created_at=datetime(2026, 1, 1, tzinfo=timezone.utc))
+        expected = list(Post.objects.order_by('-id').values_list('id', flat=True))
+        for fast in (True, False):
+            with override_settings(API_FAST_LIST_RENDERING=fast):
+                ids, pages, url, params = [], [], "/api/posts/", {"page_size": 5, "fields": "id"}
+                while url:
+                    cursor = parse_qs(urlsplit(url).query).get("cursor")
+                    if cursor:
+                        # A (created_at, id) keyset, never an offset into the tie
+                        self.assertNotIn("o", parse_qs(b64decode(cursor[0]).decode()))
+                    page = self.client.get(url, params).json()
+                    pages.append(page)
+                    ids += [p["id"] for p in page["results"]]
+                    url, params = page["next"], None
+                self.assertEqual(ids, expected)
+                previous = self.client.get(pages[-1]["previous"]).json()
+                self.assertEqual(previous["results"], pages[-2]["results"])
+
+
+class PostCounterTestCase(APITestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.fan = User.objects.create_user(username="fan", password="pass12345")
+        self.post = Post.objects.create(author=self.author, title="Hello", content="World")
+        self.client.force_authenticate(self.fan)
+
+    def test_like_and_unlike_update_counter(self):
+        self.client.post(f"/api/posts/{self.post.pk}/like/")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.client.post(f"/api/posts/{self.post.pk}/unlike/")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+    def test_like_and_unlike_are_idempotent(self):
+        for _ in range(2):
+            response = self.client.post(f"/api/posts/{self.post.pk}/like/")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["likes_count"], 1)
+        self.assertFalse(response.data["changed"])
+        for _ in range(2):
+            response = self.client.post(f"/api/posts/{self.post.pk}/unlike/")
+            self.assertEqual(response.data["likes_count"], 0)
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(self.client.post("/api/posts/999999/like/").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_bulk_like(self):
+        other = Post.objects.create(author=self.author, title="Other", content="x")
+        Like.objects.create(post=self.post, user=self.fan)
+        Post.objects.filter(pk=self.post.pk).update(likes_count=1)
+        response = self.client.post("/api/posts/like/bulk/", {"post_ids": [self.post.pk, other.pk, 999999]},
+                                    format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(r["post"], r["changed"], r["likes_count"]) for r in response.data["results"]],
+            [(self.post.pk, False, 1), (other.pk, True, 1)],
+        )
+
+    def test_comment_create_and_delete_update_counter(self):
+        response = self.client.post("/api/comments/", {"post": self.post.pk, "content": "Nice"})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.client.delete(f"/api/comments/{response.data['id']}/")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_reconcile_repairs_drift(self):
+        Like.objects.create(post=self.post, user=self.fan)
+        Comment.objects.create(post=self.post, author=self.fan, content="Nice")
+        Post.objects.filter(pk=self.post.pk).update(likes_count=7)
+        Post.objects.create(author=self.author, title="In sync", content="x")
+        out = StringIO()
+        call_command("reconcile_post_counters", batch_size=1, stdout=out)
+        self.assertIn("Checked 2 posts, repaired 1.", out.getvalue())
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.likes_count, self.post.comments_count), (1, 1))
+
+
+class SearchTestCase(APITestCase):
+
+    def setUp(self):
+        get_search_backend().reset()
+        self.user = User.objects.create_user(username="user", password="pass12345")
+        self.client.force_authenticate(self.user)
+        self.title_hit = Post.objects.create(author=self.user, title="Django tips", content="Query tuning")
+        self.body_hit = Post.objects.create(author=self.user, title="Notes", content="Some django tuning")
+        Post.objects.create(author=self.user, title="Cooking", content="Pasta")
+
+    def search(self, query):
+        response = self.client.get("/api/posts/", {"search": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [p["id"] for p in response.data["results"]]
+
+    def test_results_are_ranked(self):
+        self.assertEqual(self.search("django"), [self.title_hit.pk, self.body_hit.pk])
+
+    def test_ranked_results_paginate(self):
+        first = self.client.get("/api/posts/", {"search": "django", "page_size": 1})
+        second = self.client.get(first.data["next"])
+        self.assertEqual([first.data["results"][0]["id"], second.data["results"][0]["id"]],
+                         [self.title_hit.pk, self.body_hit.pk])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search("django query"), [self.title_hit.pk])
+        self.assertEqual(self.search("django pasta"), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.search("django")  # builds the index
+        self.title_hit.title = "Flask tips"
+        self.title_hit.content = "Routing"
+        self.title_hit.save()
+        self.body_hit.delete()
+        self.assertEqual(self.search("django"), [])
+        self.assertEqual(self.search("flask"), [self.title_hit.pk])
+
+
+class TransferTestCase(APITestCase):
+
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice", password="pass12345")
+        self.bob = User.objects.create_user(username="bob", password="pass12345")
+        old = datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        self.post = Post.objects.create(author=self.alice, title="Hello", content='Commas, "quotes"\nand lines')
+        Post.objects.filter(pk=self.post.pk).update(created_at=old, updated_at=old)
+        Comment.objects.create(post=self.post, author=self.bob, content="Nice")
+        Like.objects.create(post=self.post, user=self.bob)
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def round_trip(self, fmt):
+        paths = {}
+        for model in ('posts', 'comments', 'likes'):
+            paths[model] = os.path.join(self.tmpdir.name, f'{model}.{fmt}')
+            call_command('export_posts', model=model, format=fmt, output=paths[model], stderr=StringIO())
+        Post.objects.all().delete()
+        for model in ('posts', 'comments', 'likes'):
+            call_command('import_posts', model=model, format=fmt, input=paths[model], batch_size=1, stderr=StringIO())
+
+    def assert_restored(self):
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.content, 'Commas, "quotes"\nand lines')
+        self.assertEqual(post.created_at, datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc))
+        self.assertEqual((post.likes_count, post.comments_count), (1, 1))
+        self.assertEqual(post.comments.get().author, self.bob)
+        self.assertEqual(User.objects.get(pk=self.alice.pk).posts_count, 1)
+
+    def test_ndjson_round_trip(self):
+        self.round_trip('ndjson')
+        self.assert_restored()
+
+    def test_csv_round_trip(self):
+        self.round_trip('csv')
+        self.assert_restored()
+
+    def test_rows_for_unknown_users_are_skipped(self):
+        path = os.path.join(self.tmpdir.name, 'posts.ndjson')
+        with open(path, 'w') as stream:
+            stream.write('{"author": "ghost", "title": "t", "content": "c"}\n')
+            stream.write('{"author": "bob", "title": "t", "content": "c"}\n')
+        stderr = StringIO()
+        call_command('import_posts', input=path, stderr=stderr)
+        self.assertIn("Imported 1 of 2", stderr.getvalue())
+        self.assertTrue(Post.objects.filter(author=self.bob).exists())
+
+    def test_imported_posts_are_fanned_out_and_searchable(self):
+        self.bob.following.add(self.alice)
+        backend = get_search_backend()
+        backend.build()
+        self.round_trip('ndjson')
+        self.assertTrue(FeedEntry.objects.filter(user=self.bob, post_id=self.post.pk).exists())
+        self.assertEqual([post_id for post_id, _ in backend.rank("hello")], [self.post.pk])
+
+    def test_ignore_conflicts_counts_only_new_rows(self):
+        path = os.path.join(self.tmpdir.name, 'likes.ndjson')
+        call_command('export_posts', model='likes', output=path, stderr=StringIO())
+        with open(path, 'a') as stream:
+            stream.write('{"post_id": %d, "user": "alice"}\n' % self.post.pk)
+        stderr = StringIO()
+        call_command('import_posts', model='likes', input=path, ignore_conflicts=True, stderr=stderr)
+        self.assertIn("Imported 1 of 2", stderr.getvalue())
+        self.assertEqual(Like.objects.filter(post=self.post).count(), 2)
+
+    def test_csv_reimport_with_ignore_conflicts_skips_existing_rows(self):
+        for model in ('posts', 'comments', 'likes'):
+            path = os.path.join(self.tmpdir.name, f'{model}.csv')
+            call_command('export_posts', model=model, format='csv', output=path, stderr=StringIO())
+            stderr = StringIO()
+            call_command('import_posts', model=model, format='csv', input=path, ignore_conflicts=True, stderr=stderr)
+            self.assertIn("Imported 0 of 1", stderr.getvalue())
+        self.assertEqual((Post.objects.count(), Comment.objects.count(), Like.objects.count()), (1, 1, 1))
+
+    def test_rows_for_missing_posts_are_skipped(self):
+        missing = self.post.pk + 100
+        for model, row in (('comments', '{"post_id": %d, "author": "bob", "content": "c"}'),
+                           ('likes', '{"post_id": %d, "user": "alice"}')):
+            path = os.path.join(self.tmpdir.name, f'{model}.ndjson')
+            with open(path, 'w') as stream:
+                stream.write(row % missing + '\n')
+                stream.write(row % self.post.pk + '\n')
+            stderr = StringIO()
+            call_command('import_posts', model=model, input=path, stderr=stderr)
+            self.assertIn("Imported 1 of 2", stderr.getvalue())
+        self.assertEqual((Comment.objects.count(), Like.objects.count()), (2, 2))
+
+    def test_imported_replies_get_paths_from_their_parents(self):
+        other = Post.objects.create(author=self.alice, title="Other", content="x")
+        elsewhere = Comment.objects.create(post=other, author=self.bob, content="elsewhere")
+        top = self.post.comments.get()
+        rows = [
+            {"id": 500, "post_id": self.post.pk, "parent_id": top.pk, "path": "bogus", "depth": 9,
+             "author": "alice", "content": "reply"},
+            {"id": 501, "post_id": self.post.pk, "parent_id": 500, "author": "bob", "content": "nested"},
+            {"id": 502, "post_id": self.post.pk, "parent_id": 999, "author": "bob", "content": "orphan"},
+            {"id": 503, "post_id": self.post.pk, "parent_id": elsewhere.pk, "author": "bob", "content": "cross"},
+        ]
+        path = os.path.join(self.tmpdir.name, 'comments.ndjson')
+        with open(path, 'w') as stream:
+            stream.writelines(json.dumps(row) + '\n' for row in rows)
+        call_command('import_posts', model='comments', input=path, batch_size=2, stderr=StringIO())
+
+        comments = {c.pk: c for c in Comment.objects.filter(pk__in=[500, 501, 502, 503])}
+        self.assertEqual((comments[500].path, comments[500].depth), (top.path + path_segment(500), 1))
+        self.assertEqual((comments[501].path, comments[501].depth), (comments[500].path + path_segment(501), 2))
+        for pk in (502, 503):
+            self.assertEqual((comments[pk].parent_id, comments[pk].path, comments[pk].depth),
+                             (None, path_segment(pk), 0))
+
+    def test_export_leaves_out_soft_deleted_posts(self):
+        soft_delete_post(self.post)
+        for model in ('posts', 'comments', 'likes'):
+            stderr = StringIO()
+            call_command('export_posts', model=model, output=os.path.join(self.tmpdir.name, model), stderr=stderr)
+            self.assertIn("Exported 0 ", stderr.getvalue())
+
+
+class DetailCacheTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.fan = User.objects.create_user(username="fan", password="pass12345")
+        self.post = Post.objects.create(author=self.author, title="Hello", content="World")
+        self.client.force_authenticate(self.fan)
+        self.url = f"/api/posts/{self.post.pk}/"
+
+    def test_hot_post_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_conditional_get_returns_304(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_reconciled_counters_invalidate(self):
+        Post.objects.filter(pk=self.post.pk).update(likes_count=7)
+        first = self.client.get(self.url)
+        self.assertEqual(first.json()["likes_count"], 7)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("reconcile_post_counters", stdout=StringIO())
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["likes_count"], 0)
+
+    def test_likes_and_comments_invalidate(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"{self.url}like/")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["likes_count"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/comments/", {"post": self.post.pk, "content": "Nice"})
+        self.assertEqual(self.client.get(self.url).json()["comments_count"], 1)
+
+    def test_comment_edit_invalidates_comment_detail(self):
+        comment = Comment.objects.create(post=self.post, author=self.fan, content="First")
+        url = f"/api/comments/{comment.pk}/"
+        self.assertEqual(self.client.get(url).json()["content"], "First")
+        self.client.patch(url, {"content": "Edited"})
+        self.assertEqual(self.client.get(url).json()["content"], "Edited")
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {'likes': '3/min', 'comments': '2/min', 'follows': '60/min'},
+})
+class ThrottleTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.fan = User.objects.create_user(username="fan", password="pass12345")
+        self.posts = [Post.objects.create(author=self.author, title=f"Post {i}", content="x") for i in range(5)]
+        self.client.force_authenticate(self.fan)
+
+    def test_like_storm_is_cut_off_before_the_database(self):
+        for i in range(3):
+            response = self.client.post(f"/api/posts/{self.posts[i].pk}/like/")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response["X-RateLimit-Remaining"], str(2 - i))
+        with self.assertNumQueries(0):
+            response = self.client.post(f"/api/posts/{self.posts[3].pk}/like/")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["X-RateLimit-Limit"], "3")
+        self.assertIn("Retry-After", response)
+
+    def test_limits_are_per_action_and_per_user(self):
+        for post in self.posts[:3]:
+            self.client.post(f"/api/posts/{post.pk}/like/")
+        # Comments have their own budget, reads are not limited
+        self.assertEqual(self.client.post("/api/comments/", {"post": self.posts[0].pk, "content": "hi"}).status_code,
+                         status.HTTP_201_CREATED)
+        self.assertNotIn("X-RateLimit-Limit", self.client.get("/api/posts/"))
+        self.client.force_authenticate(self.author)
+        self.assertEqual(self.client.post(f"/api/posts/{self.posts[4].pk}/like/").status_code, status.HTTP_200_OK)
+
+    def test_previous_window_is_weighted_by_overlap(self):
+        throttle = SlidingWindowRateThrottle()
+        throttle.num_requests, throttle.duration = 10, 60
+        throttle.previous, throttle.current, throttle.elapsed = 8, 3, 15
+        self.assertEqual(throttle.estimate(), 9.0)
+        self.assertEqual(throttle.wait(), 0.0)
+        throttle.current = 4
+        self.assertAlmostEqual(throttle.wait(), 45 - 5 * 60 / 8)
+
+
+class ConcurrentLikeTestCase(TransactionTestCase):
+    """Many threads liking and unliking one post must leave the counter exact."""
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.fans = [User.objects.create_user(username=f"fan{i}", password="pass12345") for i in range(8)]
+        self.post = Post.objects.create(author=self.author, title="Hot", content="x")
+
+    def hammer(self, func, user_ids, repeats=5):
+        def worker(user_id):
+            try:
+                for _ in range(repeats):
+                    while True:
+                        try:
+                            func(user_id, [self.post.pk])
+                            break
+                        except OperationalError:
+                            # SQLite's shared in-memory test DB refuses concurrent writers
+                            # instead of waiting; the failed call was rolled back, so retry
+                            time.sleep(0.001)
+            finally:
+                close_old_connections()
+        with ThreadPoolExecutor(max_workers=len(user_ids)) as pool:
+            list(pool.map(worker, user_ids))
+
+    def test_concurrent_likes_keep_counter_exact(self):
+        user_ids = [fan.pk for fan in self.fans]
+        self.hammer(like_posts, user_ids)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, len(self.fans))
+        self.assertEqual(Like.objects.filter(post=self.post).count(), len(self.fans))
+
+        self.hammer(unlike_posts, user_ids[:5])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 3)
+        self.assertEqual(Like.objects.filter(post=self.post).count(), 3)
+
+
+class FastListRenderingTestCase(APITestCase):
+    """The .values() + orjson fast path must render exactly what the serializers do."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="autor_ñ", password="pass12345")
+        self.reader = User.objects.create_user(username="reader", password="pass12345")
+        self.reader.following.add(self.author)
+        for i in range(6):
+            post = Post.objects.create(author=self.author, title=f"Título {i} \u2028", content="línea\n" * (60 + i))
+            feed.fan_out_post(post)
+            Comment.objects.create(post=post, author=self.reader, content='"quoted" \u2029 😀')
+        self.client.force_authenticate(self.reader)
+
+    def assert_identical(self, url, params=None):
+        fast = self.client.get(url, params)
+        # Baseline: the serializers, encoded by DRF's own JSONRenderer rather than orjson
+        with override_settings(API_FAST_LIST_RENDERING=False), \
+                mock.patch.object(FastJSONRenderer, "render", JSONRenderer.render):
+            slow = self.client.get(url, params)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_post_comment_and_feed_lists_are_byte_identical(self):
+        first = self.assert_identical("/api/posts/", {"page_size": 4})
+        self.assert_identical(first.json()["next"])
+        self.assert_identical("/api/comments/", {"page_size": 4})
+        self.assert_identical("/api/feed/", {"page_size": 4})
+
+    def test_fast_path_skips_the_serializer(self):
+        with mock.patch.object(PostListSerializer, "to_representation", side_effect=AssertionError):
+            self.assertEqual(self.client.get("/api/posts/").status_code, status.HTTP_200_OK)
+
+    def test_unsupported_params_use_the_serializers(self):
+        response = self.assert_identical("/api/posts/", {"expand": "comments"})
+        self.assertIn("comments", response.json()["results"][0])
+        self.assert_identical("/api/posts/", {"fields": "id"})
+
+
+class CommentThreadTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="threader", password="pass12345")
+        self.post = Post.objects.create(author=self.user, title="Thread", content="Body")
+        self.other_post = Post.objects.create(author=self.user, title="Other", content="Body")
+        self.client.force_authenticate(self.user)
+
+    def reply(self, content, parent=None, post=None):
+        response = self.client.post("/api/comments/", {
+            "post": (post or self.post).pk, "parent": parent and parent["id"], "content": content,
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.content)
+        return response.json()
+
+    def test_replies_get_materialized_paths(self):
+        root = self.reply("root")
+        child = self.reply("child", root)
+        grandchild = self.reply("grandchild", child)
+        self.assertEqual((root["depth"], child["depth"], grandchild["depth"]), (0, 1, 2))
+        comment = Comment.objects.get(pk=grandchild["id"])
+        self.assertEqual(comment.path, "".join(f"{pk:010d}" for pk in (root["id"], child["id"], grandchild["id"])))
+
+    def test_thread_is_depth_first_in_one_query(self):
+        first = self.reply("first")
+        second = self.reply("second")
+        first_child = self.reply("first child", first)
+        self.reply("first grandchild", first_child)
+        self.reply("second child", second)
+        self.reply("elsewhere", post=self.other_post)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/comments/thread/", {"post": self.post.pk})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [c["content"] for c in response.json()["results"]],
+            ["first", "first child", "first grandchild", "second", "second child"],
+        )
+        self.assertEqual(len([q for q in queries.captured_queries if "posts_comment" in q["sql"]]), 1)
+
+        shallow = self.client.get("/api/comments/thread/", {"post": self.post.pk, "depth": 0}).json()
+        self.assertEqual([c["content"] for c in shallow["results"]], ["first", "second"])
+        self.assertEqual(self.client.get("/api/comments/thread/").status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_load_more_replies_follows_the_cursor(self):
+        root = self.reply("root")
+        for i in range(5):
+            self.reply(f"reply {i}", root)
+        self.reply("not a reply")
+
+        seen, url, params = [], f"/api/comments/{root['id']}/replies/", {"page_size": 2}
+        while url:
+            page = self.client.get(url, params).json()
+            seen += [c["content"] for c in page["results"]]
+            url, params = page["next"], None
+        self.assertEqual(seen, [f"reply {i}" for i in range(5)])
+
+    def test_parent_must_be_on_the_same_post_and_stay_put(self):
+        root = self.reply("root")
+        response = self.client.post("/api/comments/", {
+            "post": self.other_post.pk, "parent": root["id"], "content": "misplaced",
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        child = self.reply("child", root)
+        response = self.client.patch(f"/api/comments/{child['id']}/", {"parent": None}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deleting_a_comment_removes_its_replies_from_the_count(self):
+        root = self.reply("root")
+        child = self.reply("child", root)
+        self.reply("grandchild", child)
+        self.reply("sibling")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 4)
+
+        self.assertEqual(self.client.delete(f"/api/comments/{root['id']}/").status_code, status.HTTP_204_NO_CONTENT)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(Comment.objects.filter(post=self.post).count(), 1)
+
+
+class TrendingTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="trendsetter", password="pass12345")
+        self.fans = [User.objects.create_user(username=f"fan{i}", password="pass12345") for i in range(3)]
+        self.quiet = Post.objects.create(author=self.author, title="Quiet", content="Body")
+        self.liked = Post.objects.create(author=self.author, title="Liked", content="Body")
+        self.discussed = Post.objects.create(author=self.author, title="Discussed", content="Body")
+        self.client.force_authenticate(self.fans[0])
+
+    def titles(self, **params):
+        response = self.client.get("/api/posts/trending/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [post["title"] for post in response.json()["results"]]
+
+    def score(self, post):
+        post.refresh_from_db()
+        return post.trending_score
+
+    def test_likes_and_comments_rank_posts(self):
+        like_posts(self.fans[0].pk, [self.liked.pk])
+        self.client.post("/api/comments/", {"post": self.discussed.pk, "content": "Hi"}, format="json")
+        self.assertEqual(self.titles(), ["Discussed", "Liked"])
+
+        for fan in self.fans[1:]:
+            like_posts(fan.pk, [self.liked.pk])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.titles(limit=1), ["Liked"])
+        self.assertFalse([q for q in queries.captured_queries if "posts_like" in q["sql"]])
+        for limit in (0, -1, "x"):
+            response = self.client.get("/api/posts/trending/", {"limit": limit})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        fast = self.client.get("/api/posts/trending/")
+        with override_settings(API_FAST_LIST_RENDERING=False):
+            self.assertEqual(fast.content, self.client.get("/api/posts/trending/").content)
+
+    def test_unlike_and_deleting_comments_take_the_score_back(self):
+        like_posts(self.fans[1].pk, [self.liked.pk])
+        unlike_posts(self.fans[1].pk, [self.liked.pk])
+        self.assertAlmostEqual(self.score(self.liked), 0)
+
+        root = self.client.post("/api/comments/", {"post": self.discussed.pk, "content": "Root"}, format="json").json()
+        self.client.post("/api/comments/", {"post": self.discussed.pk, "parent": root["id"], "content": "Re"},
+                         format="json")
+        self.client.delete(f"/api/comments/{root['id']}/")
+        self.assertAlmostEqual(self.score(self.discussed), 0)
+        self.assertEqual(self.titles(), [])
+
+    def test_rebucket_decays_old_scores(self):
+        like_posts(self.fans[0].pk, [self.liked.pk])
+        like_posts(self.fans[0].pk, [self.discussed.pk])
+        fresh = self.score(self.liked)
+        # One half-life ago for one post, far in the past for the other
+        buckets = round(trending.HALF_LIFE / trending.BUCKET_SECONDS)
+        Post.objects.filter(pk=self.liked.pk).update(trending_epoch=F("trending_epoch") - buckets)
+        Post.objects.filter(pk=self.discussed.pk).update(trending_epoch=F("trending_epoch") - 100 * buckets)
+
+        call_command("rebucket_trending", stdout=StringIO())
+        self.assertAlmostEqual(self.score(self.liked), fresh / 2)
+        self.assertEqual(self.score(self.discussed), 0)
+        self.assertEqual(self.titles(), ["Liked"])
+
+    def test_rebuild_matches_incremental_scores(self):
+        for fan in self.fans:
+            like_posts(fan.pk, [self.liked.pk, self.discussed.pk])
+        self.client.post("/api/comments/", {"post": self.discussed.pk, "content": "Hi"}, format="json")
+        expected = {post.pk: self.score(post) for post in (self.liked, self.discussed)}
+        Post.objects.update(trending_score=123.0)
+
+        call_command("rebucket_trending", "--rebuild", stdout=StringIO())
+        for post in (self.liked, self.discussed):
+            self.assertAlmostEqual(self.score(post), expected[post.pk], places=6)
+        self.assertEqual(self.score(self.quiet), 0)
+
+
+class SoftDeleteTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="writer", password="pass12345")
+        self.reader = User.objects.create_user(username="reader", password="pass12345")
+        self.reader.following.add(self.author)
+        self.client.force_authenticate(self.author)
+        self.post = self.client.post("/api/posts/", {"title": "Doomed", "content": "Body"}).data
+        self.keeper = Post.objects.create(author=self.author, title="Kept", content="Body")
+        feed.fan_out_post(self.keeper)
+
+        root = Comment.objects.create(post_id=self.post["id"], author=self.reader, content="Root")
+        for i in range(3):
+            Comment.objects.create(post_id=self.post["id"], parent=root, author=self.reader, content=f"Re {i}")
+        self.kept_comment = Comment.objects.create(post=self.keeper, author=self.reader, content="Stays")
+        like_posts(self.reader.pk, [self.post["id"], self.keeper.pk])
+        Notification.objects.create(recipient=self.author, actor=self.reader, verb="liked your post",
+                                    target=Post.all_objects.get(pk=self.post["id"]))
+        Notification.objects.create(recipient=self.author, actor=self.reader, verb="replied", target=root)
+        Notification.objects.create(recipient=self.author, actor=self.reader, verb="liked your post",
+                                    target=self.keeper)
+
+    def test_delete_hides_the_post_at_once(self):
+        self.assertEqual(self.client.get(f"/api/posts/{self.post['id']}/").status_code, status.HTTP_200_OK)
+        response = self.client.delete(f"/api/posts/{self.post['id']}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertEqual(self.client.get(f"/api/posts/{self.post['id']}/").status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual([p["title"] for p in self.client.get("/api/posts/").json()["results"]], ["Kept"])
+        self.assertEqual(self.client.get("/api/comments/thread/", {"post": self.post["id"]}).json()["results"], [])
+        self.assertEqual([c["content"] for c in self.client.get("/api/comments/").json()["results"]], ["Stays"])
+        self.assertEqual(self.client.post(f"/api/posts/{self.post['id']}/like/").status_code,
+                         status.HTTP_404_NOT_FOUND)
+        self.client.force_authenticate(self.reader)
+        self.assertEqual([p["title"] for p in self.client.get("/api/feed/").json()["results"]], ["Kept"])
+
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.posts_count, 0)
+        # Children are left for the reaper
+        self.assertEqual(Comment.objects.filter(post_id=self.post["id"]).count(), 4)
+        self.assertEqual(self.client.delete(f"/api/posts/{self.post['id']}/").status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+    def test_cached_comment_detail_is_hidden_with_its_post(self):
+        comment = Comment.objects.filter(post_id=self.post["id"]).first()
+        self.assertEqual(self.client.get(f"/api/comments/{comment.pk}/").status_code, status.HTTP_200_OK)
+        self.client.delete(f"/api/posts/{self.post['id']}/")
+        self.assertEqual(self.client.get(f"/api/comments/{comment.pk}/").status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_reaper_removes_children_in_batches(self):
+        self.client.delete(f"/api/posts/{self.post['id']}/")
+        out = StringIO()
+        call_command("reap_deleted_posts", "--batch-size", "2", stdout=out)
+        self.assertIn("Reaped 1 posts (4 comments, 1 feed entries, 1 likes, 2 notifications)", out.getvalue())
+
+        self.assertFalse(Post.all_objects.filter(pk=self.post["id"]).exists())
+        self.assertFalse(Comment.objects.filter(post_id=self.post["id"]).exists())
+        self.assertFalse(Like.objects.filter(post_id=self.post["id"]).exists())
+        self.assertEqual(list(Notification.objects.values_list("object_id", flat=True)), [self.keeper.pk])
+        self.assertEqual(Comment.objects.get().content, "Stays")
+        self.assertEqual(Like.objects.get().post_id, self.keeper.pk)
+
+    def test_orphaned_notifications_are_swept(self):
+        Post.all_objects.filter(pk=self.post["id"]).delete()
+        out = StringIO()
+        call_command("reap_deleted_posts", "--orphans", stdout=out)
+        self.assertIn("2 orphaned notifications", out.getvalue())
+        self.assertEqual(list(Notification.objects.values_list("object_id", flat=True)), [self.keeper.pk])
@@ -0,0 +1,62 @@
+"""
+Threaded comment queries.
+
+Every query here is a single range scan over the (post, path) index that
+returns rows in depth-first order. Clients rebuild the tree from each
+comment's `parent` and `depth`. Pages are cut with PathCursorPagination,
+so "load more replies" just continues the same range.
+"""
+from .models import Comment, next_path, path_segment
+
+
+def thread_queryset(post_id, max_depth=None):
+    """A post's comments as threads: top-level comments, each followed by its replies."""
+    queryset = Comment.objects.filter(post_id=post_id, post__deleted_at__isnull=True).exclude(path='')
+    if max_depth is not None:
+        queryset = queryset.filter(depth__lte=max_depth)
+    return queryset.select_related('author').order_by('path')
+
+
+def replies_queryset(comment, max_depth=None):
+    """Every reply under `comment`, at any depth below it, in thread order."""
+    queryset = Comment.objects.filter(
+        post_id=comment.post_id, path__gt=comment.path, path__lt=next_path(comment.path),
+    )
+    if max_depth is not None:
+        queryset = queryset.filter(depth__lte=comment.depth + max_depth)
+    return queryset.select_related('author').order_by('path')
+
+
+def assign_paths(comments):
+    """
+    Set path and depth on saved comments from their parents (not saved here).
+    Parents must be in the database or come earlier in `comments`; comments
+    whose parent has no path become top-level.
+    """
+    parents = {
+        c.pk: c for c in Comment._base_manager.filter(
+            pk__in={c.parent_id for c in comments if c.parent_id is not None},
+        ).only('id', 'path', 'depth')
+    }
+    for comment in comments:
+        if comment.pk is None:
+            continue
+        parent = parents.get(comment.parent_id)
+        if parent is None or not parent.path:
+            comment.parent_id, comment.path, comment.depth = None, path_segment(comment.pk), 0
+        else:
+            comment.path, comment.depth = parent.path + path_segment(comment.pk), parent.depth + 1
+        parents[comment.pk] = comment
+
+
+def assign_missing_paths(batch_size=1000):
+    """Give comments without a path (bulk-created or imported) one as top-level comments."""
+    last_id = 0
+    while True:
+        batch = list(Comment.objects.filter(pk__gt=last_id, path='').order_by('pk').only('id')[:batch_size])
+        if not batch:
+            return
+        for comment in batch:
+            comment.path, comment.depth = path_segment(comment.pk), 0
+        Comment.objects.bulk_update(batch, ['path', 'depth'])
+        last_id = batch[-1].pk
@@ -0,0 +1,221 @@
+"""
+Streaming import/export of posts, comments and likes, used by the
+import_posts / export_posts management commands.
+
+Each model has a flat row layout (SPECS). Users are referenced by username
+so dumps can move between databases, and posts and comments keep their ids
+so comments and likes still point at the right post. Rows are read and
+written one at a time: exports stream from a server-side cursor, and
+imports insert fixed-size chunks with bulk_create, so memory stays flat
+however large the file is. bulk_create skips the view and signals that
+fan a new post out and index it for search, so imports do both per chunk.
+"""
+import csv
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .feed import fan_out_posts
+from .models import Comment, Like, Post
+from .search import get_search_backend
+from .threads import assign_missing_paths, assign_paths
+
+FORMATS = ('ndjson', 'csv')
+
+# model name -> (model, exported columns, user foreign key field)
+SPECS = {
+    'posts': (Post, ['id', 'author', 'title', 'content', 'created_at', 'updated_at'], 'author'),
+    'comments': (Comment, ['id', 'post_id', 'parent_id', 'path', 'depth', 'author', 'content',
+                           'created_at', 'updated_at'], 'author'),
+    'likes': (Like, ['post_id', 'user', 'created_at'], 'user'),
+}
+DATETIME_COLUMNS = {'created_at', 'updated_at'}
+TIMESTAMP_FIELDS = {model: sorted(DATETIME_COLUMNS.intersection(columns)) for model, columns, _ in SPECS.values()}
+# CSV hands every value back as a string; these go back to ints before ids are compared
+INTEGER_COLUMNS = {'id', 'post_id', 'parent_id', 'depth'}
+
+
+def export_rows(name, chunk_size):
+    """Yield one dict per row, streamed with iterator(chunk_size=...)."""
+    model, columns, user_field = SPECS[name]
+    lookups = [f'{user_field}__username' if column == user_field else column for column in columns]
+    queryset = model.objects.all()
+    if model is not Post:
+        # Post.objects skips soft-deleted posts; leave out what hangs off them too
+        queryset = queryset.filter(post__deleted_at__isnull=True)
+    queryset = queryset.order_by('pk').values_list(*lookups)
+    for values in queryset.iterator(chunk_size=chunk_size):
+        row = dict(zip(columns, values))
+        for column in DATETIME_COLUMNS.intersection(row):
+            row[column] = row[column].isoformat()
+        yield row
+
+
+def write_rows(rows, stream, fmt, columns):
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in rows:
+            stream.write(json.dumps(row, ensure_ascii=False))
+            stream.write('\n')
+            count += 1
+    return count
+
+
+def read_rows(stream, fmt):
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+class UserResolver:
+    """Username -> id, loaded lazily and remembered for the rest of the import."""
+
+    def __init__(self):
+        self.ids = {}
+
+    def resolve(self, usernames):
+        missing = set(usernames) - self.ids.keys()
+        if missing:
+            found = dict(get_user_model().objects.filter(username__in=missing).values_list('username', 'pk'))
+            for username in missing:
+                self.ids[username] = found.get(username)
+        return self.ids
+
+
+def build_objects(name, rows, users):
+    """
+    Turn a chunk of rows into unsaved instances. Rows with unknown users,
+    and comments or likes on posts that aren't in the database, are dropped.
+    """
+    model, columns, user_field = SPECS[name]
+    ids = users.resolve(row[user_field] for row in rows)
+    now = timezone.now()
+    objects = []
+    for row in rows:
+        user_id = ids.get(row[user_field])
+        if user_id is None:
+            continue
+        values = {column: row[column] for column in columns if column != user_field and row.get(column) not in (None, '')}
+        for column in INTEGER_COLUMNS.intersection(values):
+            values[column] = int(values[column])
+        for column in DATETIME_COLUMNS.intersection(columns):
+            # Rows without timestamps get "now", as auto_now/auto_now_add would have given them
+            values[column] = parse_datetime(values[column]) if column in values else now
+        values[f'{user_field}_id'] = user_id
+        objects.append(model(**values))
+    if model is not Post:
+        # The post FK would fail the whole chunk; soft-deleted posts still count as present
+        post_ids = set(Post._base_manager.filter(
+            pk__in={obj.post_id for obj in objects},
+        ).values_list('pk', flat=True))
+        objects = [obj for obj in objects if obj.post_id in post_ids]
+    if model is Comment:
+        flatten_orphan_replies(objects)
+    return objects
+
+
+def flatten_orphan_replies(comments):
+    """
+    Replies whose parent is neither in the database nor earlier in the dump,
+    or sits on another post, become top-level comments. The parent FK would
+    otherwise fail the whole chunk.
+    """
+    post_of = dict(Comment._base_manager.filter(
+        pk__in={c.parent_id for c in comments if c.parent_id is not None},
+    ).values_list('pk', 'post_id'))
+    for comment in comments:
+        if comment.parent_id is not None and post_of.get(comment.parent_id) != comment.post_id:
+            comment.parent_id = None
+        if comment.pk is not None:
+            post_of.setdefault(comment.pk, comment.post_id)
+
+
+def import_rows(name, rows, batch_size, ignore_conflicts=False):
+    """Insert rows in chunks of batch_size; yields (read, inserted) after each chunk."""
+    model = SPECS[name][0]
+    users = UserResolver()
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= batch_size:
+            yield len(chunk), insert_chunk(model, build_objects(name, chunk, users), ignore_conflicts)
+            chunk = []
+    if chunk:
+        yield len(chunk), insert_chunk(model, build_objects(name, chunk, users), ignore_conflicts)
+    reset_sequence(model)
+    if model is Comment:
+        # Only left over where the database can't return ids from bulk_create
+        assign_missing_paths()
+
+
+def drop_existing(model, objects):
+    """Objects whose id (or post/user pair for likes) isn't in the table or earlier in the chunk."""
+    if model is Like:
+        def key(obj):
+            return obj.post_id, obj.user_id
+        existing = set(Like.objects.filter(
+            post_id__in={obj.post_id for obj in objects}, user_id__in={obj.user_id for obj in objects},
+        ).values_list('post_id', 'user_id'))
+    else:
+        def key(obj):
+            return obj.pk
+        existing = set(model._base_manager.filter(
+            pk__in=[obj.pk for obj in objects if obj.pk is not None],
+        ).values_list('pk', flat=True))
+    kept = []
+    for obj in objects:
+        if obj.pk is None and model is not Like:
+            kept.append(obj)  # gets a fresh id, so it can't conflict
+        elif key(obj) not in existing:
+            existing.add(key(obj))
+            kept.append(obj)
+    return kept
+
+
+def insert_chunk(model, objects, ignore_conflicts):
+    """Insert a chunk; returns how many rows were actually written."""
+    with transaction.atomic():
+        if ignore_conflicts:
+            # bulk_create(ignore_conflicts=True) can't say which rows it skipped
+            # (nor set new ids), so leave the existing ones out up front
+            objects = drop_existing(model, objects)
+        # auto_now/auto_now_add stamp "now" on insert, so the dump's timestamps
+        # are written back afterwards along with the thread paths
+        timestamps = [{column: getattr(obj, column) for column in TIMESTAMP_FIELDS[model]} for obj in objects]
+        model.objects.bulk_create(objects)
+        for obj, values in zip(objects, timestamps):
+            for column, value in values.items():
+                setattr(obj, column, value)
+        fields = list(TIMESTAMP_FIELDS[model])
+        if model is Comment:
+            assign_paths(objects)
+            fields += ['parent', 'path', 'depth']
+        model._base_manager.bulk_update([obj for obj in objects if obj.pk is not None], fields, batch_size=1000)
+    if model is Post:
+        fan_out_posts(objects)
+        backend = get_search_backend()
+        for post in objects:
+            backend.index_post(post)
+    return len(objects)
+
+
+def reset_sequence(model):
+    # Explicit ids leave PostgreSQL's sequence behind; move it past the highest imported id
+    statements = connection.ops.sequence_reset_sql(no_style(), [model])
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
@@ -0,0 +1,71 @@
+"""
+Trending posts.
+
+Every like or comment adds `weight * 2 ** (age / half_life)` to the post's
+trending_score, where age is measured from the start of the current bucket
+(TRENDING_BUCKET_SECONDS wide). Newer events count more and older ones
+never need to be revisited, so the score is kept up to date with one
+UPDATE per event. Ordering by the stored value is ordering by the
+time-decayed score. Each post also records the bucket its score is
+relative to (trending_epoch). A score from an older bucket is scaled down
+the next time the post is touched. The rebucket_trending job rescales
+the rest and clears scores that have decayed to nothing.
+
+Reads are one scan of the (trending_score, id) index limited to the top
+N. They never aggregate Like or Comment rows.
+"""
+from django.conf import settings
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Greatest, Power
+from django.utils import timezone
+
+from .models import Post
+
+HALF_LIFE = getattr(settings, 'TRENDING_HALF_LIFE', 6 * 3600)
+BUCKET_SECONDS = getattr(settings, 'TRENDING_BUCKET_SECONDS', 3600)
+LIKE_WEIGHT = getattr(settings, 'TRENDING_LIKE_WEIGHT', 1.0)
+COMMENT_WEIGHT = getattr(settings, 'TRENDING_COMMENT_WEIGHT', 2.0)
+# Scores below this (relative to the current bucket) drop out of trending
+MIN_SCORE = getattr(settings, 'TRENDING_MIN_SCORE', 0.01)
+TRENDING_SIZE = getattr(settings, 'TRENDING_SIZE', 50)
+
+# Decay across one bucket, as a power of two
+BUCKET_RATIO = BUCKET_SECONDS / HALF_LIFE
+
+
+def current_epoch(now=None):
+    return int((now or timezone.now()).timestamp() // BUCKET_SECONDS)
+
+
+def contribution(weight, when, epoch):
+    """What an event at `when` adds to a score relative to `epoch`."""
+    return weight * 2 ** ((when.timestamp() - epoch * BUCKET_SECONDS) / HALF_LIFE)
+
+
+def rescaled_score(epoch):
+    """trending_score carried over to `epoch` (unchanged if it is already there)."""
+    return Case(
+        When(trending_epoch=epoch, then=F('trending_score')),
+        default=F('trending_score') * Power(Value(2.0), (F('trending_epoch') - epoch) * Value(BUCKET_RATIO)),
+        output_field=FloatField(),
+    )
+
+
+def record(post_ids, weight, times=None):
+    """
+    Add one event per entry of `times` (default: a single event now) to
+    the posts' scores. A negative weight takes the events back.
+    """
+    now = timezone.now()
+    epoch = current_epoch(now)
+    delta = sum(contribution(weight, when, epoch) for when in (times if times is not None else [now]))
+    Post.objects.filter(pk__in=post_ids).update(
+        trending_score=Greatest(rescaled_score(epoch) + Value(delta), Value(0.0)),
+        trending_epoch=epoch,
+    )
+
+
+def trending_queryset():
+    # Slice to at most TRENDING_SIZE rows; the index keeps that a short scan
+    return Post.objects.filter(trending_score__gte=MIN_SCORE).order_by('-trending_score', '-id')
+
@@ -8,7 +8,7 @@ router.register(r'comments', CommentViewSet, basename='comment')
 
 urlpatterns = [
     path('', include(router.urls)),
-    path('feed/', FeedView.as_view(), name='feed'),  # direct /feed/ endpoint
+    path('feed/', FeedView.as_view({'get': 'feed'}), name='feed'),  # direct /feed/ endpoint
     path('posts/<int:pk>/like/', PostViewSet.as_view({'post': 'like'}), name='like-post'),
     path('posts/<int:pk>/unlike/', PostViewSet.as_view({'post': 'unlike'}), name='unlike-post'),
 ]
@@ -1,10 +1,60 @@
-from rest_framework import viewsets, permissions, filters, status, generics
+from rest_framework import viewsets, permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Post, Comment, Like
-from .serializers import PostSerializer, CommentSerializer
-from notifications.models import Notification
-from django.contrib.contenttypes.models import ContentType
+from .models import Post, Comment
+from .serializers import (
+    PostSerializer, PostListSerializer, CommentSerializer, BulkLikeSerializer, requested,
+    post_list_values, comment_values,
+)
+from .caching import CachedRetrieveMixin
+from .deletion import soft_delete_post
+from .feed import fan_out_post, get_feed_queryset
+from .likes import like_posts, unlike_posts
+from .pagination import (
+    CreatedAtCursorPagination, FeedCursorPagination, PathCursorPagination, RankedCursorPagination,
+)
+from .search import FullTextSearchFilter
+from .threads import replies_queryset, thread_queryset
+from .trending import COMMENT_WEIGHT, TRENDING_SIZE, record as record_trending, trending_queryset
+from notifications.dispatch import notify
+from social_media_api.fastpath import FastJSONRenderer, FastListMixin, fast_path_enabled, paginated_values
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.http import Http404
+
+User = get_user_model()
+
+# Cap on nested comments when list and feed responses ?expand=comments (None = all)
+COMMENT_PREVIEW_LIMIT = getattr(settings, 'POST_COMMENT_PREVIEW_LIMIT', None)
+
+def list_queryset(queryset, request):
+    # Comments are only loaded when the compact list is asked to ?expand=comments
+    if 'comments' in requested(request, 'expand'):
+        return queryset.with_related(COMMENT_PREVIEW_LIMIT)
+    return queryset.select_related('author')
+
+def compact_fast_path(request):
+    # ?fields=, ?expand= and ranked search go through the regular serializers
+    return not {'fields', 'expand', 'search'} & set(request.query_params) and fast_path_enabled(request)
+
+def int_param(request, name, required=False):
+    value = request.query_params.get(name)
+    if value is None:
+        if required:
+            raise ValidationError({name: 'This query parameter is required.'})
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: 'Expected an integer.'})
+
+def like_payload(result, liked):
+    return {'post': result.post_id, 'liked': liked, 'changed': result.changed, 'likes_count': result.likes_count}
 
 # Custom permission
 class IsAuthorOrReadOnly(permissions.BasePermission):
@@ -17,65 +67,159 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
         return obj.author == request.user
 
 # Post CRUD
-class PostViewSet(viewsets.ModelViewSet):
-    queryset = Post.objects.all().order_by('-created_at')
+class PostViewSet(CachedRetrieveMixin, FastListMixin, viewsets.ModelViewSet):
+    cache_label = 'post'
+    fast_serializer = post_list_values
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    lookup_value_regex = r'[0-9]+'
+    queryset = Post.objects.all().order_by('-created_at', '-id')
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated, IsAuthorOrReadOnly]
+    pagination_class = RankedCursorPagination
 
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['title', 'content']
+    # ?search= is ranked full-text search over title and content
+    filter_backends = [FullTextSearchFilter]
+    throttle_scopes = {'like': 'likes', 'unlike': 'likes', 'like_many': 'likes'}
 
+    def get_queryset(self):
+        if self.action == 'list':
+            return list_queryset(super().get_queryset(), self.request)
+        return super().get_queryset().with_related()
+
+    def fast_path_supported(self, request):
+        return compact_fast_path(request)
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return PostListSerializer
+        return super().get_serializer_class()
+
+    def get_last_modified(self, instance):
+        # Detail responses embed the comments, so their edits count too
+        return max([instance.updated_at] + [comment.updated_at for comment in instance.comment_list])
+
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        post = serializer.save(author=self.request.user)
+        User.objects.filter(pk=post.author_id).update(posts_count=F('posts_count') + 1)
+        fan_out_post(post)
+
+    def perform_destroy(self, instance):
+        # Hidden now; comments, likes and notifications go in the reap_deleted_posts job
+        soft_delete_post(instance)
 
-    # Like a post
+    # Like a post (idempotent; returns the new count)
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def like(self, request, pk=None):
-        post = generics.get_object_or_404(Post, pk=pk)
-        like, created = Like.objects.get_or_create(user=request.user, post=post)
-        if not created:
-            return Response({'detail': 'Already liked'}, status=status.HTTP_400_BAD_REQUEST)
-
-        if post.author != request.user:
-            Notification.objects.create(
-                recipient=post.author,
-                actor=request.user,
-                verb='liked your post',
-                content_type=ContentType.objects.get_for_model(post),
-                object_id=post.id
-            )
-        return Response({'status': 'Post liked'})
-
-    # Unlike a post
+        results = like_posts(request.user.pk, [pk])
+        if not results:
+            raise Http404
+        self.notify_likes(results)
+        return Response(like_payload(results[0], liked=True))
+
+    # Unlike a post (idempotent; returns the new count)
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def unlike(self, request, pk=None):
-        post = generics.get_object_or_404(Post, pk=pk)
-        try:
-            like = Like.objects.get(user=request.user, post=post)
-            like.delete()
-            return Response({'status': 'Post unliked'})
-        except Like.DoesNotExist:
-            return Response({'detail': 'You have not liked this post'}, status=status.HTTP_400_BAD_REQUEST)
+        results = unlike_posts(request.user.pk, [pk])
+        if not results:
+            raise Http404
+        return Response(like_payload(results[0], liked=False))
+
+    # Like several posts in one call
+    @action(detail=False, methods=['post'], url_path='like/bulk', permission_classes=[permissions.IsAuthenticated])
+    def like_many(self, request):
+        serializer = BulkLikeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = like_posts(request.user.pk, serializer.validated_data['post_ids'])
+        self.notify_likes(results)
+        return Response({'results': [like_payload(result, liked=True) for result in results]})
+
+    # Top posts by time-decayed likes and comments: /posts/trending/?limit=<n>
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        limit = int_param(request, 'limit')
+        if limit is not None and limit < 1:
+            raise ValidationError({'limit': 'Must be a positive integer.'})
+        limit = min(limit or TRENDING_SIZE, TRENDING_SIZE)
+        if compact_fast_path(request):
+            rows = trending_queryset().values(*post_list_values.lookups)[:limit]
+            return Response({'results': post_list_values.serialize(rows)})
+        posts = list_queryset(trending_queryset(), request)[:limit]
+        serializer = PostListSerializer(posts, many=True, context={'request': request})
+        return Response({'results': serializer.data})
+
+    def notify_likes(self, results):
+        for result in results:
+            if result.changed and result.author_id != self.request.user.pk:
+                # Only ids are needed to build the notification, so skip loading the rows
+                notify(recipient=User(pk=result.author_id), actor=self.request.user, verb='liked your post',
+                       target=Post(pk=result.post_id, author_id=result.author_id))
 
 
 # Comment CRUD
-class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.all().order_by('-created_at')
+class CommentViewSet(CachedRetrieveMixin, FastListMixin, viewsets.ModelViewSet):
+    cache_label = 'comment'
+    fast_serializer = comment_values
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    # Comments on soft-deleted posts stay hidden until the reaper removes them
+    queryset = (
+        Comment.objects.filter(post__deleted_at__isnull=True)
+        .select_related('author').order_by('-created_at', '-id')
+    )
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated, IsAuthorOrReadOnly]
+    pagination_class = CreatedAtCursorPagination
+    throttle_scopes = {'create': 'comments'}
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        comment = serializer.save(author=self.request.user)
+        Post.objects.filter(pk=comment.post_id).update(comments_count=F('comments_count') + 1)
+        record_trending([comment.post_id], COMMENT_WEIGHT, times=[comment.created_at])
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        post_id = instance.post_id
+        # Replies cascade with their parent; take all of them back from the trending score
+        start, end = instance.subtree_range
+        created = list(Comment.objects.filter(post_id=post_id, path__gte=start, path__lt=end)
+                       .values_list('created_at', flat=True))
+        _, deleted = instance.delete()
+        removed = deleted.get(Comment._meta.label, 0)
+        Post.objects.filter(pk=post_id).update(comments_count=Greatest(F('comments_count') - removed, 0))
+        record_trending([post_id], -COMMENT_WEIGHT, times=created)
+
+    # A post's threads in depth-first order: /comments/thread/?post=<id>&depth=<max depth>
+    @action(detail=False, methods=['get'])
+    def thread(self, request):
+        post_id = int_param(request, 'post', required=True)
+        return self.paginate_thread(thread_queryset(post_id, int_param(request, 'depth')))
+
+    # "Load more replies": everything under one comment, optionally ?depth= levels down
+    @action(detail=True, methods=['get'])
+    def replies(self, request, pk=None):
+        comment = self.get_object()
+        return self.paginate_thread(replies_queryset(comment, int_param(request, 'depth')))
+
+    def paginate_thread(self, queryset):
+        paginator = PathCursorPagination()
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        return paginator.get_paginated_response(CommentSerializer(page, many=True).data)
 
 
 # Feed endpoint
 class FeedView(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FeedCursorPagination
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
     @action(detail=False, methods=['get'])
     def feed(self, request):
-        user = request.user
-        following_users = user.following.all()
-        posts = Post.objects.filter(author__in=following_users).order_by('-created_at')
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data)
+        paginator = self.pagination_class()
+        if compact_fast_path(request):
+            data = paginated_values(paginator, get_feed_queryset(request.user), request, self, post_list_values)
+            return paginator.get_paginated_response(data)
+        posts = list_queryset(get_feed_queryset(request.user), request)
+        page = paginator.paginate_queryset(posts, request, view=self)
+        serializer = PostListSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
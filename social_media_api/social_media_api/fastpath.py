@@ -0,0 +1,145 @@
+"""
+Fast path for read-only list endpoints.
+
+compile_values_serializer() reads a ModelSerializer's fields once and builds
+two things: the columns to fetch with .values(), and a plain generated
+function that turns one row dict into the output dict. No field objects or
+model instances are created per row. Responses are rendered by
+FastJSONRenderer, which uses orjson when it is installed.
+
+The output is byte-for-byte what the ModelSerializer and DRF's JSONRenderer
+produce (checked in the tests). Fields the compiler can't map to a column
+(method fields, string-related fields, nested serializers) need an
+explicit override; anything else raises ImproperlyConfigured at import
+time rather than producing different output.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import relations, serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to DRF's json.dumps rendering
+    orjson = None
+
+# Field types whose to_representation is the identity for values() output
+PASSTHROUGH_FIELDS = (
+    serializers.IntegerField, serializers.CharField, serializers.BooleanField, serializers.JSONField,
+)
+# Field types whose to_representation must still run (timezone, formatting)
+CONVERTED_FIELDS = (
+    serializers.DateTimeField, serializers.DateField, serializers.TimeField,
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson, producing the same bytes for compact, unicode JSON."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or not self.compact or self.ensure_ascii
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data)
+        except TypeError:
+            # Decimal, lazy translations, huge ints, ...: let DRF's encoder handle them
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class ValuesSerializer:
+    """Compiled form of a serializer: `lookups` for .values() and `row(values, context)`."""
+
+    def __init__(self, lookups, row):
+        self.lookups = lookups
+        self.row = row
+
+    def serialize(self, rows, context=None):
+        row = self.row
+        context = context or {}
+        return [row(values, context) for values in rows]
+
+
+def compile_values_serializer(serializer_class, overrides=None):
+    """
+    overrides maps a field name to (lookups, function(values, context)) for
+    fields that can't be read straight from a column.
+    """
+    overrides = overrides or {}
+    lookups = []
+    namespace = {}
+    parts = []
+    for index, (name, field) in enumerate(serializer_class().fields.items()):
+        if field.write_only:
+            continue
+        if name in overrides:
+            extra, func = overrides[name]
+            lookups.extend(lookup for lookup in extra if lookup not in lookups)
+            namespace[f'f{index}'] = func
+            parts.append(f'{name!r}: f{index}(r, c)')
+            continue
+
+        source = field.source.replace('.', '__')
+        if isinstance(field, relations.PrimaryKeyRelatedField):
+            expression = f'r[{source!r}]'
+        elif isinstance(field, CONVERTED_FIELDS):
+            namespace[f'f{index}'] = field.to_representation
+            # DRF skips to_representation for None
+            expression = f'(None if r[{source!r}] is None else f{index}(r[{source!r}]))'
+        elif isinstance(field, PASSTHROUGH_FIELDS) and not isinstance(field, serializers.SerializerMethodField):
+            expression = f'r[{source!r}]'
+        else:
+            raise ImproperlyConfigured(
+                f"{serializer_class.__name__}.{name} ({type(field).__name__}) needs an override to be compiled."
+            )
+        if source not in lookups:
+            lookups.append(source)
+        parts.append(f'{name!r}: {expression}')
+
+    code = f"def row(r, c):\n    return {{{', '.join(parts)}}}\n"
+    exec(code, namespace)
+    return ValuesSerializer(lookups, namespace['row'])
+
+
+def fast_path_enabled(request):
+    if not getattr(settings, 'API_FAST_LIST_RENDERING', True):
+        return False
+    renderer = getattr(request, 'accepted_renderer', None)
+    return isinstance(renderer, JSONRenderer) and renderer.get_indent(request.accepted_media_type, {}) is None
+
+
+def paginated_values(paginator, queryset, request, view, compiled, context=None):
+    """Paginate a .values() queryset (cursor pagination reads positions from dicts) and serialize the page."""
+    get_ordering = getattr(paginator, 'get_ordering', None)
+    ordering = get_ordering(request, queryset, view) if get_ordering else ()
+    ordering_fields = [field.lstrip('-') for field in ordering]
+    lookups = list(compiled.lookups) + [f for f in ordering_fields if f not in compiled.lookups]
+    page = paginator.paginate_queryset(queryset.values(*lookups), request, view=view)
+    return compiled.serialize(page, context(page) if context else None)
+
+
+class FastListMixin:
+    """
+    list() over .values() for ListModelMixin views. Set `fast_serializer`
+    to a compiled ValuesSerializer and override fast_path_supported() for
+    query parameters the fast path doesn't handle.
+    """
+    fast_serializer = None
+
+    def fast_path_supported(self, request):
+        return True
+
+    def get_fast_context(self, rows):
+        return {}
+
+    def list(self, request, *args, **kwargs):
+        if self.fast_serializer is None or not fast_path_enabled(request) or not self.fast_path_supported(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is None:
+            rows = list(queryset.values(*self.fast_serializer.lookups))
+            return Response(self.fast_serializer.serialize(rows, self.get_fast_context(rows)))
+        data = paginated_values(self.paginator, queryset, request, self, self.fast_serializer, self.get_fast_context)
+        return self.get_paginated_response(data)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -97,6 +98,15 @@ DATABASES = {
 }
 
 
+# Cache (unread counters and other hot lookups)
+# Use a shared backend such as Redis when running several processes
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -147,12 +157,94 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.jwt.StatelessJWTAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # Only views that declare throttle_scope / throttle_scopes are limited
+    'DEFAULT_THROTTLE_CLASSES': (
+        'social_media_api.throttling.ActionRateThrottle',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'likes': '120/min',
+        'comments': '30/min',
+        'follows': '60/min',
+    },
 }
 
+# Post search: None picks PostgresSearchBackend on PostgreSQL and the
+# in-memory InvertedIndexBackend elsewhere
+POSTS_SEARCH_BACKEND = None
+POSTS_SEARCH_MAX_RESULTS = 1000
+
+# Feed: authors above this follower count are merged into feeds at read time
+FEED_FANOUT_MAX_FOLLOWERS = 10000
+FEED_BACKFILL_LIMIT = 50
+FEED_MAX_PULL_BRANCHES = 10
+
+# Cached following/follower id sets (invalidated on follow changes)
+FOLLOW_GRAPH_CACHE_TIMEOUT = 3600
+
+# "Who to follow" batch job (compute_follow_suggestions)
+FOLLOW_SUGGESTIONS_TOP_K = 20
+FOLLOW_SUGGESTIONS_POPULARITY_WEIGHT = 0.5
+FOLLOW_SUGGESTIONS_MAX_EXPANSION = 5000
+
+# List/feed pages are compact: an excerpt of this many characters, and the
+# most recent comments only with ?expand=comments (None = all)
+POST_EXCERPT_LENGTH = 280
+POST_COMMENT_PREVIEW_LIMIT = None
+# Post, comment, feed and notification lists render from .values() rows with
+# orjson (social_media_api.fastpath); False uses the regular serializers
+API_FAST_LIST_RENDERING = True
+# Trending: likes and comments weighted by age (half-life in seconds); run
+# rebucket_trending at least once per bucket
+TRENDING_HALF_LIFE = 6 * 3600
+TRENDING_BUCKET_SECONDS = 3600
+TRENDING_LIKE_WEIGHT = 1.0
+TRENDING_COMMENT_WEIGHT = 2.0
+TRENDING_MIN_SCORE = 0.01
+TRENDING_SIZE = 50
+# Rendered post/comment detail responses (ETag / Last-Modified)
+POST_DETAIL_CACHE_TIMEOUT = 300
+
+# Notifications are written off the request path; use
+# 'notifications.dispatch.OutboxBackend' together with the
+# process_notification_outbox worker to persist the queue in the database.
+NOTIFICATIONS_BACKEND = 'notifications.dispatch.ThreadPoolBackend'
+NOTIFICATIONS_WORKERS = 2
+NOTIFICATIONS_BATCH_SIZE = 500
+NOTIFICATIONS_AGGREGATION_WINDOW = timedelta(hours=24)
+NOTIFICATIONS_RECENT_ACTORS = 3
+NOTIFICATIONS_READ_RETENTION_DAYS = 30
+NOTIFICATIONS_UNREAD_RETENTION_DAYS = 90
+NOTIFICATIONS_UNREAD_COUNT_TIMEOUT = 300
+# Live delivery: swap the broker for a shared one when running several processes
+NOTIFICATIONS_BROKER = 'notifications.broker.LocalBroker'
+NOTIFICATIONS_STREAM_KEEPALIVE = 15
+NOTIFICATIONS_SYNC_STREAM_MAX_SECONDS = 60
+NOTIFICATIONS_LONG_POLL_SECONDS = 25
+
+# Token auth lookup cache (per process)
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_CACHE_TTL = 60
+
+# Stateless JWT: keys live in a local keyset file managed by rotate_jwt_keys
+JWT_KEYSET_FILE = os.path.join(BASE_DIR, 'jwt_keys.json')
+JWT_ACCESS_TOKEN_LIFETIME = 300
+JWT_REFRESH_TOKEN_LIFETIME = 7 * 24 * 3600
+JWT_LEEWAY = 30
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Profile pictures: square JPEG thumbnails written in the background after upload
+PROFILE_PICTURE_SIZES = {'small': 64, 'medium': 200, 'large': 600}
+PROFILE_PICTURE_JPEG_QUALITY = 85
+PROFILE_PICTURE_WORKERS = 2
+PROFILE_PICTURE_ASYNC = True
+
 # Security settings
 SECURE_BROWSER_XSS_FILTER = True
 X_FRAME_OPTIONS = 'DENY'
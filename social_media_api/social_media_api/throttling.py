@@ -0,0 +1,116 @@
+"""
+Sliding-window rate limiting.
+
+SlidingWindowRateThrottle keeps one counter per fixed window in the Django
+cache. The rate is estimated by weighting the previous window's count by how
+much of it still overlaps the sliding window, which is as smooth as a
+request log but costs two cache keys per client. Counters only use
+cache.add/incr/decr, so the throttle works on the local-memory cache and
+on shared backends (Redis, Memcached), where those calls are atomic.
+
+Views pick a rate with ``throttle_scope`` (plain views) or
+``throttle_scopes`` (viewset action -> scope). Rates come from
+REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']. Views without a scope are not
+limited.
+"""
+import math
+
+from django.core.cache import cache as default_cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    cache = default_cache
+    cache_format = 'throttle:%(scope)s:%(ident)s:%(window)d'
+
+    def __init__(self):
+        # Scope and rate are resolved per view in allow_request
+        self.rate = self.num_requests = self.duration = None
+
+    def get_scope(self, request, view):
+        return getattr(view, 'throttle_scope', None)
+
+    def get_ident_for(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user-{request.user.pk}'
+        return f'ip-{self.get_ident(request)}'
+
+    def get_rate(self):
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            return None
+
+    def window_key(self, window):
+        return self.cache_format % {'scope': self.scope, 'ident': self.ident, 'window': window}
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(request, view)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.ident = self.get_ident_for(request)
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.elapsed = self.now - window * self.duration
+        current_key, previous_key = self.window_key(window), self.window_key(window - 1)
+
+        # Counters outlive their window by one duration so they can act as "previous"
+        self.cache.add(current_key, 0, timeout=self.duration * 2)
+        try:
+            self.current = self.cache.incr(current_key)
+        except ValueError:
+            # Evicted between add and incr
+            self.cache.set(current_key, 1, timeout=self.duration * 2)
+            self.current = 1
+        self.previous = self.cache.get(previous_key, 0)
+
+        allowed = self.estimate() <= self.num_requests
+        if not allowed:
+            # Rejected requests don't use up the budget
+            self.cache.decr(current_key)
+            self.current -= 1
+        self.set_headers(view, allowed)
+        return allowed
+
+    def estimate(self):
+        overlap = (self.duration - self.elapsed) / self.duration
+        return self.previous * overlap + self.current
+
+    def wait(self):
+        # Time until the previous window's weight has decayed enough for one more request
+        remaining_window = self.duration - self.elapsed
+        budget = self.num_requests - self.current - 1
+        if budget >= 0:
+            if not self.previous:
+                return 0.0
+            return max(0.0, remaining_window - budget * self.duration / self.previous)
+        # This window alone is over the limit: wait until it becomes the decaying previous window
+        return remaining_window + self.duration * (1 - (self.num_requests - 1) / self.current)
+
+    def set_headers(self, view, allowed):
+        remaining = max(0, math.floor(self.num_requests - self.estimate())) if allowed else 0
+        reset = math.ceil(self.duration - self.elapsed) if allowed else math.ceil(self.wait())
+        headers = view.headers
+        # With several throttles on a view, report the tightest one
+        if 'X-RateLimit-Remaining' in headers and int(headers['X-RateLimit-Remaining']) < remaining:
+            return
+        headers['X-RateLimit-Limit'] = str(self.num_requests)
+        headers['X-RateLimit-Remaining'] = str(remaining)
+        headers['X-RateLimit-Reset'] = str(reset)
+
+
+class ActionRateThrottle(SlidingWindowRateThrottle):
+    """Scope from ``view.throttle_scopes[view.action]``, falling back to ``view.throttle_scope``."""
+
+    def get_scope(self, request, view):
+        scopes = getattr(view, 'throttle_scopes', None)
+        action = getattr(view, 'action', None)
+        if scopes and action in scopes:
+            return scopes[action]
+        return super().get_scope(request, view)